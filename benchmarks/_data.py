@@ -0,0 +1,46 @@
+import functools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import DSCI_prediction  # noqa: F401  installed, as under asv
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# combinations with more float64 cells than this are skipped (about 1.6GB of data)
+MAX_CELLS = int(os.environ.get("DSCI_BENCH_MAX_CELLS", 2 * 10 ** 8))
+
+
+def check_size(n_rows, n_cols):
+    """Raises NotImplementedError, the asv way of skipping a parameter combination, for oversized data"""
+    if n_rows * n_cols > MAX_CELLS:
+        raise NotImplementedError(f"{n_rows} x {n_cols} is over DSCI_BENCH_MAX_CELLS")
+
+
+@functools.lru_cache(maxsize=2)
+def make_frame(n_rows, n_cols, n_classes=2, seed=0):
+    """
+    Returns a synthetic DataFrame of n_cols float features x0, x1, ... and a
+    "class" label that depends on the first features, so models have signal
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_rows, n_cols))
+    X[:, 1::2] = np.exp(X[:, 1::2])  # skewed columns next to symmetric ones
+    signal = X[:, : min(n_cols, 4)].sum(axis=1) + rng.standard_normal(n_rows)
+    edges = np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1])
+    frame = pd.DataFrame(X, columns=[f"x{i}" for i in range(n_cols)], copy=False)
+    frame["class"] = np.searchsorted(edges, signal)
+    return frame
+
+
+def split_by_class(frame):
+    """Returns the rows of the two first classes as separate frames, as plot_hist_overlay takes them"""
+    return [frame[frame["class"] == label] for label in (0, 1)]
+
+
+def grid_shape(n):
+    cols = int(np.ceil(np.sqrt(n)))
+    return int(np.ceil(n / cols)), cols
@@ -0,0 +1,110 @@
+"""
+Timing (time_*) and peak memory (peakmem_*) benchmarks of the public plotting
+and tuning functions over the data scales of the params lists. Runs under asv
+(see asv.conf.json) or the stand-alone runner, python -m benchmarks.run.
+"""
+import warnings
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+
+# ._data puts src/ on the path when the package is not installed
+from ._data import check_size, grid_shape, make_frame, split_by_class
+from DSCI_prediction.DSCI_prediction import (boxplot_plotting, plot_cm, plot_hist_overlay,
+                                             tuned_para_table)
+
+ROWS = [1000, 10000, 100000, 1000000, 10000000]
+COLUMNS = [4, 32, 500]
+
+
+class HistOverlay:
+    params = (ROWS, COLUMNS)
+    param_names = ["rows", "cols"]
+    timeout = 600
+
+    def setup(self, rows, cols):
+        check_size(rows, cols)
+        self.df0, self.df1 = split_by_class(make_frame(rows, cols))
+        self.columns = [f"x{i}" for i in range(cols)]
+
+    def time_plot_hist_overlay(self, rows, cols):
+        plot_hist_overlay(self.df0, self.df1, self.columns, ["0", "1"])
+
+    def peakmem_plot_hist_overlay(self, rows, cols):
+        plot_hist_overlay(self.df0, self.df1, self.columns, ["0", "1"])
+
+    def time_plot_hist_overlay_sampled(self, rows, cols):
+        plot_hist_overlay(self.df0, self.df1, self.columns, ["0", "1"], sample=True)
+
+
+class Boxplots:
+    params = (ROWS, COLUMNS)
+    param_names = ["rows", "cols"]
+    timeout = 600
+
+    def setup(self, rows, cols):
+        check_size(rows, cols)
+        self.frame = make_frame(rows, cols)
+        self.variables = [f"x{i}" for i in range(cols)]
+        self.shape = grid_shape(cols)
+
+    def time_boxplot_plotting(self, rows, cols):
+        boxplot_plotting(*self.shape, 4 * self.shape[1], 3 * self.shape[0], self.variables,
+                         self.frame, 1)
+
+    def peakmem_boxplot_plotting(self, rows, cols):
+        boxplot_plotting(*self.shape, 4 * self.shape[1], 3 * self.shape[0], self.variables,
+                         self.frame, 1)
+
+    def time_boxplot_plotting_sampled(self, rows, cols):
+        boxplot_plotting(*self.shape, 4 * self.shape[1], 3 * self.shape[0], self.variables,
+                         self.frame, 1, sample=True)
+
+
+class TunedParaTable:
+    params = ([1000, 10000, 100000], [4, 32], [5, 20, 80])
+    param_names = ["rows", "cols", "grid"]
+    timeout = 900
+
+    def setup(self, rows, cols, grid):
+        check_size(rows, cols)
+        frame = make_frame(rows, cols)
+        self.X, self.y = frame.drop(columns="class"), frame["class"]
+        self.grid = {"n_neighbors": list(range(1, grid + 1))}
+
+    def _search(self):
+        return GridSearchCV(KNeighborsClassifier(), self.grid, cv=5)
+
+    def time_tuned_para_table(self, rows, cols, grid):
+        tuned_para_table(self._search(), self.X, self.y)
+
+    def time_tuned_para_table_generic(self, rows, cols, grid):
+        # the plain GridSearchCV path, for comparison with the KNN fast path
+        tuned_para_table(self._search(), self.X, self.y, fast_knn=False, prefix_cache=False)
+
+    def peakmem_tuned_para_table(self, rows, cols, grid):
+        tuned_para_table(self._search(), self.X, self.y)
+
+
+class PlotCM:
+    params = (ROWS, [4, 32])
+    param_names = ["rows", "cols"]
+    timeout = 600
+
+    def setup(self, rows, cols):
+        check_size(rows, cols)
+        frame = make_frame(rows, cols)
+        self.X, self.y = frame.drop(columns="class"), frame["class"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.model = LogisticRegression(max_iter=200).fit(self.X[:10000], self.y[:10000])
+
+    def time_plot_cm(self, rows, cols):
+        plot_cm(self.model, None, None, self.X, self.y, "cm", prefit=True)
+
+    def time_plot_cm_fit(self, rows, cols):
+        plot_cm(LogisticRegression(max_iter=200), self.X, self.y, self.X, self.y, "cm")
+
+    def peakmem_plot_cm(self, rows, cols):
+        plot_cm(self.model, None, None, self.X, self.y, "cm", prefit=True)
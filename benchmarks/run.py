@@ -0,0 +1,161 @@
+"""
+Stand-alone runner of the benchmarks of benchmarks.py, for machines without
+asv. Every time_* method is timed (best and median of --repeat runs) and every
+peakmem_* method is run once under tracemalloc for its peak allocated bytes.
+
+    python -m benchmarks.run --profile quick --save benchmarks/baselines/quick.json
+    python -m benchmarks.run --profile quick --compare benchmarks/baselines/quick.json
+
+With --compare a report of the ratio of every result to the baseline is printed
+and the exit code is 1 when any of them is slower or larger by more than
+--threshold.
+"""
+import argparse
+import gc
+import inspect
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from . import benchmarks
+
+# the largest value of every parameter each profile runs
+PROFILES = {
+    "quick": {"rows": 10000, "cols": 32, "grid": 20},
+    "medium": {"rows": 1000000, "cols": 500, "grid": 80},
+    "full": {},
+}
+
+
+def _suites():
+    return [cls for _, cls in inspect.getmembers(benchmarks, inspect.isclass)
+            if cls.__module__ == benchmarks.__name__ and hasattr(cls, "params")]
+
+
+def _combinations(cls, limits):
+    params = cls.params if isinstance(cls.params, tuple) else (cls.params,)
+    values = [[v for v in vals if name not in limits or v <= limits[name]]
+              for name, vals in zip(cls.param_names, params)]
+    return list(itertools.product(*values))
+
+
+def _machine():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "pandas": pd.__version__}
+
+
+def run(profile="quick", repeat=5, pattern=None, log=print):
+    """
+    Runs every benchmark of the profile.
+    Returns a DataFrame with the benchmark, params, kind ("time" or "peakmem"),
+    value (seconds or bytes) and for times the median of the runs.
+    """
+    rows = []
+    for cls in _suites():
+        methods = [name for name in dir(cls) if name.startswith(("time_", "peakmem_"))]
+        if pattern is not None:
+            methods = [name for name in methods if pattern in f"{cls.__name__}.{name}"]
+        if not methods:
+            continue
+        for combo in _combinations(cls, PROFILES[profile]):
+            suite = cls()
+            try:
+                suite.setup(*combo)
+            except NotImplementedError:
+                continue
+            key = ", ".join(f"{n}={v}" for n, v in zip(cls.param_names, combo))
+            for name in methods:
+                method = getattr(suite, name)
+                kind = name.split("_", 1)[0]
+                method(*combo)  # warm up lazy imports and caches
+                if kind == "time":
+                    runs = []
+                    for _ in range(repeat):
+                        gc.collect()
+                        start = time.perf_counter()
+                        method(*combo)
+                        runs.append(time.perf_counter() - start)
+                    value, median = min(runs), float(np.median(runs))
+                else:
+                    gc.collect()
+                    tracemalloc.start()
+                    method(*combo)
+                    value, median = tracemalloc.get_traced_memory()[1], np.nan
+                    tracemalloc.stop()
+                rows.append({"benchmark": f"{cls.__name__}.{name}", "params": key,
+                             "kind": kind, "value": value, "median": median})
+                log(f"{cls.__name__}.{name}({key}): "
+                    + (f"{value:.4f}s" if kind == "time" else f"{value / 2 ** 20:.1f}MiB"))
+            gc.collect()
+    return pd.DataFrame(rows, columns=["benchmark", "params", "kind", "value", "median"])
+
+
+def save(results, path, profile):
+    with open(path, "w") as f:
+        # JSON has no NaN: a missing median or memory is written as null
+        json.dump({"profile": profile, "machine": _machine(),
+                   "results": results.astype(object).replace({np.nan: None})
+                                     .to_dict(orient="records")}, f, indent=1, allow_nan=False)
+
+
+def compare(results, baseline, threshold=0.2, noise=0.01):
+    """
+    Returns the results joined with the baseline results, with their ratio and a
+    status of "slower"/"larger" or "faster"/"smaller" beyond threshold, "same",
+    or "new". Time differences under noise seconds are always "same".
+    """
+    old = pd.DataFrame(baseline["results"])[["benchmark", "params", "value"]]
+    table = results.merge(old, on=["benchmark", "params"], how="left", suffixes=("", "_baseline"))
+    table["ratio"] = table["value"] / table["value_baseline"]
+    worse = np.where(table["kind"] == "time", "slower", "larger")
+    better = np.where(table["kind"] == "time", "faster", "smaller")
+    changed = (table["kind"] != "time") | ((table["value"] - table["value_baseline"]).abs() >= noise)
+    table["status"] = np.select([table["ratio"].isna(), changed & (table["ratio"] > 1 + threshold),
+                                 changed & (table["ratio"] < 1 / (1 + threshold))],
+                                ["new", worse, better], "same")
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bench", help="only benchmarks whose Class.method contains this")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a JSON file of earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change reported as a regression (default: 0.2)")
+    parser.add_argument("--noise", type=float, default=0.01,
+                        help="time differences below this many seconds are ignored (default: 0.01)")
+    args = parser.parse_args(argv)
+
+    results = run(args.profile, args.repeat, args.bench)
+    if args.save:
+        save(results, args.save, args.profile)
+    if args.compare is None:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    if baseline["machine"] != _machine():
+        print("note: the baseline was recorded on another machine or library versions")
+    table = compare(results, baseline, args.threshold, args.noise)
+    with pd.option_context("display.width", 200, "display.max_rows", None,
+                           "display.float_format", "{:.4g}".format):
+        print(table[["benchmark", "params", "value_baseline", "value", "ratio", "status"]]
+              .to_string(index=False))
+    regressions = table["status"].isin(["slower", "larger"])
+    print(f"{regressions.sum()} regressions, "
+          f"{table['status'].isin(['faster', 'smaller']).sum()} improvements")
+    return int(regressions.any())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,299 @@
+import numbers
+import os
+import time
+import warnings
+
 import pandas as pd
 import numpy as np
-import argparse
 
-import matplotlib.pyplot as plt
+# matplotlib, sklearn and the modules built on them are imported by the
+# functions that need them, so importing this module stays fast
+from ._arrow import is_arrow_source, read_frame, arrow_xy
+from ._boxplot import summary_table, bxp_stats, StreamingSummary
+from ._compact import DEFAULT_RTOL, compact_frame, compact_xy
+from ._sample import (DEFAULT_SAMPLE_SIZE, StratifiedReservoir, stratified_sample, sample_rows,
+                      scale_counts, share_error, sample_attrs, sample_note)
+from ._cache import SearchCache, search_fingerprint, UnstableReprError
+from ._confusion import (label_codes, confusion_counts, tidy_matrices, matrix_of, array_chunks,
+                         streaming_confusion, threshold_table, counts_at)
+from ._histogram import histogram_counts, tidy_histogram, histogram_arrays, HistogramAccumulator
+from ._aio import run as _run_async, set_executor
+from ._instrument import (laps, emit, enabled as instrument_enabled, instrument,
+                          register_callback, unregister_callback, carry_context)
+
 
-import seaborn as sns
+def __getattr__(name):
+    if name == "FoldCache":
+        from ._search import FoldCache
+        return FoldCache
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-import sklearn
+def _new_figure(**kwargs):
+    """
+    Returns a matplotlib Figure attached to its own Agg canvas. It is not
+    registered with pyplot, so figures can be built concurrently from threads
+    and are freed once unreferenced. Every figure the plotting functions return
+    is made here: plt.show() does not draw it, fig.savefig(path) saves it and
+    display(fig) shows it in a notebook
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
 
-from sklearn.metrics import (confusion_matrix, ConfusionMatrixDisplay)
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
 
 
-    
-def plot_hist_overlay(df0, df1, columns, labels, fig_no="1",alpha=0.7, bins=5, **kwargs):
+def _compact_rtol(compact):
+    """
+    Returns the relative tolerance of a compact argument, None when it is off
+    """
+    if compact is False or compact is None:
+        return None
+    if compact is True:
+        return DEFAULT_RTOL
+    if isinstance(compact, bool) or not isinstance(compact, numbers.Real) or compact < 0:
+        raise TypeError("'compact' should be of type bool or a non-negative number")
+    return float(compact)
+
+
+def _sample_size(sample):
+    """
+    Returns the rows per class (an int) or the target error (a float) of a sample
+    argument, None when it is off
+    """
+    if sample is False or sample is None:
+        return None
+    if sample is True:
+        return DEFAULT_SAMPLE_SIZE
+    if isinstance(sample, (int, np.integer)) and sample >= 1:
+        return int(sample)
+    if isinstance(sample, float) and 0 < sample < 0.5:
+        return sample
+    raise TypeError("'sample' should be of type bool, a positive int or a float below 0.5")
+
+
+def _column_block(df, columns):
+    """
+    Returns the given columns of df as one 2-D float array of shape (n_rows, n_columns),
+    float32 when every column is
+    """
+    if isinstance(df, pd.core.frame.DataFrame):
+        block = df[columns]
+        dtype = np.float32 if all(t == np.float32 for t in block.dtypes) else float
+        return block.to_numpy(dtype=dtype)
+    return np.column_stack([np.asarray(df[x], dtype=float) for x in columns])
+
+
+def hist_summary(df0, df1, columns, labels=None, bins=5, label_col=None, compact=False,
+                 sample=None):
+    """
+    A function which returns the histogram data drawn by plot_hist_overlay,
+    without importing matplotlib: the bin edges and the count of every bin for
+    every label and numerical feature, binned in one pass
+    -------
+    PARAMETERS:
+    df0, df1, columns, bins, label_col, compact, sample:
+        As for plot_hist_overlay
+    labels: optional, default=None
+        A list of label for each class, by default 0 and 1 for df0 and df1 or
+        the sorted class values of label_col or of a HistogramAccumulator
+    -------
+    RETURNS:
+    A pandas.core.frame.DataFrame with the columns variable, label, bin, left,
+    right and count, one row per bin, ordered by variable, label and bin. It
+    serializes with to_json(orient="records") or pyarrow.Table.from_pandas.
+    With sample, the counts are float estimates for all the rows and attrs["sample"]
+    holds n_population and n_sampled (by label) and error (by variable)
+    -------
+    Examples:
+    hist_summary(train_df, None, ["unif_size"], label_col="class").to_json(orient="records")
+    """
+    timer = laps("hist_summary")
+    if isinstance(df0, HistogramAccumulator):
+        if df1 is not None:
+            raise TypeError("'df1' should be None when 'df0' is a HistogramAccumulator")
+        if not isinstance(labels, (list, type(None))):
+            raise TypeError("'labels' should be of type list or None")
+        if not isinstance(columns, list):
+            raise TypeError("'columns' should be of type list")
+        table = df0.table(columns, labels)
+        timer.lap("table")
+        return table
+    if isinstance(columns, list):
+        # only the histogrammed columns (and labels) are read from Arrow sources
+        if is_arrow_source(df0):
+            df0 = read_frame(df0, columns + ([label_col] if label_col is not None else []))
+        if is_arrow_source(df1):
+            df1 = read_frame(df1, columns)
+    timer.lap("read")
+    size = _sample_size(sample)
+    # chunks can only be binned from a sample of them
+    streamed = size is not None and (_is_chunks(df0) or _is_chunks(df1))
+    if label_col is not None:
+        if not (isinstance(df0, pd.core.frame.DataFrame) or streamed):
+            raise TypeError("'df0' should be of type pandas.Dataframe when 'label_col' is given")
+        if df1 is not None:
+            raise TypeError("'df1' should be None when 'label_col' is given")
+    else:
+        if not (isinstance(df0, (pd.core.series.Series,
+                                     pd.core.frame.DataFrame, np.ndarray)) or streamed):
+            raise TypeError("'df0' should be of type numpy.array or pandas.Dataframe")
+        if not (isinstance(df1, (pd.core.series.Series,
+                                     pd.core.frame.DataFrame, np.ndarray)) or streamed):
+            raise TypeError("'df1' should be of type numpy.array or pandas.Dataframe")
+    if not isinstance(labels, (list, type(None))):
+        raise TypeError("'labels' should be of type list or None")
+    if not isinstance(columns, list):
+        raise TypeError("'columns' should be of type list")
+    rtol = _compact_rtol(compact)
+    timer.lap("validate")
+    if size is not None:
+        df0, df1, population, sampled = _sample_classes(df0, df1, columns, label_col, size)
+        timer.lap("sample", rows=int(population.sum()), sampled=int(sampled.sum()))
+    if rtol is not None:
+        if label_col is not None:
+            df0 = compact_frame(df0, label_col, columns, rtol)
+        else:
+            df0, df1 = (compact_frame(df, columns=columns, rtol=rtol)
+                        if isinstance(df, pd.core.frame.DataFrame) else df for df in (df0, df1))
+        timer.lap("compact")
+
+    # bin every column of every label in one pass
+    if label_col is not None:
+        # label codes index the original column buffers, nothing is copied per class
+        codes, classes = pd.factorize(df0[label_col], sort=True)
+        if labels is None:
+            labels = list(classes)
+        counts, edges = histogram_counts([df0[x].to_numpy() for x in columns],
+                                         codes, len(classes), bins)
+    else:
+        values = np.vstack([_column_block(df0, columns), _column_block(df1, columns)])
+        codes = np.repeat([0, 1], [len(df0), len(df1)])
+        counts, edges = histogram_counts(values, codes, 2, bins)
+        if labels is None:
+            labels = [0, 1]
+    if len(labels) < counts.shape[0]:
+        raise ValueError(f"'labels' should have one label for each of the {counts.shape[0]} classes")
+    timer.lap("bin")
+    if size is None:
+        return tidy_histogram(counts, edges, columns, labels[:counts.shape[0]])
+    counts, error = scale_counts(counts, sampled, population)
+    table = tidy_histogram(counts, edges, columns, labels[:counts.shape[0]])
+    table.attrs["sample"] = sample_attrs(labels, population, sampled, dict(zip(columns, error)))
+    return table
+
+
+def _sample_classes(df0, df1, columns, label_col, size):
+    """
+    Returns df0 and df1 for hist_summary reduced to a sample of size rows of every
+    class (see plot_hist_overlay), with the rows of every class before and after
+    """
+    if label_col is not None:
+        if _is_chunks(df0):
+            reservoir = StratifiedReservoir(columns, label_col, size)
+            for chunk in df0:
+                reservoir.update(chunk)
+            df0, population, sampled, _ = reservoir.frame()
+        else:
+            df0, population, sampled, _ = stratified_sample(df0, columns, label_col, size)
+        return df0, None, population, sampled
+    frames, population, sampled = [], [], []
+    for df in (df0, df1):
+        if _is_chunks(df):
+            reservoir = StratifiedReservoir(columns, size=size)
+            for chunk in df:
+                reservoir.update(chunk, label=0)
+            df, n, kept = reservoir.frame()[:3]
+            n, kept = int(n.sum()), int(kept.sum())
+        else:
+            df, n, kept = sample_rows(df, size)
+        frames.append(df)
+        population.append(n)
+        sampled.append(kept)
+    return frames[0], frames[1], np.array(population), np.array(sampled)
+
+
+# the parameters of Axes.hist that Axes.stairs does not take
+_HIST_ONLY = {"histtype", "cumulative", "weights", "range", "bottom", "align",
+              "rwidth", "log", "stacked"}
+
+
+def plot_hist_overlay(df0, df1, columns, labels, fig_no="1",alpha=0.7, bins=5, label_col=None,
+                      compact=False, sample=None, density=False, **kwargs):
     """
     A function that plot multiple histogram for a target
     classification label against each numerical features.
     The resulting histograms will be a grid layout contained in
-    one single Figure object
+    one single Figure object, drawn from hist_summary
     PARAMETERS:
     -------
     df0:
-        A pandas DataFrame that is corresponded to the label 0
+        A pandas DataFrame that is corresponded to the label 0,
+        or the whole DataFrame when label_col is given, or a HistogramAccumulator
+        to draw its histograms (df1 is then None, and bins and label_col unused).
+        df0 and df1 may also be a pyarrow.Table, a pyarrow dataset or the path of a
+        Parquet or Arrow IPC file, of which only columns and label_col are read
     df1:
-        A pandas DataFrame that is corresponded to the label 1
+        A pandas DataFrame that is corresponded to the label 1,
+        or None when label_col is given
     columns:
         A list of column name
     labels: 
-        A list of label for each of the histograms for each label
+        A list of label for each of the histograms for each label.
+        When label_col is given it may be None to use the class values themselves
     fig_no: optional, default="1"
         A string denoting the figure number, in the case of multiple figures
     alpha: optional, default=0.7
         A float denotes the alpha value for the matplotlib hist function
-    bin: optional, default=5
-        An int denotes the number of bins for the matplotlib hist function
+    bins: optional, default=5
+        An int denotes the number of equal-width bins, or a sequence of bin edges.
+        The edges are shared by both labels so the bars line up. The names of the
+        numpy bin estimators (e.g. "auto") are not accepted
+    label_col: optional, default=None
+        A column name of df0 holding the target label. Every class found in it,
+        in sorted order, is binned straight from the columns of df0 without
+        splitting the frame into one copy per class
+    compact: optional, default=False
+        Bin the float32 columns and categorical label_col of compact_frame
+        (True, or a number as its rtol). Halves the memory of the binned data;
+        counts only differ for values within that tolerance of a bin edge
+    sample: optional, default=None
+        Bin a uniform sample of the rows of every class instead of every row:
+        an int of rows per class, True for 200,000, or a float target error of
+        the bin shares (e.g. 0.005 draws about 66,000 rows per class, fewer for
+        small classes). The counts are scaled up to estimates for all the rows and
+        every subplot notes the sample and the largest error of a bin count, as a
+        share of its class, with 99% confidence. The sample is drawn with a fixed
+        seed; a categorical label_col (see compact_frame) keeps sampling 1e8 rows
+        under a second. df0 (and df1) may then also be iterables of DataFrame
+        chunks, which are sampled as they stream past
+    density: optional, default=False
+        Draw every label's histogram as a density (its counts divided by the
+        label's binned rows and the bin width) as matplotlib hist does
     **kwargs:
-        Other parameters for the plotting function
+        Other parameters for the matplotlib stairs function, e.g. ec="white".
+        The options only the matplotlib hist function has (histtype, cumulative,
+        weights, ...) raise a TypeError
     REQUISITES: 
-    target label are binary i.e 0 or 1, negative or positive
+    target label are binary i.e 0 or 1, negative or positive, unless label_col is given
     -------
     RETURNS:
     -------
-    A matplotlib.figure.Figure object
+    A tuple of a matplotlib.figure.Figure object and its last Axes
     Examples:
     -------
     benign_cases = train_df[train_df["class"] == 0]   # df0             
     malignant_cases = train_df[train_df["class"] == 1] # df1
     plot_hist_overlay(benign_cases, malignant_cases,["unif_size"], labels=["0 - benign", "1 - malignant"]
+    plot_hist_overlay(train_df, None, ["unif_size"], labels=["0 - benign", "1 - malignant"], label_col="class")
+    acc = HistogramAccumulator(["unif_size"], label_col="class")
+    for chunk in pd.read_csv("train.csv", chunksize=100_000):
+        acc.update(chunk)
+    plot_hist_overlay(acc, None, ["unif_size"], labels=None)
+    plot_hist_overlay(pd.read_csv("train.csv", chunksize=100_000), None, ["unif_size"], None,
+                      label_col="class", sample=0.005)
     
     """
     # These are legacy codes are comment out in case we need to reuse in the future
@@ -61,44 +307,189 @@ def plot_hist_overlay(df0, df1, columns, labels, fig_no="1",alpha=0.7, bins=5, *
     # ax.set_title(f"Figure {fig_no}: Histogram of {column_name} for each target class label")
     # return ax
 
-    if not isinstance(df0, (pd.core.series.Series,
-                                pd.core.frame.DataFrame, np.ndarray)):
-        raise TypeError("'df0' should be of type numpy.array or pandas.Dataframe")
-    if not isinstance(df1, (pd.core.series.Series,
-                                pd.core.frame.DataFrame, np.ndarray)):
-        raise TypeError("'df1' should be of type numpy.array or pandas.Dataframe")
-    if not isinstance(columns, list):
-        raise TypeError("'columns' should be of type list")
-    if not isinstance(labels, list):
+    if label_col is None and not isinstance(df0, HistogramAccumulator) and not isinstance(labels, list):
         raise TypeError("'labels' should be of type list")
     if not isinstance(fig_no, str):
         raise TypeError("'fig_no' should be of 'str'")
+    hist_only = sorted(set(kwargs) & _HIST_ONLY)
+    if hist_only:
+        raise TypeError(f"{hist_only} are options of the matplotlib hist function, the histograms "
+                        "are drawn with the stairs function")
+    timer = laps("plot_hist_overlay")
+    summary = hist_summary(df0, df1, columns, labels, bins=bins, label_col=label_col,
+                           compact=compact, sample=sample)
+    timer.lap("summary")
 
     ## other parameters are supplied into the matplotlib functions
 
     # To automatically calculating the size of dimension of the figures (Square shape)
     size = len(columns)
     dim = np.ceil(np.sqrt([size])).astype(int)[0]
-    fig = plt.figure(1, figsize=(22,22))
+    fig = _new_figure(figsize=(22,22))
 
+    # each histogram is drawn as a single step patch instead of one patch per bar
+    counts, edges, labels = histogram_arrays(summary, columns)
+    if density:
+        counts = [c / np.maximum(c.sum(axis=1, keepdims=True), 1) / np.diff(e)
+                  for c, e in zip(counts, edges)]
     for idx, x in enumerate(columns):
-        subplot=plt.subplot(dim, dim, idx+1)
+        subplot=fig.add_subplot(dim, dim, idx+1)
         col_name = x.title().replace("_", " ")
-        subplot.hist(df0[x], alpha=alpha, bins=bins, label=labels[0], **kwargs)
-        subplot.hist(df1[x], alpha=alpha, bins=bins, label=labels[1], **kwargs)
+        for k in range(len(labels)):
+            subplot.stairs(counts[idx][k], edges[idx], fill=True, alpha=alpha, label=str(labels[k]),
+                           **kwargs)
         subplot.legend(loc="upper right")
+        if "sample" in summary.attrs:
+            subplot.text(0.02, 0.98, sample_note(summary.attrs["sample"], x, "bin counts"),
+                         transform=subplot.transAxes, va="top", fontsize=11)
         subplot.set_xlabel(col_name, fontsize=14)
-        subplot.set_ylabel("Count", fontsize=14)
+        subplot.set_ylabel("Density" if density else "Count", fontsize=14)
         subplot.set_title(f"Figure {fig_no}.{idx+1}: Histogram of {col_name} for each target class label", 
                           fontsize=14)
+    timer.lap("draw")
 
     return (fig, subplot)
 
 
 
-def boxplot_plotting (num_rows,num_columns,width,height,variables,datafr,number):
+def _is_chunks(obj):
+    """
+    Returns True when obj should be consumed as an iterable of DataFrame chunks
+    """
+    return (not isinstance(obj, (pd.core.frame.DataFrame, pd.core.series.Series,
+                                 np.ndarray, str, bytes, dict))
+            and hasattr(obj, "__iter__"))
+
+
+def boxplot_summary(datafr, variables, label_col="class", whis=1.5, k=200, max_fliers=100,
+                    compact=False, sample=None):
     """
-    A function which returns a given number of boxplots for different target  against each numerical feature. The returning objects are seaborn.boxplot types. 
+    A function which returns the boxplot statistics of each numerical feature
+    for each target class label, computed in one grouped pass over the data frame.
+    -------------------
+    PARAMETERS:
+    datafr: A pandas DataFrame containing the variables and their correspondent labels,
+    or an iterable of DataFrame chunks (e.g. one per partition file) that is streamed,
+    or a pyarrow.Table, pyarrow dataset or Parquet/Arrow IPC path of which only the
+    variables and label_col are read
+    variables: A list of each variable's name
+    label_col: The name of the column holding the target class label, default "class"
+    whis: The whisker reach in multiples of the interquartile range, default 1.5
+    k: The accuracy of the quantile sketches used for chunks, default 200
+    max_fliers: The number of extreme values kept at each end for chunks, default 100
+    compact: Compute the quantiles from the compact_frame copy of the variables and
+    label_col (True, or a number as its rtol). Chunks are left as they are, default False
+    sample: Compute the statistics from a uniform sample of the rows of every class:
+    an int of rows per class, True for 200,000, or a float target error of the
+    quartile ranks. Chunks are then sampled as they stream past instead of sketched.
+    n is scaled up to an estimate for all the rows, the quartiles are those of the
+    sample and the outliers are the sampled ones. attrs["sample"] holds n_population
+    and n_sampled (by label) and the 99% rank error of the quartiles (by variable),
+    the largest of which is attrs["rank_error"], default None
+    --------------------
+    REQUISITES:
+    With chunks, memory stays constant in the number of rows. The quartiles are then
+    approximate: with 99% confidence their rank is off by at most
+    table.attrs["rank_error"] * n (about 1.3% of n for k=200). Whiskers and outliers
+    stay exact unless more than max_fliers values fall beyond a whisker fence, in
+    which case only the max_fliers most extreme outliers are listed.
+    --------------------
+    RETURNS:
+    A pandas.core.frame.DataFrame indexed by (variable, label) with the columns
+    n, q1, med, q3, whislo, whishi and fliers (the outlying values as a numpy array).
+    matplotlib is not imported; table.reset_index().to_json(orient="records")
+    gives the data boxplot_plotting draws
+    --------------------
+    Examples
+
+    boxplot_summary(train_df, ["unif_size", "clump"], label_col="class")
+    boxplot_summary(pd.read_csv("train.csv", chunksize=100_000), ["unif_size"])
+    boxplot_summary(pd.read_csv("train.csv", chunksize=100_000), ["unif_size"], sample=0.01)
+    boxplot_summary("train.parquet", ["unif_size", "clump"], label_col="class")
+    """
+    timer = laps("boxplot_summary")
+    if is_arrow_source(datafr):
+        datafr = read_frame(datafr, list(variables) + [label_col])
+    timer.lap("read")
+    size = _sample_size(sample)
+    if size is not None and _is_chunks(datafr):
+        reservoir = StratifiedReservoir(variables, label_col, size)
+        for chunk in datafr:
+            reservoir.update(chunk)
+        rows, population, sampled, classes = reservoir.frame()
+        timer.lap("sample", rows=int(population.sum()), sampled=int(sampled.sum()), streamed=True)
+        table = _sampled_summary(rows, variables, label_col, whis, classes, population, sampled)
+        timer.lap("statistics")
+        return table
+    if _is_chunks(datafr):
+        summary = StreamingSummary(variables, label_col, whis=whis, k=k, max_fliers=max_fliers)
+        for chunk in datafr:
+            summary.update(chunk)
+        table = summary.table()
+        timer.lap("statistics", streamed=True)
+        return table
+    if not isinstance(datafr, pd.core.frame.DataFrame):
+        raise TypeError("'datafr' should be of type pandas.Dataframe or an iterable of them")
+    if label_col not in datafr.columns:
+        raise ValueError(f"'label_col' {label_col!r} is not a column of 'datafr'")
+    rtol = _compact_rtol(compact)
+    timer.lap("validate")
+    if size is not None:
+        datafr, population, sampled, classes = stratified_sample(datafr, variables, label_col, size)
+        timer.lap("sample", rows=int(population.sum()), sampled=int(sampled.sum()))
+    if rtol is not None:
+        datafr = compact_frame(datafr, label_col, list(variables), rtol)
+        timer.lap("compact")
+    if size is not None:
+        table = _sampled_summary(datafr, variables, label_col, whis, classes, population, sampled)
+    else:
+        table = summary_table(datafr, list(variables), label_col, whis=whis)
+    timer.lap("statistics")
+    return table
+
+
+def _sampled_summary(rows, variables, label_col, whis, classes, population, sampled):
+    """
+    Returns the summary_table of sampled rows with n scaled up to the rows of
+    every class before sampling, and the rank error of the quartiles in attrs
+    """
+    table = summary_table(rows, list(variables), label_col, whis=whis)
+    scale = dict(zip(classes, population / np.maximum(sampled, 1)))
+    factor = np.array([scale[label] for label in table.index.get_level_values(1)])
+    # the values each variable has in the sample and, by estimate, in all the rows
+    n = table["n"].to_numpy()
+    error = pd.Series(share_error(0.5, n, n * factor), index=table.index).groupby(level=0).max()
+    table["n"] = np.round(n * factor).astype(int)
+    table.attrs["sample"] = sample_attrs(classes, population, sampled,
+                                         {v: error.get(v, 0.0) for v in variables})
+    table.attrs["rank_error"] = max(table.attrs["sample"]["error"].values(), default=0.0)
+    return table
+
+
+def _draw_boxplots(ax, table, variables, label_col, number):
+    """
+    Draws one boxplot per variable from a boxplot_summary table onto the flattened axes
+    """
+    for idx, (var,subplot) in enumerate(zip(variables,ax.flatten())):
+        stats = bxp_stats(table, var)
+        positions = np.arange(len(stats))
+        boxes = subplot.bxp(stats, positions=positions, patch_artist=True)
+        for k, box in enumerate(boxes["boxes"]):
+            box.set_facecolor(f"C{k}")
+        subplot.set_xticks(positions, [s["label"] for s in stats])
+        if "sample" in table.attrs:
+            subplot.text(0.02, 0.98, sample_note(table.attrs["sample"], var, "quartile ranks"),
+                         transform=subplot.transAxes, va="top")
+        subplot.set_xlabel(label_col)
+        subplot.set_ylabel(var)
+        subplot.set_title(f"Figure {number}.{idx}: Boxplot of {var} for each target class label")
+
+
+def boxplot_plotting (num_rows,num_columns,width,height,variables,datafr,number,label_col="class",
+                      k=200,max_fliers=100,compact=False,sample=None):
+    """
+    A function which returns a given number of boxplots for different target  against each numerical feature.
+    The statistics of every variable are computed up front by boxplot_summary and drawn with matplotlib bxp. 
     
     -------------------
     PARAMETERS:
@@ -110,11 +501,19 @@ def boxplot_plotting (num_rows,num_columns,width,height,variables,datafr,number)
     length: A positive length measure 
     A binary class label 
     A column array for managing variable names
-    A training dataframe object
+    A training dataframe object, or an iterable of DataFrame chunks for data larger than memory,
+    or an Arrow source as for boxplot_summary
     Integer positive number for correct ordering  of graphs 
+    label_col: The name of the column holding the target class label, default "class"
+    k, max_fliers: The sketch accuracy and outlier reservoir size used for chunks,
+    see boxplot_summary for the error bounds
+    compact: Summarise float32 copies of the variables, see boxplot_summary, default False
+    sample: Summarise a uniform sample of the rows of every class (see boxplot_summary),
+    an int of rows per class, True for 200,000 or a float target error; every subplot
+    notes the sample size and the 99% rank error of its quartiles, default None
     -------------------
     REQUISITES:
-    The target labels ("class label") must be within the data frame 
+    The target labels (label_col) must be within the data frame 
     The multiplication between num_rows and num_columns must return be equal to num_variables.
     It is possible for num_rows & num_columns to be values that when multiplied don't equal the "variables" numeric value,
     but that will create more boxplots which will be empty. 
@@ -123,7 +522,7 @@ def boxplot_plotting (num_rows,num_columns,width,height,variables,datafr,number)
     --------------------
     RETURNS:
     It returns a fixed number "num_variables" of boxplot objects. Each Boxplot represents both Target Class
-    Labels according to a given Variable
+    Labels according to a given Variable. They are drawn on one matplotlib.figure.Figure
 
     --------------------
     Examples
@@ -132,35 +531,119 @@ def boxplot_plotting (num_rows,num_columns,width,height,variables,datafr,number)
     --------
     boxplot_plotting (3,3,20,25,numeric_column,datafr,number)
     """
-    fig,ax= plt.subplots(num_rows,num_columns,figsize=(width,height))
-    for idx, (var,subplot) in enumerate(zip(variables,ax.flatten())):
-        a = sns.boxplot(x='class',y=var,data=datafr,ax=subplot).set_title(f"Figure {number}.{idx}: Boxplot of {var} for each target class label")
+    timer = laps("boxplot_plotting")
+    if not isinstance(num_rows, (int, np.integer)):
+        raise TypeError("'num_rows' should be of type int")
+    if not isinstance(num_columns, (int, np.integer)):
+        raise TypeError("'num_columns' should be of type int")
+    if not (isinstance(datafr, pd.core.frame.DataFrame) or is_arrow_source(datafr)
+            or _is_chunks(datafr)):
+        raise TypeError("'datafr' should be of type pandas.Dataframe or an iterable of them")
+    timer.lap("validate")
+    fig = _new_figure(figsize=(width,height))
+    ax = fig.subplots(num_rows,num_columns,squeeze=False)
+    # only the variables that get a subplot are summarised
+    variables = list(variables)[:num_rows * num_columns]
+    timer.lap("figure")
+    table = boxplot_summary(datafr, variables, label_col=label_col, k=k, max_fliers=max_fliers,
+                            compact=compact, sample=sample)
+    timer.lap("summary")
+    _draw_boxplots(ax, table, variables, label_col, number)
+    timer.lap("draw")
     return fig
 
 
 
-def tuned_para_table(search, X_train, y_train):
+# fitted attributes of a search that are stored in and restored from a SearchCache
+_SEARCH_RESULT_ATTRS = ("cv_results_", "best_index_", "best_params_", "best_score_",
+                        "best_estimator_", "n_splits_", "refit_time_", "multimetric_",
+                        "scorer_", "n_resources_", "n_candidates_", "n_iterations_",
+                        "n_required_iterations_", "n_possible_iterations_",
+                        "min_resources_", "max_resources_", "oof_predictions_", "racing_")
+
+
+def tuned_para_table(search, X_train, y_train, cache=None, fast_knn=True, prefix_cache=True,
+                     shared_data=None, return_fitted=False, racing=False, compact=False):
     """
     A function which returns a panda dataframe of tuned hyperparameters
     and its best score given GridSearchCV object fitted X_train and y_train
     -------------------
     PARAMETERS:
     search: A sklearn.model_selection._search.GridSearchCV that has been
-    specified estimator, param_grid, **kwargs
+    specified estimator, param_grid, **kwargs. RandomizedSearchCV,
+    HalvingGridSearchCV and HalvingRandomSearchCV are accepted as cheaper
+    alternatives on large grids
     X_train : numpy array or pandas DataFrame/Series
-        X in the training data
+        X in the training data, or a pyarrow.Table, pyarrow dataset or the path
+        of a Parquet or Arrow IPC file
     y_train : numpy array or pandas DataFrame/Series
-        y in the training data
+        y in the training data, or the name of its column in an Arrow X_train
+    cache : SearchCache, path or None, default None
+        Where to keep the search results between runs. The entry is keyed on a
+        content hash of X_train and y_train and on every search parameter that
+        affects the result, so a hit skips search.fit entirely and restores
+        cv_results_, best_params_, best_score_ and best_estimator_ on search.
+        Use SearchCache(path, max_bytes) to bound its size and
+        SearchCache.invalidate() to drop entries
+    fast_knn : bool, default True
+        When search is a GridSearchCV over only the n_neighbors and weights of a
+        KNeighborsClassifier (or of the last step of a Pipeline), run a single
+        neighbor query at the largest k per fold and score every candidate from
+        it, instead of one fit and query per candidate and fold. The results
+        match search.fit; when neighbors tie in distance at the k-th place of a
+        candidate (e.g. duplicate rows), search.fit is run instead
+    prefix_cache : bool or FoldCache, default True
+        When search is a GridSearchCV over a Pipeline whose leading steps are the
+        same for every candidate, fit and apply those steps once per fold and only
+        refit the remaining steps per candidate. The preprocessed folds are kept in
+        a FoldCache, bounded by its max_bytes; pass one FoldCache to several calls
+        to share the folds between searches, or False to always run search.fit
+    shared_data : None, "shm" or "memmap", default None
+        Convert X_train and y_train once into one contiguous numeric block in
+        multiprocessing.shared_memory ("shm") or a temporary memory-mapped file
+        ("memmap"), and run every candidate and fold of a GridSearchCV or
+        RandomizedSearchCV in the search's n_jobs workers, which only receive the
+        block's handle and the fold indices. attrs["worker_memory"] of the table
+        then lists the peak resident memory (bytes) of every worker process over
+        its tasks (on platforms other than Linux, the lifetime peak of the worker)
+    return_fitted : bool, default False
+        Also return the refitted best estimator and the best candidate's
+        out-of-fold predictions on X_train, to hand over to plot_cm instead of
+        fitting the winning model again. The predictions are recorded while the
+        candidates are scored, so they cost no extra fits, except for halving
+        and multi-metric searches where they are made with one more fit per fold
+    racing : bool or dict, default False
+        Run the folds one at a time across all candidates and, from the
+        min_folds-th fold on, drop every candidate whose mean score is below the
+        leader's by a one-sided paired t-test at level alpha, Bonferroni corrected
+        for the candidates still running (True uses {"alpha": 0.05,
+        "min_folds": 3}; a dict overrides either). Dropped candidates are not
+        fitted on the remaining folds and rank last with a NaN mean_test_score;
+        the winner and best_score are those of the full search unless the true
+        best was dropped by chance, which each round of tests does with
+        probability at most about alpha. attrs["racing"] of the table lists the
+        folds run, the fold after which each candidate was dropped and its
+        partial mean score. GridSearchCV and single-metric RandomizedSearchCV
+        only, and not with shared_data
+    compact : bool or float, default False
+        Fit on the compact_xy copy of X_train and y_train (True, or a number as
+        its rtol), shared by every fold, worker (shared_data blocks are float32
+        then too) and the refit. Estimators that compute in float64 make their own copy
     --------------------
     REQUISITES:
     X_train, y_train must at least n_splits (specified in cv in search)
     observations for each target class.
-    search must be GridSearchCV object that is clearly specified with
+    search must be GridSearchCV object (or one of the searches above) that is clearly specified with
     estimator, param_grid, cv, and so on.
     --------------------
     RETURNS:
     Returns a pandas.core.frame.DataFrame object that specifies
-    the tuned hyperaparameters and the best score produced by GridSearchCV
+    the tuned hyperaparameters and the best score produced by GridSearchCV.
+    With return_fitted, a tuple of that DataFrame, search.best_estimator_ and a
+    pandas Series of out-of-fold predictions indexed like X_train.
+    Its attrs["search_resources"] holds a DataFrame with the resources spent per
+    iteration: the resource (e.g. n_samples) and amount used, the number of
+    candidates evaluated and eliminated, and the number of fits
     --------------------
     Examples
 
@@ -173,30 +656,243 @@ def tuned_para_table(search, X_train, y_train):
                       return_train_score=True)
     --------
     tuned_para_table(search, X_train, y_train)
+    tuned_para_table(search, X_train, y_train, cache="~/.cache/dsci_prediction")
+    tuned_para_table(search, X_train, y_train, racing={"alpha": 0.01})
+    table, best, oof = tuned_para_table(search, X_train, y_train, return_fitted=True)
+    plot_cm(best, None, None, X_test, y_test, "Fig", prefit=True)
+    plot_cm(None, None, None, None, y_train, "Out-of-fold", y_pred=oof)
     """
-    if not isinstance(search, sklearn.model_selection._search.GridSearchCV):
-        raise TypeError("'search' should be of type GridSearchCV")
+    from sklearn.base import clone
+    from sklearn.model_selection import check_cv, cross_val_predict
+    from sklearn.model_selection._search import BaseSearchCV
+    from ._search import (search_resources, knn_grid_supported, fit_knn_grid, FoldCache,
+                          invariant_prefix_length, fit_prefix_cached_grid, candidate_loop_supported,
+                          RACING_DEFAULTS)
+    from ._shared import SHARED_KINDS, fit_shared
+
+    timer = laps("tuned_para_table")
+    if not isinstance(search, BaseSearchCV):
+        raise TypeError("'search' should be of type GridSearchCV, RandomizedSearchCV or a halving search")
+    X_train, y_train = arrow_xy(X_train, y_train)
+    timer.lap("read")
     if not isinstance(X_train, (pd.core.series.Series,
                                 pd.core.frame.DataFrame, np.ndarray)):
         raise TypeError("'X_train' should be of type np.array or pd.Dataframe")
     if not isinstance(y_train, (pd.core.series.Series,
                                 pd.core.frame.DataFrame, np.ndarray)):
         raise TypeError("'y_train' should be of type np.array or pd.Dataframe")
-    search.fit(X_train, y_train)
+    if return_fitted and search.refit is False:
+        raise ValueError("'return_fitted' needs a search with refit enabled")
+    if shared_data is not None and shared_data not in SHARED_KINDS:
+        raise ValueError(f"'shared_data' should be None or one of {SHARED_KINDS}")
+    race = None
+    if racing is not False:
+        if not isinstance(racing, (bool, dict)):
+            raise TypeError("'racing' should be of type bool or dict")
+        race = {**RACING_DEFAULTS, **(racing if isinstance(racing, dict) else {})}
+        if set(race) != set(RACING_DEFAULTS):
+            raise ValueError(f"'racing' accepts the keys {sorted(RACING_DEFAULTS)}")
+        if not 0 < race["alpha"] < 1 or race["min_folds"] < 2:
+            raise ValueError("'racing' needs 0 < alpha < 1 and min_folds >= 2")
+        if shared_data is not None or not candidate_loop_supported(search):
+            raise ValueError("'racing' supports single metric GridSearchCV and RandomizedSearchCV "
+                             "without shared_data")
+    rtol = _compact_rtol(compact)
+    timer.lap("validate")
+    if rtol is not None:
+        X_train, y_train = compact_xy(X_train, y_train, rtol)
+        timer.lap("compact")
+    if cache is not None and not isinstance(cache, SearchCache):
+        cache = SearchCache(os.path.expanduser(cache))
+    key = None
+    if cache is not None:
+        try:
+            # racing can leave other results than the full search
+            key = search_fingerprint(search, X_train, y_train, extra=race)
+        except UnstableReprError as err:
+            # a key that two different searches could share would return wrong results
+            warnings.warn(f"the search is not cached: {err}")
+            cache = None
+    cached = cache.get(key) if cache is not None else None
+    if cache is not None:
+        timer.lap("cache_get", hit=cached is not None)
+    if cached is not None and (not return_fitted or "oof_predictions_" in cached["search"]):
+        for attr, value in cached["search"].items():
+            setattr(search, attr, value)
+        if return_fitted:
+            return _with_fitted(cached["table"], search, X_train, y_train)
+        return cached["table"]
+    search.__dict__.pop("oof_predictions_", None)
+    search.__dict__.pop("racing_", None)
+
+    fold_cache = prefix_cache if isinstance(prefix_cache, FoldCache) else None
+    n_prefix = invariant_prefix_length(search) if prefix_cache is not False else 0
+    worker_memory = None
+    path = None
+    if shared_data is not None:
+        worker_memory = fit_shared(search, X_train, y_train, shared_data, keep_oof=return_fitted)
+        fitted, path = True, "shared"
+    elif race is not None:
+        fitted = fit_prefix_cached_grid(search, X_train, y_train, n_prefix, fold_cache,
+                                        keep_oof=return_fitted, race=race)
+        path = "racing"
+    else:
+        fitted = fast_knn and knn_grid_supported(search) and fit_knn_grid(
+            search, X_train, y_train, fold_cache, keep_oof=return_fitted)
+        path = "knn" if fitted else None
+    if not fitted and n_prefix:
+        fitted = fit_prefix_cached_grid(search, X_train, y_train, n_prefix, fold_cache,
+                                        keep_oof=return_fitted)
+        path = "prefix"
+    if not fitted and return_fitted and candidate_loop_supported(search):
+        # run the candidates here rather than in search.fit to keep their predictions
+        fitted = fit_prefix_cached_grid(search, X_train, y_train, 0, keep_oof=return_fitted)
+        path = "candidates"
+    if not fitted:
+        search.fit(X_train, y_train)
+        path = "search.fit"
+        # observing a run must not change it, so the times come from cv_results_
+        if instrument_enabled():
+            _emit_candidates(search)
+    timer.lap("fit", path=path)
+    if return_fitted and not hasattr(search, "oof_predictions_"):
+        y = np.asarray(y_train)
+        search.oof_predictions_ = cross_val_predict(
+            clone(search.estimator).set_params(**search.best_params_), X_train,
+            y.ravel() if y.ndim == 2 and y.shape[1] == 1 else y,
+            cv=check_cv(search.cv, y_train, classifier=True))
+        timer.lap("oof")
     best_score = search.best_score_.astype(type('float', (float,), {}))
     tuned_para = pd.DataFrame.from_dict(search.best_params_, orient='index')
     tuned_para = tuned_para.rename(columns = {0 : "Value"})
     tuned_para = tuned_para.T
     tuned_para['best_score'] = best_score
+    tuned_para.attrs["search_resources"] = search_resources(search, len(X_train))
+    if worker_memory is not None:
+        tuned_para.attrs["worker_memory"] = worker_memory
+    if hasattr(search, "racing_"):
+        tuned_para.attrs["racing"] = search.racing_
+    timer.lap("table")
+    if cache is not None:
+        fitted = {attr: getattr(search, attr) for attr in _SEARCH_RESULT_ATTRS
+                  if hasattr(search, attr)}
+        cache.put(key, {"table": tuned_para, "search": fitted})
+        timer.lap("cache_put")
+    if return_fitted:
+        return _with_fitted(tuned_para, search, X_train, y_train)
     return tuned_para
 
 
+def _emit_candidates(search):
+    """
+    Records the mean fit and score times of every candidate of a search fitted by
+    search.fit, which does not keep the times of single folds
+    """
+    results = search.cv_results_
+    n_splits = getattr(search, "n_splits_", 1)
+    for c, params in enumerate(results["params"]):
+        for stage in ("fit", "score"):
+            emit("tuned_para_table", stage, results[f"mean_{stage}_time"][c] * n_splits,
+                 candidate=c, params=params, folds=n_splits)
+
+
+def _with_fitted(table, search, X_train, y_train):
+    index = X_train.index if isinstance(X_train, (pd.core.frame.DataFrame,
+                                                  pd.core.series.Series)) else None
+    name = getattr(y_train, "name", None)
+    if isinstance(y_train, pd.core.frame.DataFrame) and y_train.shape[1] == 1:
+        name = y_train.columns[0]
+    oof = pd.Series(search.oof_predictions_, index=index, name=name)
+    return table, search.best_estimator_, oof
 
 
-def plot_cm(model, X_train, y_train, X_test, y_test, title):
+
+
+def cm_summary(model, X_train, y_train, X_test, y_test, chunk_size=None, n_threads=None,
+               prefit=False, y_pred=None, compact=False):
+    """
+    Returns the confusion matrix drawn by plot_cm as data, without importing
+    matplotlib
+    -----------
+    PARAMETERS:
+    model, X_train, y_train, X_test, y_test, chunk_size, n_threads, prefit, y_pred, compact :
+        as for plot_cm
+    -----------
+    RETURNS:
+    A pandas.core.frame.DataFrame with the columns true, predicted and count,
+    one row per pair of labels in the order of model.classes_ (or of the sorted
+    labels of y_test and y_pred). It serializes with to_json(orient="records")
+    or pyarrow.Table.from_pandas
+    -----------
+    Examples
+    cm_summary(DecisionTreeClassifier(), X_train, y_train, X_test, y_test)
+    cm_summary(DecisionTreeClassifier(), "train.parquet", "class", "test.parquet", "class")
+    """
+    timer = laps("cm_summary")
+    X_train, y_train = arrow_xy(X_train, y_train)
+    X_test, y_test = arrow_xy(X_test, y_test)
+    timer.lap("read")
+    chunks = None
+    if y_test is None and _is_chunks(X_test):
+        chunks = X_test
+        X_test = y_test = np.empty(0)
+    if not (prefit or y_pred is not None):
+        if not isinstance(X_train, (pd.core.series.Series,
+                                    pd.core.frame.DataFrame, np.ndarray)):
+            raise TypeError("'X_train' should be of type numpy.array or pandas.Dataframe")
+        if not isinstance(y_train, (pd.core.series.Series,
+                                    pd.core.frame.DataFrame, np.ndarray)):
+            raise TypeError("'y_train' should be of type numpy.array or pandas.Dataframe")
+    if y_pred is None and not isinstance(X_test, (pd.core.series.Series,
+                                                  pd.core.frame.DataFrame, np.ndarray)):
+        raise TypeError("'X_test' should be of type numpy.array or pandas.Dataframe")
+    if not isinstance(y_test, (pd.core.series.Series,
+                               pd.core.frame.DataFrame, np.ndarray)):
+        raise TypeError("'y_test' should be of type numpy.array or pandas.Dataframe")
+    if chunk_size is not None and (not isinstance(chunk_size, (int, np.integer)) or chunk_size < 1):
+        raise TypeError("'chunk_size' should be a positive int")
+    if y_pred is not None:
+        if not isinstance(y_pred, (pd.core.series.Series, np.ndarray)):
+            raise TypeError("'y_pred' should be of type numpy.array or pandas.Series")
+        if len(y_pred) != len(y_test):
+            raise ValueError("'y_pred' and 'y_test' should have the same length")
+        rtol = _compact_rtol(compact)
+        timer.lap("validate")
+        if rtol is not None:
+            _, y_test = compact_xy(None, y_test)
+            timer.lap("compact")
+        labels = getattr(model, "classes_", None)
+        if labels is None:
+            labels = np.unique(np.concatenate([np.asarray(y_test).ravel(), np.asarray(y_pred).ravel()]))
+        cm = confusion_counts(label_codes(y_test, labels), label_codes(y_pred, labels), len(labels))
+        timer.lap("count")
+    else:
+        rtol = _compact_rtol(compact)
+        timer.lap("validate")
+        if rtol is not None:
+            if not prefit:
+                X_train, y_train = compact_xy(X_train, y_train, rtol)
+            if chunks is None:
+                X_test, y_test = compact_xy(X_test, y_test, rtol)
+            timer.lap("compact")
+        if not prefit:
+            model.fit(X_train, y_train)
+            timer.lap("fit")
+        labels = model.classes_
+        if chunks is None and chunk_size is not None:
+            chunks = array_chunks(X_test, y_test, chunk_size)
+        if chunks is None:
+            chunks = [(X_test, y_test)]
+        cm = streaming_confusion(model, chunks, labels, n_threads=n_threads)
+        timer.lap("predict")
+    return tidy_matrices({None: cm}, labels).drop(columns="model")
+
+
+def plot_cm(model, X_train, y_train, X_test, y_test, title, chunk_size=None, n_threads=None,
+            prefit=False, y_pred=None, compact=False):
     """
     Returns confusion matrix on predictions of y_test with given title 
-    of given model fitted X_train and y_train 
+    of given model fitted X_train and y_train, drawn from cm_summary
     -----------
     PARAMETERS:
     model :
@@ -206,38 +902,380 @@ def plot_cm(model, X_train, y_train, X_test, y_test, title):
     y_train : numpy array or pandas DataFrame/Series
         y in the training data
     X_test : numpy array or pandas DataFrame/Series
-        X in the testing data
+        X in the testing data, or an iterable of (X, y) testing chunks
     y_test : numpy array or pandas DataFrame/Series
-        y in the testing data
+        y in the testing data, or None when X_test yields chunks.
+        Every X may also be a pyarrow.Table, pyarrow dataset or the path of a
+        Parquet or Arrow IPC file, with its y the name of the label column
+    chunk_size : int, default None
+        Predict the testing data this many rows at a time and add each chunk to
+        an integer confusion matrix, so memory is bounded by the chunk size
+    n_threads : int, default None
+        Predict up to twice this many chunks at once on a thread pool
+    prefit : bool, default False
+        model is already fitted (e.g. the best estimator returned by
+        tuned_para_table), so model.fit is skipped and X_train, y_train may be None
+    y_pred : numpy array or pandas Series, default None
+        Precomputed predictions of y_test, such as the out-of-fold predictions
+        returned by tuned_para_table. Nothing is fitted or predicted, and model,
+        X_train, y_train and X_test may be None
+    compact : bool or float, default False
+        Fit and predict on the compact_xy copies of the data (True, or a number
+        as its rtol), counting categorical labels
     -----------
     REQUISITES:
     X_train, y_train, X_test, y_test cannot be empty.
     -----------
     RETURNS:
-    A sklearn.metrics._plot.confusion_matrix.ConfusionMatrixDisplay object 
+    A sklearn.metrics._plot.confusion_matrix.ConfusionMatrixDisplay object, drawn on
+    disp.figure_
     -----------
     Examples
     plot_cm(DecisionTreeClassifier(), X_train, y_train, X_test, y_test, "Fig")
+    plot_cm(KNeighborsClassifier(), X_train, y_train, X_test, y_test, "Fig", chunk_size=50_000, n_threads=4)
+    plot_cm(None, None, None, None, y_train, "Out-of-fold", y_pred=oof)
     """
-    if not isinstance(X_train, (pd.core.series.Series,
-                                pd.core.frame.DataFrame, np.ndarray)):
-        raise TypeError("'X_train' should be of type numpy.array or pandas.Dataframe")
-    if not isinstance(y_train, (pd.core.series.Series,
-                                pd.core.frame.DataFrame, np.ndarray)):
-        raise TypeError("'y_train' should be of type numpy.array or pandas.Dataframe")
-    if not isinstance(X_test, (pd.core.series.Series,
-                               pd.core.frame.DataFrame, np.ndarray)):
-        raise TypeError("'X_test' should be of type numpy.array or pandas.Dataframe")
-    if not isinstance(y_test, (pd.core.series.Series,
-                               pd.core.frame.DataFrame, np.ndarray)):
-        raise TypeError("'y_test' should be of type numpy.array or pandas.Dataframe")
+    from sklearn.metrics import ConfusionMatrixDisplay
+
     if not isinstance(title, str):
         raise TypeError("'title' should be of 'str'")
-    model.fit(X_train, y_train)
-    predictions = model.predict(X_test)
-    cm = confusion_matrix(y_test, predictions, labels=model.classes_)
+    timer = laps("plot_cm")
+    summary = cm_summary(model, X_train, y_train, X_test, y_test, chunk_size=chunk_size,
+                         n_threads=n_threads, prefit=prefit, y_pred=y_pred, compact=compact)
+    timer.lap("summary")
+    cm, labels = matrix_of(summary)
     disp = ConfusionMatrixDisplay(confusion_matrix=cm,
-                                  display_labels=model.classes_)
-    disp.plot()
-    plt.title(title)
+                                  display_labels=labels)
+    disp.plot(ax=_new_figure().add_subplot())
+    disp.ax_.set_title(title)
+    timer.lap("draw")
     return disp
+
+
+def plot_cm_batch(models, X_train, y_train, X_test, y_test, title="Confusion matrices",
+                  n_jobs=-1, shared_data="shm"):
+    """
+    Fits and evaluates many models on the same train/test split in parallel and
+    returns their confusion matrices side by side
+    -----------
+    PARAMETERS:
+    models : dict
+        scikit-learn models or sklearn.pipeline.Pipeline by name. Each model is
+        cloned, so the given objects stay unfitted
+    X_train, y_train, X_test, y_test : numpy array or pandas DataFrame/Series
+        the training and testing data, or Arrow sources, as for plot_cm
+    title : str, default "Confusion matrices"
+        the title of the whole figure
+    n_jobs : int, default -1
+        the number of worker processes, -1 for one per CPU
+    shared_data : "shm", "memmap" or None, default "shm"
+        how the workers get the data: one shared copy in
+        multiprocessing.shared_memory or a memory-mapped file that every worker
+        attaches to (X_train and X_test must then be numeric), or None to let
+        joblib hand each worker the data
+    -----------
+    REQUISITES:
+    X_train, y_train, X_test, y_test cannot be empty.
+    -----------
+    RETURNS:
+    A tuple of a matplotlib.figure.Figure with one confusion matrix per model,
+    and a pandas.core.frame.DataFrame with the columns model, true, predicted
+    and count. Every matrix is over the sorted labels of y_train and y_test
+    -----------
+    Examples
+    plot_cm_batch({"tree": DecisionTreeClassifier(), "knn": KNeighborsClassifier()},
+                  X_train, y_train, X_test, y_test, "Fig 4")
+    """
+    from sklearn.metrics import ConfusionMatrixDisplay
+    from ._shared import SHARED_KINDS, fit_predict_shared
+
+    if not isinstance(models, dict):
+        raise TypeError("'models' should be of type dict")
+    X_train, y_train = arrow_xy(X_train, y_train)
+    X_test, y_test = arrow_xy(X_test, y_test)
+    for name, value in (("X_train", X_train), ("y_train", y_train),
+                        ("X_test", X_test), ("y_test", y_test)):
+        if not isinstance(value, (pd.core.series.Series,
+                                  pd.core.frame.DataFrame, np.ndarray)):
+            raise TypeError(f"'{name}' should be of type numpy.array or pandas.Dataframe")
+    if not isinstance(title, str):
+        raise TypeError("'title' should be of 'str'")
+    if shared_data is not None and shared_data not in SHARED_KINDS:
+        raise ValueError(f"'shared_data' should be None or one of {SHARED_KINDS}")
+
+    predictions, _ = fit_predict_shared(models, X_train, y_train, X_test, y_test,
+                                        n_jobs, shared_data)
+    labels = np.unique(np.concatenate([np.asarray(y_train).ravel(), np.asarray(y_test).ravel()]))
+    true_codes = label_codes(y_test, labels)
+    matrices = {name: confusion_counts(true_codes, label_codes(pred, labels), len(labels))
+                for name, pred in predictions.items()}
+
+    dim = max(int(np.ceil(np.sqrt(len(matrices)))), 1)
+    fig = _new_figure(figsize=(4 * dim, 4 * dim))
+    axes = fig.subplots(dim, dim, squeeze=False)
+    for ax, (name, cm) in zip(axes.flatten(), matrices.items()):
+        ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=labels).plot(ax=ax, colorbar=False)
+        ax.set_title(name)
+    for ax in axes.flatten()[len(matrices):]:
+        ax.set_axis_off()
+    fig.suptitle(title)
+    return fig, tidy_matrices(matrices, labels)
+
+
+def plot_cm_thresholds(model, X_train, y_train, X_test, y_test, title, thresholds=None, pos_label=None,
+                       prefit=False):
+    """
+    Returns the confusion counts of a binary classifier at every distinct decision
+    threshold, and a figure of the confusion matrices at selected thresholds,
+    from a single predict_proba (or decision_function) call on X_test
+    -----------
+    PARAMETERS:
+    model :
+        scikit-learn model or sklearn.pipeline.Pipeline with predict_proba or
+        decision_function
+    X_train, y_train, X_test, y_test : numpy array or pandas DataFrame/Series
+        the training and testing data, or Arrow sources, as for plot_cm
+    title : str
+        the title of the figure
+    thresholds : list of float, default None
+        the thresholds to draw a confusion matrix for. By default the model's own
+        threshold (0.5 on probabilities, 0 on decision values) and the one with
+        the best F1 score
+    pos_label : default None
+        the positive class, model.classes_[1] by default
+    prefit : bool, default False
+        model is already fitted, as for plot_cm: model.fit is skipped and
+        X_train, y_train may be None
+    -----------
+    REQUISITES:
+    y_train must have exactly two classes. A sample is predicted positive when
+    its score is at least the threshold.
+    -----------
+    RETURNS:
+    A tuple of a pandas.core.frame.DataFrame with the columns threshold, tp, fp,
+    tn, fn, precision, recall and fpr (one row per distinct score, sorted by
+    decreasing threshold), and a matplotlib.figure.Figure with the precision and
+    recall curves next to the confusion matrices at the selected thresholds
+    -----------
+    Examples
+    table, fig = plot_cm_thresholds(LogisticRegression(), X_train, y_train, X_test, y_test, "Fig 6")
+    table[table["recall"] >= 0.95].iloc[0]
+    table, fig = plot_cm_thresholds(best, None, None, X_test, y_test, "Fig 7", prefit=True)
+    """
+    from sklearn.metrics import ConfusionMatrixDisplay
+
+    X_train, y_train = arrow_xy(X_train, y_train)
+    X_test, y_test = arrow_xy(X_test, y_test)
+    checked = (("X_test", X_test), ("y_test", y_test))
+    if not prefit:
+        checked = (("X_train", X_train), ("y_train", y_train)) + checked
+    for name, value in checked:
+        if not isinstance(value, (pd.core.series.Series,
+                                  pd.core.frame.DataFrame, np.ndarray)):
+            raise TypeError(f"'{name}' should be of type numpy.array or pandas.Dataframe")
+    if not isinstance(title, str):
+        raise TypeError("'title' should be of 'str'")
+    if not prefit:
+        model.fit(X_train, y_train)
+    if len(model.classes_) != 2:
+        raise ValueError("'plot_cm_thresholds' needs a binary target")
+    pos_label = model.classes_[1] if pos_label is None else pos_label
+    if pos_label not in model.classes_:
+        raise ValueError(f"'pos_label' {pos_label!r} is not one of the classes {list(model.classes_)}")
+    pos_index = list(model.classes_).index(pos_label)
+    if hasattr(model, "predict_proba"):
+        scores = model.predict_proba(X_test)[:, pos_index]
+        default = 0.5
+    else:
+        scores = model.decision_function(X_test)
+        scores = scores if pos_index == 1 else -scores
+        default = 0.0
+    table = threshold_table(scores, np.asarray(y_test).ravel() == pos_label)
+
+    if thresholds is None:
+        f1 = 2 * table["tp"] / (2 * table["tp"] + table["fp"] + table["fn"])
+        thresholds = [default, table["threshold"].iloc[int(np.nanargmax(f1.to_numpy()))]]
+    neg_label = model.classes_[1 - pos_index]
+    fig = _new_figure(figsize=(5 * (len(thresholds) + 1), 4.5))
+    axes = fig.subplots(1, len(thresholds) + 1, squeeze=False)
+    curve = axes[0, 0]
+    finite = table[np.isfinite(table["threshold"])]
+    curve.plot(finite["threshold"], finite["recall"], label="recall")
+    curve.plot(finite["threshold"], finite["precision"], label="precision")
+    for t in thresholds:
+        curve.axvline(t, color="grey", linestyle=":")
+    curve.set_xlabel("Threshold")
+    curve.legend(loc="best")
+    for ax, t in zip(axes[0, 1:], thresholds):
+        ConfusionMatrixDisplay(confusion_matrix=counts_at(table, t),
+                               display_labels=[neg_label, pos_label]).plot(ax=ax, colorbar=False)
+        ax.set_title(f"threshold = {t:.3g}")
+    fig.suptitle(title)
+    return table, fig
+
+
+def _figure_of(result):
+    """
+    Returns the Figure of what a plotting function returned: a Figure, a display
+    object with a figure_, or a tuple holding one of them
+    """
+    from matplotlib.figure import Figure
+
+    for item in (result if isinstance(result, (tuple, list)) else [result]):
+        if isinstance(item, Figure):
+            return item
+        if isinstance(getattr(item, "figure_", None), Figure):
+            return item.figure_
+    raise TypeError(f"a plotting job returned {type(result).__name__}, not a figure")
+
+
+def _render_job(job, directory, dpi):
+    start = time.perf_counter()
+    timer = laps("render_figures")
+    function = job["function"]
+    if isinstance(function, str):
+        # names keep the jobs picklable for process pools
+        function = globals()[function]
+    result = function(*job.get("args", ()), **job.get("kwargs", {}))
+    timer.lap("build", job=job["name"])
+    path = os.path.join(directory, f"{job['name']}.png")
+    _figure_of(result).savefig(path, dpi=dpi)
+    timer.lap("savefig", job=job["name"])
+    return job["name"], path, time.perf_counter() - start
+
+
+def render_figures(jobs, directory, executor="thread", max_workers=None, dpi=100):
+    """
+    Renders a list of plotting jobs in parallel and writes one PNG per job.
+    Every plotting function of this module builds its own Figure on an Agg
+    canvas without pyplot, so jobs can run side by side on threads or processes
+    -------
+    PARAMETERS:
+    jobs:
+        A list of dicts with a "name" (the PNG file name, without extension),
+        a "function" (a plotting function, or the name of one of this module,
+        e.g. "plot_cm", which is required with processes unless the function
+        can be pickled), and optional "args" and "kwargs" to call it with
+    directory:
+        A path to the directory for the PNG files, created if missing
+    executor: optional, default="thread"
+        "thread" or "process", the kind of pool the jobs are rendered on
+    max_workers: optional, default=None
+        An int denoting the size of the pool, as for concurrent.futures
+    dpi: optional, default=100
+        An int denoting the resolution of the PNG files
+    -------
+    RETURNS:
+    A pandas.core.frame.DataFrame with the name, path and seconds of every job
+    -------
+    Examples
+    render_figures([{"name": "cm_tree", "function": "plot_cm",
+                     "args": (DecisionTreeClassifier(), X_train, y_train, X_test, y_test, "Tree")},
+                    {"name": "hist", "function": "plot_hist_overlay",
+                     "args": (train_df, None, ["unif_size"], None), "kwargs": {"label_col": "class"}}],
+                   "figures", executor="process", max_workers=4)
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if not isinstance(jobs, list):
+        raise TypeError("'jobs' should be of type list")
+    if executor not in ("thread", "process"):
+        raise ValueError("'executor' should be 'thread' or 'process'")
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("every job should have a different 'name'")
+    directory = os.fspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    pool, job = ((ThreadPoolExecutor, carry_context(_render_job)) if executor == "thread"
+                 else (ProcessPoolExecutor, _render_job))
+    with pool(max_workers=max_workers) as workers:
+        done = list(workers.map(job, jobs, [directory] * len(jobs), [dpi] * len(jobs)))
+    return pd.DataFrame(done, columns=["name", "path", "seconds"])
+
+
+async def aplot_hist_overlay(df0, df1, columns, labels, *args, timeout=None, dedup=True, **kwargs):
+    """
+    The asyncio counterpart of plot_hist_overlay: binning and drawing run on the
+    executor set by set_executor (a pool of min(4, cpu count) threads by
+    default), so the event loop keeps serving other requests
+    -------
+    PARAMETERS:
+    df0, df1, columns, labels, *args, **kwargs:
+        As for plot_hist_overlay
+    timeout: optional, default=None
+        Seconds to wait for the result before raising asyncio.TimeoutError
+    dedup: optional, default=True
+        Share one computation between identical calls in flight, identified by
+        the content of the data and the parameters of every other argument
+    -------
+    RETURNS:
+    As for plot_hist_overlay. Callers sharing a computation get the same objects
+    -------
+    Examples
+    fig, _ = await aplot_hist_overlay(train_df, None, ["unif_size"], None, label_col="class", timeout=30)
+    """
+    return await _run_async("plot_hist_overlay", (df0, df1, columns, labels, *args), kwargs,
+                            timeout=timeout, dedup=dedup)
+
+
+async def aboxplot_plotting(num_rows, num_columns, width, height, variables, datafr, number, *args,
+                            timeout=None, dedup=True, **kwargs):
+    """
+    The asyncio counterpart of boxplot_plotting, run on the executor set by
+    set_executor; timeout and dedup are as for aplot_hist_overlay
+    -------
+    Examples
+    fig = await aboxplot_plotting(3, 3, 20, 25, numeric_column, train_df, 2, timeout=30)
+    """
+    return await _run_async("boxplot_plotting",
+                            (num_rows, num_columns, width, height, variables, datafr, number, *args),
+                            kwargs, timeout=timeout, dedup=dedup)
+
+
+async def atuned_para_table(search, X_train, y_train, *, timeout=None, dedup=True, **kwargs):
+    """
+    The asyncio counterpart of tuned_para_table: the search is fitted on the
+    executor set by set_executor, so a grid search does not stall the event loop
+    -------
+    PARAMETERS:
+    search, X_train, y_train, **kwargs:
+        As for tuned_para_table
+    timeout: optional, default=None
+        Seconds to wait for the result before raising asyncio.TimeoutError. The
+        search keeps running for other callers sharing it, and is cancelled if
+        nobody is left and it has not started yet
+    dedup: optional, default=True
+        Share one fit between concurrent calls with the same search parameters
+        and the same data. The search is fitted as a clone, so concurrent calls
+        with the same search object and other data never fit it at once; every
+        caller's search then gets the fitted attributes of the clone
+        (cv_results_, best_params_, best_estimator_, ...), also when the executor
+        is a process pool. Callers sharing a fit share these attribute objects
+    -------
+    RETURNS:
+    As for tuned_para_table
+    -------
+    Examples
+    table = await atuned_para_table(search, X_train, y_train, timeout=600)
+    """
+    return await _run_async("tuned_para_table", (search, X_train, y_train), kwargs,
+                            timeout=timeout, dedup=dedup)
+
+
+async def aplot_cm(model, X_train, y_train, X_test, y_test, title, *, timeout=None, dedup=True,
+                   **kwargs):
+    """
+    The asyncio counterpart of plot_cm: fitting, predicting and drawing run on
+    the executor set by set_executor; timeout and dedup are as for
+    aplot_hist_overlay. Calls with the same fitted model object and data are
+    shared, as are calls with unfitted models of the same parameters. Unless
+    prefit or y_pred is given, a clone of the model is fitted on the executor and
+    its fitted attributes are copied onto every caller's model, as plot_cm fits
+    the model it is given; this holds for process pools too, and concurrent
+    calls with one model object and different data never fit it at once
+    -------
+    Examples
+    disp = await aplot_cm(DecisionTreeClassifier(), X_train, y_train, X_test, y_test, "Fig", timeout=60)
+    """
+    return await _run_async("plot_cm", (model, X_train, y_train, X_test, y_test, title), kwargs,
+                            timeout=timeout, dedup=dedup)
@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ._cache import UnstableReprError, _stable_repr, _update_with_data
+from ._instrument import carry_context
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+_executor = None
+_executor_lock = threading.Lock()
+# the shared computation of every request in flight, by event loop and request key
+_inflight = {}
+
+
+def set_executor(executor=None, max_workers=None):
+    """
+    Sets the executor the async functions of DSCI_prediction run their work on
+    -------
+    PARAMETERS:
+    executor: optional, default=None
+        A concurrent.futures Executor, or None for a new ThreadPoolExecutor of
+        max_workers threads. A ProcessPoolExecutor keeps even pure Python work
+        (matplotlib drawing) off the event loop process, at the cost of pickling
+        the arguments and results of every call
+    max_workers: optional, default=None
+        The size of the new thread pool, by default min(4, os.cpu_count())
+    -------
+    RETURNS:
+    The executor used before, which is not shut down
+    """
+    global _executor
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=max_workers or DEFAULT_WORKERS,
+                                      thread_name_prefix="dsci_prediction")
+    with _executor_lock:
+        previous, _executor = _executor, executor
+    return previous
+
+
+def get_executor():
+    """Returns the executor of the async functions, made on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_WORKERS,
+                                           thread_name_prefix="dsci_prediction")
+        return _executor
+
+
+def _is_fitted(obj):
+    return any(k.endswith("_") and not k.startswith("__") for k in vars(obj))
+
+
+def request_key(name, args, kwargs):
+    """
+    Returns a hex digest identifying a call: the content of its data arguments,
+    the parameters of its estimators (and the identity of fitted ones, whose
+    state is not hashed) and the repr of everything else. Returns None when an
+    argument (e.g. a lambda scorer) cannot be identified by its content
+    """
+    try:
+        return _request_digest(name, args, kwargs)
+    except UnstableReprError:
+        return None
+
+
+def _request_digest(name, args, kwargs):
+    digest = hashlib.blake2b(name.encode(), digest_size=20)
+    for key, value in [(i, v) for i, v in enumerate(args)] + sorted(kwargs.items()):
+        digest.update(repr(key).encode())
+        if isinstance(value, (pd.core.frame.DataFrame, pd.core.series.Series, np.ndarray)):
+            _update_with_data(digest, value)
+        elif hasattr(value, "get_params") and not isinstance(value, type):
+            digest.update(_stable_repr(value).encode())
+            if _is_fitted(value) and name != "tuned_para_table":
+                digest.update(f"fitted at {id(value)}".encode())
+        elif isinstance(value, (str, bytes, int, float, bool, type(None), list, tuple, dict)):
+            digest.update(_stable_repr(value).encode())
+        else:
+            # iterators, Arrow objects and the like are only the same call when identical
+            digest.update(f"{type(value).__qualname__} at {id(value)}".encode())
+    return digest.hexdigest()
+
+
+def _fits_first_arg(name, kwargs):
+    """Whether DSCI_prediction.<name> fits the estimator it gets as first argument"""
+    if name == "tuned_para_table":
+        return True
+    return name == "plot_cm" and not kwargs.get("prefit", False) and kwargs.get("y_pred") is None
+
+
+def _call(name, args, kwargs):
+    """
+    Runs one function of DSCI_prediction in the executor. A search or model it
+    fits is cloned first, so concurrent calls never fit the same object; the
+    fitted attributes of the clone are returned with the result, and every
+    caller (sharing the call or not, in this process or not) copies them onto
+    its own object
+    """
+    from sklearn.base import clone
+    from . import DSCI_prediction
+
+    fits = _fits_first_arg(name, kwargs)
+    if fits:
+        args = (clone(args[0]),) + tuple(args[1:])
+    result = getattr(DSCI_prediction, name)(*args, **kwargs)
+    state = None
+    if fits:
+        state = {attr: value for attr, value in vars(args[0]).items()
+                 if attr.endswith("_") and not attr.startswith("__")}
+    return result, state
+
+
+class _Shared:
+    """A computation in the executor and the number of callers waiting for it"""
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+async def run(name, args, kwargs, timeout=None, dedup=True):
+    """
+    Runs DSCI_prediction.<name>(*args, **kwargs) in the executor and returns its
+    result. With dedup, identical calls in flight on the same event loop share
+    one computation. A caller that is cancelled or times out stops waiting
+    without disturbing the others; the computation is cancelled with its last
+    caller while it is still queued, and otherwise runs to its end in the
+    background
+    """
+    loop = asyncio.get_running_loop()
+    key = None
+    if dedup:
+        # hashing the data is O(n), so it is kept off the event loop as well
+        digest = await loop.run_in_executor(None, request_key, name, args, kwargs)
+        # calls that cannot be told apart by content are never shared
+        dedup = digest is not None
+        key = (loop, digest)
+    shared = _inflight.get(key) if dedup else None
+    if shared is None:
+        executor = get_executor()
+        call = _call if isinstance(executor, ProcessPoolExecutor) else carry_context(_call)
+        shared = _Shared(loop.run_in_executor(executor, call, name, args, kwargs))
+        if dedup:
+            _inflight[key] = shared
+            shared.future.add_done_callback(
+                lambda _: _inflight.pop(key) if _inflight.get(key) is shared else None)
+    shared.waiters += 1
+    try:
+        result, state = await asyncio.wait_for(asyncio.shield(shared.future), timeout)
+    finally:
+        shared.waiters -= 1
+        if shared.waiters == 0 and not shared.future.done():
+            shared.future.cancel()
+            if dedup and _inflight.get(key) is shared:
+                del _inflight[key]
+    if state is not None:
+        # the caller's object ends up as if it had been fitted itself, as in the sync call
+        target = args[0]
+        for attr in [a for a in vars(target) if a.endswith("_") and not a.startswith("__")]:
+            if attr not in state:
+                delattr(target, attr)
+        for attr, value in state.items():
+            setattr(target, attr, value)
+    return result
@@ -0,0 +1,74 @@
+import os
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+IPC_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("reading Arrow and Parquet data needs pyarrow, "
+                          "install it with `pip install pyarrow`") from None
+    return pyarrow
+
+
+def is_arrow_source(obj):
+    """
+    Returns whether obj is a pyarrow Table, RecordBatch or dataset, or the path of
+    a Parquet or Arrow IPC file or of a directory of Parquet files. pyarrow is
+    not imported to tell
+    """
+    if isinstance(obj, (str, os.PathLike)):
+        path = os.fspath(obj)
+        if path.endswith(PARQUET_SUFFIXES + IPC_SUFFIXES):
+            return True
+        return os.path.isdir(path) and any(name.endswith(PARQUET_SUFFIXES) for name in os.listdir(path))
+    return type(obj).__module__.split(".")[0] == "pyarrow" and (
+        hasattr(obj, "to_table") or hasattr(obj, "column_names"))
+
+
+def read_frame(source, columns=None):
+    """
+    Returns the given columns (all by default) of an Arrow source as a pandas
+    DataFrame. Parquet files and datasets only read and decode those columns;
+    Arrow IPC files are memory-mapped, so only the pages of those columns are
+    read. Numeric columns without nulls are handed to pandas without a copy.
+    """
+    pa = _pyarrow()
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(IPC_SUFFIXES):
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        else:
+            import pyarrow.parquet as pq
+            return read_frame(pq.read_table(path, columns=columns, memory_map=True))
+    elif hasattr(source, "to_table"):
+        # a pyarrow.dataset.Dataset reads only the projected columns
+        return read_frame(source.to_table(columns=columns))
+    else:
+        table = source
+    if columns is not None:
+        table = table.select(columns)
+    # one block per column keeps pandas from consolidating (copying) the buffers
+    return table.to_pandas(split_blocks=True)
+
+
+def arrow_xy(X, y):
+    """
+    Returns X and y as pandas objects when either is an Arrow source, otherwise
+    unchanged. When X is an Arrow source y may be the name of its label column,
+    which is then split off X; a y source with one column becomes a Series
+    """
+    if is_arrow_source(X) and isinstance(y, str) and not is_arrow_source(y):
+        frame = read_frame(X)
+        return frame.drop(columns=y), frame[y]
+    if is_arrow_source(X):
+        X = read_frame(X)
+    if is_arrow_source(y):
+        y = read_frame(y)
+        if y.shape[1] == 1:
+            y = y.iloc[:, 0]
+    return X, y
@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+from ._sketch import KLLSketch, TailBuffer
+
+SUMMARY_COLUMNS = ["n", "q1", "med", "q3", "whislo", "whishi", "fliers"]
+
+
+def summary_table(datafr, variables, label_col, whis=1.5):
+    """
+    Compute the five-number summary and outliers of every variable for every class
+    with one grouped quantile pass over the frame.
+    -------
+    PARAMETERS:
+    datafr:
+        A pandas DataFrame containing the variables and the label column
+    variables:
+        A list of numeric column names
+    label_col:
+        The name of the column holding the class labels
+    whis: optional, default=1.5
+        The whisker reach in multiples of the interquartile range, as in matplotlib
+    -------
+    RETURNS:
+    A pandas DataFrame indexed by (variable, label) with the columns
+    n, q1, med, q3, whislo, whishi and fliers (an array of outlying values)
+    """
+    codes, classes = pd.factorize(datafr[label_col], sort=True)
+    keep = codes >= 0
+    codes = codes[keep]
+    values = datafr.loc[keep, variables]
+    # float32 (compact) columns keep their dtype
+    values = values.astype({v: float for v, t in zip(variables, values.dtypes)
+                            if t not in (np.float32, np.float64)})
+    values.columns = range(len(variables))
+    n_classes = len(classes)
+    n_vars = len(variables)
+
+    grouped = values.groupby(codes, sort=True)
+    count = grouped.count().reindex(range(n_classes)).to_numpy()
+    quart = grouped.quantile([0.25, 0.5, 0.75])
+    quart = quart.reindex(pd.MultiIndex.from_product([range(n_classes), [0.25, 0.5, 0.75]]))
+    quart = quart.to_numpy().reshape(n_classes, 3, n_vars)
+    q1, med, q3 = quart[:, 0], quart[:, 1], quart[:, 2]
+
+    # whiskers reach the most extreme observations inside the fences, anything
+    # beyond them is an outlier (same rule as matplotlib.cbook.boxplot_stats)
+    iqr = q3 - q1
+    lo_fence = (q1 - whis * iqr)[codes]
+    hi_fence = (q3 + whis * iqr)[codes]
+    arr = values.to_numpy()
+    inside = (arr >= lo_fence) & (arr <= hi_fence)
+    outside = ~inside & ~np.isnan(arr)
+    in_grouped = values.where(inside).groupby(codes, sort=True)
+    whislo = in_grouped.min().reindex(range(n_classes)).to_numpy()
+    whishi = in_grouped.max().reindex(range(n_classes)).to_numpy()
+    whislo = np.where(np.isnan(whislo), q1, whislo)
+    whishi = np.where(np.isnan(whishi), q3, whishi)
+
+    fliers = {}
+    for j in range(n_vars):
+        rows = np.flatnonzero(outside[:, j])
+        for k in range(n_classes):
+            fliers[(j, k)] = arr[rows[codes[rows] == k], j]
+
+    index = pd.MultiIndex.from_product([variables, classes], names=["variable", label_col])
+    table = pd.DataFrame({
+        "n": count.T.ravel().astype(int),
+        "q1": q1.T.ravel(),
+        "med": med.T.ravel(),
+        "q3": q3.T.ravel(),
+        "whislo": whislo.T.ravel(),
+        "whishi": whishi.T.ravel(),
+        "fliers": [fliers[(j, k)] for j in range(n_vars) for k in range(n_classes)],
+    }, index=index)
+    return table
+
+
+def bxp_stats(table, variable):
+    """
+    Convert the rows of a summary table for one variable into the list of dicts
+    expected by matplotlib.axes.Axes.bxp
+    """
+    rows = table[table.index.get_level_values("variable") == variable]
+    return [{"label": str(label), "q1": row.q1, "med": row.med, "q3": row.q3,
+             "whislo": row.whislo, "whishi": row.whishi, "fliers": row.fliers}
+            for (_, label), row in rows.iterrows() if row.n > 0]
+
+
+class StreamingSummary:
+    """
+    Boxplot statistics of every variable for every class, accumulated chunk by chunk
+    in memory that does not grow with the number of rows.
+
+    Each (variable, class) pair keeps a KLLSketch for the quartiles and a TailBuffer
+    with its max_fliers most extreme values at each end. Quartiles carry the rank
+    error of the sketch; whiskers and outliers are exact as long as at most
+    max_fliers values fall beyond a fence, otherwise only the most extreme
+    max_fliers outliers are kept and the whisker comes from the sketch.
+    -------
+    PARAMETERS:
+    variables:
+        A list of numeric column names
+    label_col:
+        The name of the column holding the class labels
+    whis: optional, default=1.5
+        The whisker reach in multiples of the interquartile range
+    k: optional, default=200
+        The accuracy parameter of each KLLSketch
+    max_fliers: optional, default=100
+        The number of extreme values kept at each end of every (variable, class)
+    """
+
+    def __init__(self, variables, label_col, whis=1.5, k=200, max_fliers=100):
+        self.variables = list(variables)
+        self.label_col = label_col
+        self.whis = whis
+        self.k = k
+        self.max_fliers = max_fliers
+        self.sketches = {}
+        self.tails = {}
+
+    def _state(self, var, label):
+        if (var, label) not in self.sketches:
+            self.sketches[(var, label)] = KLLSketch(self.k)
+            self.tails[(var, label)] = TailBuffer(self.max_fliers)
+        return self.sketches[(var, label)], self.tails[(var, label)]
+
+    def update(self, chunk):
+        """Adds the rows of a pandas DataFrame chunk"""
+        if not isinstance(chunk, pd.core.frame.DataFrame):
+            raise TypeError("every chunk should be of type pandas.Dataframe")
+        codes, classes = pd.factorize(chunk[self.label_col], sort=True)
+        # sort the rows by class once so each class is a contiguous slice
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(classes) + 1))
+        for var in self.variables:
+            arr = chunk[var].to_numpy(dtype=float)[order]
+            for k, label in enumerate(classes):
+                part = arr[bounds[k]:bounds[k + 1]]
+                sketch, tail = self._state(var, label)
+                sketch.update(part)
+                tail.update(part)
+        return self
+
+    def merge(self, other):
+        """Folds a StreamingSummary of other rows of the same variables into this one"""
+        for key, sketch in other.sketches.items():
+            mine, tail = self._state(*key)
+            mine.merge(sketch)
+            tail.merge(other.tails[key])
+        return self
+
+    def rank_error(self):
+        """Returns the normalized rank error of the quartiles (99% confidence)"""
+        return KLLSketch(self.k).rank_error()
+
+    def table(self):
+        """Returns the summary in the same layout as summary_table"""
+        labels = list(dict.fromkeys(label for _, label in self.sketches))
+        try:
+            labels = sorted(labels)
+        except TypeError:
+            pass
+        rows = []
+        for var in self.variables:
+            for label in labels:
+                sketch, tail = self._state(var, label)
+                q1, med, q3 = sketch.quantile([0.25, 0.5, 0.75])
+                iqr = q3 - q1
+                lo_fence, hi_fence = q1 - self.whis * iqr, q3 + self.whis * iqr
+                fliers = np.concatenate([tail.low[tail.low < lo_fence],
+                                         tail.high[tail.high > hi_fence]])
+                whislo = _whisker(tail.low, sketch, lo_fence, q1, lower=True)
+                whishi = _whisker(tail.high, sketch, hi_fence, q3, lower=False)
+                rows.append([sketch.n, q1, med, q3, whislo, whishi, fliers])
+        index = pd.MultiIndex.from_product([self.variables, labels],
+                                           names=["variable", self.label_col])
+        table = pd.DataFrame(rows, columns=SUMMARY_COLUMNS, index=index)
+        table["n"] = table["n"].astype(int)
+        table.attrs["rank_error"] = self.rank_error()
+        return table
+
+
+def _whisker(tail, sketch, fence, default, lower):
+    # the most extreme value inside the fence is exact when the tail buffer
+    # reaches past the fence, otherwise the sketch gives its best guess
+    for candidates in (tail, np.concatenate(sketch.levels)):
+        inside = candidates[candidates >= fence] if lower else candidates[candidates <= fence]
+        if inside.size:
+            return inside.min() if lower else inside.max()
+    return default
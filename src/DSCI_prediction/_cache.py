@@ -0,0 +1,197 @@
+import functools
+import hashlib
+import os
+import pickle
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# search parameters that change how the search runs but not what it finds
+RUNTIME_PARAMS = {"n_jobs", "pre_dispatch", "verbose", "error_score"}
+
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+class UnstableReprError(ValueError):
+    """
+    Raised for a value that _stable_repr cannot identify by its content (a lambda,
+    a closure, an object whose repr is its memory address), which must not be
+    used in a cache or deduplication key
+    """
+
+
+def _qualified_name(value):
+    """
+    Returns module.qualname of a function or class that can be imported under
+    that name, None for lambdas, closures and anything else
+    """
+    module = getattr(value, "__module__", None)
+    qualname = getattr(value, "__qualname__", getattr(value, "__name__", None))
+    if not module or not qualname or "<" in qualname:
+        return None
+    obj = sys.modules.get(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part, None)
+    return f"{module}.{qualname}" if obj is value else None
+
+
+def _type_name(value):
+    """Returns module.qualname of the type of value, which tells apart classes of the same name"""
+    return f"{type(value).__module__}.{type(value).__qualname__}"
+
+
+def _stable_repr(value):
+    """
+    Returns a repr of value that does not depend on memory addresses, so it can be
+    hashed across processes. Callables are identified by their importable name
+    and bound state (e.g. the score function and kwargs of a make_scorer scorer), and
+    arrays and pandas objects by a hash of their content, as their repr is
+    truncated; raises UnstableReprError for values that cannot be identified that way
+    """
+    if hasattr(value, "get_params") and not isinstance(value, type):
+        params = value.get_params(deep=False)
+        return f"{_type_name(value)}({_stable_repr(params)})"
+    if isinstance(value, (np.ndarray, pd.core.frame.DataFrame, pd.core.series.Series)):
+        digest = hashlib.blake2b(digest_size=20)
+        _update_with_data(digest, value)
+        return f"{_type_name(value)}<{digest.hexdigest()}>"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{k!r}: {_stable_repr(v)}"
+                               for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))) + "}"
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__ + "[" + ", ".join(_stable_repr(v) for v in value) + "]"
+    if hasattr(value, "dist") and hasattr(value, "kwds"):
+        # frozen scipy.stats distributions used by randomized searches
+        return f"{value.dist.name}({_stable_repr(list(value.args))}, {_stable_repr(value.kwds)})"
+    if isinstance(value, functools.partial):
+        return (f"partial({_stable_repr(value.func)}, {_stable_repr(list(value.args))}, "
+                f"{_stable_repr(value.keywords)})")
+    if hasattr(value, "__self__") and hasattr(value, "__func__"):
+        # a bound method is its function and the object it is bound to
+        return f"{_stable_repr(value.__self__)}.{value.__func__.__name__}"
+    if callable(value):
+        name = _qualified_name(value)
+        if name is not None:
+            return name
+        if not isinstance(value, type) and hasattr(value, "__dict__") and _qualified_name(type(value)):
+            # callable objects such as scorers are their class and state
+            return f"{_qualified_name(type(value))}({_stable_repr(vars(value))})"
+        raise UnstableReprError(f"{value!r} cannot be identified by its content")
+    text = repr(value)
+    if _ADDRESS.search(text):
+        raise UnstableReprError(f"{text} cannot be identified by its content")
+    return text
+
+
+def _update_with_data(digest, data):
+    if isinstance(data, (pd.core.frame.DataFrame, pd.core.series.Series)):
+        digest.update(repr((type(data).__name__, data.shape)).encode())
+        if isinstance(data, pd.core.frame.DataFrame):
+            digest.update(repr([(str(c), str(t)) for c, t in data.dtypes.items()]).encode())
+        else:
+            digest.update(repr((str(data.name), str(data.dtype))).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        return
+    data = np.asarray(data)
+    digest.update(repr((data.shape, str(data.dtype))).encode())
+    if data.dtype.hasobject:
+        digest.update(pd.util.hash_pandas_object(pd.DataFrame(data.reshape(len(data), -1)),
+                                                 index=False).to_numpy().tobytes())
+    else:
+        digest.update(np.ascontiguousarray(data).view(np.uint8).tobytes())
+
+
+def search_fingerprint(search, X, y, extra=None):
+    """
+    Returns a hex digest of the content of X and y and of every search parameter
+    that affects the result (estimator params, param grid, cv, scoring, ...),
+    and of extra options of how the search is run, if any. Raises
+    UnstableReprError when a parameter (e.g. a lambda scorer) cannot be identified
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if extra is not None:
+        digest.update(_stable_repr(extra).encode())
+    params = {k: v for k, v in search.get_params(deep=False).items() if k not in RUNTIME_PARAMS}
+    digest.update(_type_name(search).encode())
+    digest.update(_stable_repr(params).encode())
+    _update_with_data(digest, X)
+    _update_with_data(digest, y)
+    return digest.hexdigest()
+
+
+class SearchCache:
+    """
+    An on-disk cache of hyperparameter search results, one pickle file per entry.
+
+    The least recently used entries are evicted once the files take more than
+    max_bytes in total.
+    -------
+    PARAMETERS:
+    directory:
+        A path to the directory holding the cache files, created if missing
+    max_bytes: optional, default=256 MiB
+        An int denoting the size limit of the cache on disk
+    """
+
+    suffix = ".search.pkl"
+
+    def __init__(self, directory, max_bytes=256 * 2**20):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name[:-len(self.suffix)]))
+        return sorted(entries)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def __len__(self):
+        return len(self._entries())
+
+    def get(self, key):
+        """Returns the stored value for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # the modification time doubles as the last access time for eviction
+        os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        return value
+
+    def put(self, key, value):
+        """Stores value under key and evicts the least recently used entries"""
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, old_key in entries:
+            if total <= self.max_bytes:
+                break
+            self.invalidate(old_key)
+            total -= size
+
+    def invalidate(self, key=None):
+        """Removes the entry for key, or every entry when key is None"""
+        keys = [key] if key is not None else [k for _, _, k in self._entries()]
+        for k in keys:
+            try:
+                os.remove(self._path(k))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_RTOL = 1e-6
+_BLOCK = 1 << 20
+
+
+def float32_if_close(values, rtol=DEFAULT_RTOL):
+    """
+    Returns values as float32 when no finite value moves by more than rtol
+    (relative) and no finite value overflows, otherwise values unchanged.
+    The check runs in blocks, so it needs little memory beyond the result
+    """
+    values = np.asarray(values)
+    if values.dtype != np.float64:
+        return values
+    with np.errstate(over="ignore"):
+        small = values.astype(np.float32)
+    flat, flat_small = values.reshape(-1), small.reshape(-1)
+    for start in range(0, flat.size, _BLOCK):
+        block = flat[start:start + _BLOCK]
+        finite = np.isfinite(block)
+        block, block_small = block[finite], flat_small[start:start + _BLOCK][finite]
+        if not (np.isfinite(block_small).all()
+                and (np.abs(block_small - block) <= rtol * np.abs(block)).all()):
+            return values
+    return small
+
+
+def compact_labels(labels, index=None):
+    """
+    Returns labels as a categorical Series with sorted categories, so its codes
+    are the smallest integer type for the number of classes. Arrays get index
+    """
+    if isinstance(labels, pd.core.frame.DataFrame) and labels.shape[1] == 1:
+        labels = labels.iloc[:, 0]
+    if isinstance(getattr(labels, "dtype", None), pd.CategoricalDtype):
+        return labels
+    if isinstance(labels, pd.core.series.Series):
+        return labels.astype("category")
+    return pd.Series(pd.Categorical(np.asarray(labels).ravel()), index=index)
+
+
+def compact_frame(df, label_col=None, columns=None, rtol=DEFAULT_RTOL):
+    """
+    Returns df with float64 columns as float32 where that changes no value by
+    more than rtol (relative), integer columns in the smallest integer type that
+    holds them, and label_col as a categorical. Columns that are already compact,
+    and those not in columns when it is given, are shared with df, not copied.
+    attrs["compact"] holds the bytes of the compacted columns before and after.
+
+    The compact argument of the summary, plotting and fitting functions makes
+    these copies once on entry: True for rtol=1e-6, which float32 rounding
+    (at most 6e-8 relative) meets for every value in its normal range, or a number as
+    rtol. A column failing the tolerance stays float64, so results differ from
+    those of the float64 data by at most rtol
+    """
+    out = df.copy(deep=False)
+    before = after = 0
+    for col in (df.columns if columns is None else columns):
+        series = df[col]
+        if col == label_col:
+            new = compact_labels(series)
+        elif series.dtype == np.float64:
+            new = pd.Series(float32_if_close(series.to_numpy(), rtol), index=series.index, name=col)
+        elif series.dtype.kind in "iu":
+            new = pd.to_numeric(series, downcast="integer" if series.dtype.kind == "i" else "unsigned")
+        else:
+            continue
+        if new is not series:
+            before += series.memory_usage(index=False)
+            after += new.memory_usage(index=False)
+            out[col] = new
+    if label_col is not None and columns is not None and label_col not in columns:
+        out[label_col] = compact_labels(df[label_col])
+    out.attrs["compact"] = {"bytes_before": int(before), "bytes_after": int(after)}
+    return out
+
+
+def compact_xy(X, y, rtol=DEFAULT_RTOL):
+    """
+    Returns X with compact numeric columns (or as a float32 array) and y as a
+    categorical, see compact_frame; None and non-numeric inputs are left as they are
+    """
+    if isinstance(X, pd.core.frame.DataFrame):
+        X = compact_frame(X, rtol=rtol)
+    elif isinstance(X, np.ndarray) and X.dtype == np.float64:
+        X = float32_if_close(X, rtol)
+    if isinstance(y, (pd.core.series.Series, pd.core.frame.DataFrame, np.ndarray)):
+        index = None
+        if isinstance(y, np.ndarray) and isinstance(X, pd.core.frame.DataFrame) and len(y) == len(X):
+            index = X.index
+        y = compact_labels(y, index)
+    return X, y
@@ -0,0 +1,136 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+
+def label_codes(values, labels):
+    """
+    Returns the position of every value in labels, -1 for values not in labels
+    """
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        # remaps the category codes, the values themselves are not looked at
+        return pd.Categorical(values).set_categories(labels).codes.astype(np.intp)
+    values = np.asarray(values)
+    if values.ndim == 2 and values.shape[1] == 1:
+        values = values.ravel()
+    return pd.Categorical(values, categories=labels).codes.astype(np.intp)
+
+
+def confusion_counts(true_codes, pred_codes, n_classes):
+    """
+    Returns the (n_classes, n_classes) integer confusion matrix of two code arrays
+    with a single bincount on true * n_classes + pred, rows with a code of -1 are skipped
+    """
+    true_codes = np.asarray(true_codes, dtype=np.intp)
+    pred_codes = np.asarray(pred_codes, dtype=np.intp)
+    keep = (true_codes >= 0) & (pred_codes >= 0)
+    flat = true_codes[keep] * n_classes + pred_codes[keep]
+    return np.bincount(flat, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+
+def tidy_matrices(matrices, labels):
+    """
+    Returns a long DataFrame with the columns model, true, predicted and count
+    from a dict of named confusion matrices over the same labels
+    """
+    n = len(labels)
+    frames = [pd.DataFrame({"model": name,
+                            "true": np.repeat(labels, n),
+                            "predicted": np.tile(labels, n),
+                            "count": cm.ravel()})
+              for name, cm in matrices.items()]
+    if not frames:
+        return pd.DataFrame(columns=["model", "true", "predicted", "count"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def matrix_of(summary):
+    """
+    Returns the (confusion matrix, labels) of a long DataFrame with the columns
+    true, predicted and count over every pair of labels, as made by tidy_matrices
+    """
+    n = int(round(np.sqrt(len(summary))))
+    labels = summary["predicted"].to_numpy()[:n]
+    return summary["count"].to_numpy().reshape(n, n), labels
+
+
+def array_chunks(X, y, chunk_size):
+    """
+    Yields (X, y) slices of chunk_size rows, as views where X and y allow it
+    """
+    for start in range(0, len(X), chunk_size):
+        stop = start + chunk_size
+        X_chunk = X.iloc[start:stop] if hasattr(X, "iloc") else X[start:stop]
+        y_chunk = y.iloc[start:stop] if hasattr(y, "iloc") else y[start:stop]
+        yield X_chunk, y_chunk
+
+
+def streaming_confusion(model, chunks, labels, n_threads=None):
+    """
+    Predicts every (X, y) chunk with a fitted model and adds its counts to one integer
+    confusion matrix over labels. With n_threads, up to twice that many chunks are
+    predicted at once on a thread pool, so memory stays bounded by the chunk size.
+    """
+    n = len(labels)
+    cm = np.zeros((n, n), dtype=np.int64)
+
+    def count(chunk):
+        X_chunk, y_chunk = chunk
+        return confusion_counts(label_codes(y_chunk, labels),
+                                label_codes(model.predict(X_chunk), labels), n)
+
+    if not n_threads:
+        for chunk in chunks:
+            cm += count(chunk)
+        return cm
+    pending = set()
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for chunk in chunks:
+            if len(pending) >= 2 * n_threads:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cm += future.result()
+            pending.add(executor.submit(count, chunk))
+        for future in pending:
+            cm += future.result()
+    return cm
+
+
+def threshold_table(scores, is_positive):
+    """
+    Returns the confusion counts at every distinct threshold of a binary score with
+    one sort and cumulative sums, a sample being predicted positive when its score
+    is at least the threshold. The first row, at threshold +inf, predicts nothing
+    positive. Columns: threshold, tp, fp, tn, fn, precision, recall and fpr.
+    """
+    scores = np.asarray(scores, dtype=float)
+    is_positive = np.asarray(is_positive, dtype=bool)
+    order = np.argsort(-scores, kind="mergesort")
+    ranked = scores[order]
+    tp_cum = np.cumsum(is_positive[order])
+    fp_cum = np.arange(1, len(ranked) + 1) - tp_cum
+    # the last position of every run of equal scores closes a threshold
+    last = np.r_[np.flatnonzero(ranked[1:] != ranked[:-1]), len(ranked) - 1] if len(ranked) else []
+    tp = np.r_[0, tp_cum[last]].astype(np.int64)
+    fp = np.r_[0, fp_cum[last]].astype(np.int64)
+    n_pos = int(is_positive.sum())
+    n_neg = len(is_positive) - n_pos
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table = pd.DataFrame({
+            "threshold": np.r_[np.inf, ranked[last]],
+            "tp": tp, "fp": fp, "tn": n_neg - fp, "fn": n_pos - tp,
+            "precision": np.where(tp + fp > 0, tp / (tp + fp), np.nan),
+            "recall": tp / n_pos if n_pos else np.full(len(tp), np.nan),
+            "fpr": fp / n_neg if n_neg else np.full(len(fp), np.nan),
+        })
+    return table
+
+
+def counts_at(table, threshold):
+    """
+    Returns the 2x2 confusion matrix [[tn, fp], [fn, tp]] of a threshold_table
+    at any threshold
+    """
+    row = table[table["threshold"] >= threshold].iloc[-1]
+    return np.array([[row.tn, row.fp], [row.fn, row.tp]], dtype=np.int64)
@@ -0,0 +1,399 @@
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from ._arrow import is_arrow_source, read_frame
+
+
+def shared_bin_edges(lo, hi, bins):
+    """
+    Compute one set of bin edges per column that is shared by every class.
+    -------
+    PARAMETERS:
+    lo, hi:
+        1-D float arrays with the per-column minimum and maximum over all classes
+    bins:
+        An int (number of equal-width bins) or a 1-D increasing sequence of edges
+        used for every column
+    -------
+    RETURNS:
+    A 2-D float array of shape (n_columns, n_bins + 1)
+    """
+    lo = np.asarray(lo, dtype=float)
+    hi = np.asarray(hi, dtype=float)
+    if np.ndim(bins) == 0:
+        if not isinstance(bins, (int, np.integer)) or bins < 1:
+            raise ValueError("'bins' should be a positive int or a sequence of edges")
+        # same conventions as np.histogram: all-missing columns get [0, 1],
+        # constant columns get a unit-wide range around the value
+        lo = np.where(np.isnan(lo), 0.0, lo)
+        hi = np.where(np.isnan(hi), 1.0, hi)
+        flat = lo == hi
+        lo = np.where(flat, lo - 0.5, lo)
+        hi = np.where(flat, hi + 0.5, hi)
+        return lo[:, None] + (hi - lo)[:, None] * np.linspace(0.0, 1.0, bins + 1)
+    edges = np.asarray(bins, dtype=float)
+    if edges.ndim != 1 or edges.size < 2 or np.any(np.diff(edges) <= 0):
+        raise ValueError("'bins' should be a positive int or a sequence of edges")
+    return np.broadcast_to(edges, (lo.shape[0], edges.size))
+
+
+def bin_index(values, edges, uniform=True):
+    """
+    Map every value to the index of its bin, -1 for missing or out-of-range values.
+    The last bin is closed on the right, like np.histogram.
+    -------
+    PARAMETERS:
+    values:
+        A 2-D float array of shape (n_rows, n_columns)
+    edges:
+        A 2-D float array of shape (n_columns, n_bins + 1)
+    uniform: optional, default=True
+        Whether every row of edges is equally spaced, which allows binning by
+        arithmetic instead of a binary search
+    -------
+    RETURNS:
+    A 2-D np.intp array with the same shape as values
+    """
+    n_bins = edges.shape[1] - 1
+    lo = edges[:, 0]
+    hi = edges[:, -1]
+    with np.errstate(invalid="ignore"):
+        keep = (values >= lo) & (values <= hi)
+    if uniform:
+        with np.errstate(invalid="ignore"):
+            # in the dtype of values, the edge corrections below fix any rounding
+            scaled = (values - lo.astype(values.dtype)) / (hi - lo).astype(values.dtype) * n_bins
+        idx = np.where(keep, scaled, 0).astype(np.intp)
+        np.minimum(idx, n_bins - 1, out=idx)
+        # undo floating point rounding at the edges the same way np.histogram does
+        cols = np.arange(edges.shape[0])
+        idx -= keep & (values < edges[cols, idx])
+        idx += keep & (values >= edges[cols, idx + 1]) & (idx != n_bins - 1)
+    else:
+        # non-uniform edges are shared by every column, so one search covers them all
+        idx = np.searchsorted(edges[0], values, side="right") - 1
+        np.minimum(idx, n_bins - 1, out=idx)
+    idx[~keep] = -1
+    return idx
+
+
+def _as_float(values):
+    # float32 (compact) data is binned as is, without a float64 copy
+    return values if values.dtype in (np.float32, np.float64) else values.astype(float)
+
+
+def histogram_counts(values, codes, n_classes, bins):
+    """
+    Histogram every column for every class with one bincount per block of columns.
+    -------
+    PARAMETERS:
+    values:
+        A 2-D float array of shape (n_rows, n_columns), or a list of 1-D column
+        arrays. Columns passed as a list are binned one at a time straight from
+        their own buffers, so no 2-D copy is ever made
+    codes:
+        A 1-D int array of class codes in [0, n_classes) for each row,
+        rows with a negative code are skipped
+    n_classes:
+        An int denoting the number of classes
+    bins:
+        An int or a sequence of edges, see shared_bin_edges
+    -------
+    RETURNS:
+    A tuple (counts, edges) where counts has shape (n_classes, n_columns, n_bins)
+    and edges has shape (n_columns, n_bins + 1)
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    if isinstance(values, np.ndarray) and values.ndim == 2:
+        blocks = [_as_float(values)]
+    else:
+        blocks = [_as_float(np.asarray(col))[:, None] for col in values]
+    counts = []
+    edges = []
+    for block in blocks:
+        block_counts, block_edges = _block_counts(block, codes, n_classes, bins)
+        counts.append(block_counts)
+        edges.append(block_edges)
+    if not blocks:
+        n_bins = bins if np.ndim(bins) == 0 else len(bins) - 1
+        return np.zeros((n_classes, 0, n_bins), dtype=np.intp), np.zeros((0, n_bins + 1))
+    return np.concatenate(counts, axis=1), np.concatenate(edges, axis=0)
+
+
+def _block_counts(values, codes, n_classes, bins):
+    n_cols = values.shape[1]
+    valid = codes >= 0
+    if valid.any():
+        # all-missing columns give NaN here and are handled by shared_bin_edges
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            observed = values if valid.all() else values[valid]
+            lo = np.nanmin(observed, axis=0)
+            hi = np.nanmax(observed, axis=0)
+    else:
+        lo = hi = np.full(n_cols, np.nan)
+    edges = shared_bin_edges(lo, hi, bins)
+    n_bins = edges.shape[1] - 1
+    idx = bin_index(values, edges, uniform=np.ndim(bins) == 0)
+    idx[~valid] = -1
+    flat = (codes[:, None] * n_cols + np.arange(n_cols)) * n_bins + idx
+    counts = np.bincount(flat[idx >= 0], minlength=n_classes * n_cols * n_bins)
+    return counts.reshape(n_classes, n_cols, n_bins), edges
+
+
+def tidy_histogram(counts, edges, columns, labels):
+    """
+    Returns a long DataFrame with the columns variable, label, bin, left, right and
+    count, ordered by variable, label and bin, from the (counts, edges) of
+    histogram_counts or from one (n_labels, n_bins) count array and one edge
+    array per column when the columns have different numbers of bins
+    """
+    if isinstance(counts, np.ndarray):
+        counts = [counts[:, i] for i in range(counts.shape[1])]
+    labels = np.asarray(labels, dtype=object)
+    parts = []
+    for column, column_counts, column_edges in zip(columns, counts, edges):
+        n_bins = len(column_edges) - 1
+        parts.append(pd.DataFrame({
+            "variable": np.repeat(np.asarray([column], dtype=object), len(labels) * n_bins),
+            "label": np.repeat(labels, n_bins),
+            "bin": np.tile(np.arange(n_bins), len(labels)),
+            "left": np.tile(column_edges[:-1], len(labels)),
+            "right": np.tile(column_edges[1:], len(labels)),
+            "count": np.asarray(column_counts).ravel(),
+        }))
+    if not parts:
+        return pd.DataFrame(columns=["variable", "label", "bin", "left", "right", "count"])
+    return pd.concat(parts, ignore_index=True)
+
+
+def histogram_arrays(summary, columns):
+    """
+    Returns, from a tidy_histogram DataFrame, a list with the (n_labels, n_bins)
+    counts of every column, a list with the edges of every column and the labels
+    """
+    counts, edges, labels = [], [], None
+    for column in columns:
+        rows = summary[summary["variable"] == column]
+        first = rows["bin"].to_numpy() == 0
+        if labels is None:
+            labels = list(rows["label"].to_numpy()[first])
+        n_bins = len(rows) // max(len(labels), 1)
+        counts.append(rows["count"].to_numpy().reshape(len(labels), n_bins))
+        edges.append(np.r_[rows["left"].to_numpy()[:n_bins], rows["right"].to_numpy()[n_bins - 1:n_bins]])
+    return counts, edges, labels if labels is not None else []
+
+
+class HistogramAccumulator:
+    """
+    Histograms of every variable for every class, accumulated chunk by chunk and
+    mergeable with the accumulators of other processes or of earlier runs.
+
+    With fixed edges every accumulator counts into the same bins. Otherwise each
+    variable gets at most bins equal-width bins whose width is a power of two and
+    whose edges are multiples of it: when new values fall outside the current
+    bins, neighbouring bins are merged pairwise until everything fits. Any two
+    accumulators can then be merged exactly, whatever data each of them saw.
+    -------
+    PARAMETERS:
+    variables:
+        A list of numeric column names
+    label_col: optional, default=None
+        The name of the column holding the class labels. When None, every chunk
+        is passed to update with the label of all of its rows, like the df0 and
+        df1 of plot_hist_overlay
+    bins: optional, default=20
+        An int denoting the largest number of adaptive bins per variable, or an
+        increasing sequence of fixed edges shared by every variable. Values
+        outside fixed edges are not counted
+    """
+
+    def __init__(self, variables, label_col=None, bins=20):
+        self.variables = list(variables)
+        self.label_col = label_col
+        if np.ndim(bins) == 0:
+            if not isinstance(bins, (int, np.integer)) or bins < 1:
+                raise ValueError("'bins' should be a positive int or a sequence of edges")
+            self.bins = int(bins)
+            self.edges = None
+        else:
+            self.edges = shared_bin_edges([0.0], [1.0], bins)[0].copy()
+            self.bins = len(self.edges) - 1
+            widths = np.diff(self.edges)
+            self._uniform = bool(np.allclose(widths, widths[0]))
+        self.labels = []
+        # per variable: (exponent of the bin width, index of the first bin, counts
+        # of shape (n_labels, n_bins)); the exponent and index are unused with fixed edges
+        self.state = {var: (0, 0, np.zeros((0, self.bins if self.edges is not None else 0),
+                                          dtype=np.int64))
+                      for var in self.variables}
+
+    def _label_rows(self, labels):
+        new = [label for label in labels if label not in self.labels]
+        if new:
+            self.labels.extend(new)
+            for var, (exp, start, counts) in self.state.items():
+                grown = np.zeros((len(self.labels), counts.shape[1]), dtype=np.int64)
+                grown[:len(counts)] = counts
+                self.state[var] = (exp, start, grown)
+        return np.array([self.labels.index(label) for label in labels], dtype=np.intp)
+
+    def update(self, chunk, label=None):
+        """
+        Adds the rows of a pandas DataFrame chunk, all labelled label when label_col
+        is None. Only the variables and label_col of an Arrow chunk are read
+        """
+        if is_arrow_source(chunk):
+            chunk = read_frame(chunk, self.variables + ([self.label_col] if self.label_col is not None else []))
+        if not isinstance(chunk, pd.core.frame.DataFrame):
+            raise TypeError("every chunk should be of type pandas.Dataframe")
+        if self.label_col is not None:
+            codes, classes = pd.factorize(chunk[self.label_col], sort=True)
+            rows = self._label_rows(list(classes))
+            codes = np.where(codes >= 0, rows[codes] if len(rows) else codes, -1)
+        else:
+            if label is None:
+                raise TypeError("'label' should be given when the accumulator has no 'label_col'")
+            codes = np.full(len(chunk), self._label_rows([label])[0], dtype=np.intp)
+        for var in self.variables:
+            values = chunk[var].to_numpy(dtype=float)
+            keep = (codes >= 0) & np.isfinite(values)
+            if keep.any():
+                self._add(var, values[keep], codes[keep])
+        return self
+
+    def _add(self, var, values, codes):
+        exp, start, counts = self.state[var]
+        n_labels = len(self.labels)
+        if self.edges is not None:
+            idx = bin_index(values[:, None], self.edges[None, :], uniform=self._uniform)[:, 0]
+            inside = idx >= 0
+            counts += np.bincount(codes[inside] * self.bins + idx[inside],
+                                  minlength=n_labels * self.bins).reshape(n_labels, self.bins)
+            return
+        lo, hi = values.min(), values.max()
+        if counts.shape[1] == 0:
+            # the narrowest power of two width that holds the first values in bins bins
+            exp = int(np.ceil(np.log2((hi - lo) / self.bins))) if hi > lo else 0
+            start = int(np.floor(np.ldexp(lo, -exp)))
+        first, last = start, start + counts.shape[1] - 1
+        while True:
+            low = int(np.floor(np.ldexp(lo, -exp)))
+            high = int(np.floor(np.ldexp(hi, -exp)))
+            if counts.shape[1]:
+                low, high = min(low, first), max(high, last)
+            if high - low < self.bins:
+                break
+            exp, first, last = exp + 1, first // 2, last // 2
+        exp, start, counts = _coarsen(self.state[var], exp) if counts.shape[1] else (exp, low, counts)
+        exp, start, counts = _widen((exp, start, counts), low, high, n_labels)
+        idx = np.floor(np.ldexp(values, -exp)).astype(np.int64) - start
+        counts += np.bincount(codes * counts.shape[1] + idx,
+                              minlength=counts.size).reshape(counts.shape)
+        self.state[var] = (exp, start, counts)
+
+    def merge(self, other):
+        """Folds a HistogramAccumulator of other rows of the same variables into this one"""
+        if (self.edges is None) != (other.edges is None) or (
+                self.edges is not None and not np.array_equal(self.edges, other.edges)):
+            raise ValueError("only accumulators with the same bins can be merged")
+        rows = self._label_rows(list(other.labels))
+        n_labels = len(self.labels)
+        for var in self.variables:
+            theirs = other.state[var]
+            if theirs[2].shape[1] == 0:
+                continue
+            if self.edges is not None:
+                self.state[var][2][rows] += theirs[2]
+                continue
+            mine = self.state[var]
+            if mine[2].shape[1] == 0:
+                mine = (theirs[0], theirs[1], np.zeros((n_labels, 0), dtype=np.int64))
+            exp = max(mine[0], theirs[0])
+            mine, theirs = _coarsen(mine, exp), _coarsen(theirs, exp)
+            low = min(mine[1], theirs[1])
+            high = max(mine[1] + mine[2].shape[1], theirs[1] + theirs[2].shape[1]) - 1
+            while high - low >= self.bins:
+                exp, low, high = exp + 1, low // 2, high // 2
+            mine, theirs = _coarsen(mine, exp), _coarsen(theirs, exp)
+            exp, start, counts = _widen(mine, low, high, n_labels)
+            offset = theirs[1] - start
+            counts[rows, offset:offset + theirs[2].shape[1]] += theirs[2]
+            self.state[var] = (exp, start, counts)
+        return self
+
+    def table(self, variables=None, labels=None):
+        """
+        Returns the histograms in the same layout as tidy_histogram, classes sorted,
+        for the given variables (all by default). labels renames the sorted classes
+        """
+        try:
+            order = sorted(range(len(self.labels)), key=lambda i: self.labels[i])
+        except TypeError:
+            order = list(range(len(self.labels)))
+        variables = self.variables if variables is None else list(variables)
+        missing = [var for var in variables if var not in self.state]
+        if missing:
+            raise ValueError(f"the accumulator has no histogram of {missing}")
+        if labels is not None and len(labels) < len(order):
+            raise ValueError(f"'labels' should have one label for each of the {len(order)} classes")
+        counts, edges = [], []
+        for var in variables:
+            exp, start, var_counts = self.state[var]
+            if self.edges is not None:
+                var_edges = self.edges
+            elif var_counts.shape[1]:
+                var_edges = np.ldexp(np.arange(start, start + var_counts.shape[1] + 1, dtype=float), exp)
+            else:
+                # no values yet: one empty unit bin, as np.histogram does
+                var_edges, var_counts = np.array([0.0, 1.0]), np.zeros((len(self.labels), 1), np.int64)
+            counts.append(var_counts[order])
+            edges.append(var_edges)
+        if labels is None:
+            labels = [self.labels[i] for i in order]
+        return tidy_histogram(counts, edges, variables, labels[:len(order)])
+
+    def to_json(self):
+        """Returns the accumulator as a compact JSON string"""
+        return json.dumps({
+            "variables": self.variables, "label_col": self.label_col, "bins": self.bins,
+            "edges": None if self.edges is None else self.edges.tolist(),
+            "labels": [label.item() if hasattr(label, "item") else label for label in self.labels],
+            "state": [[exp, start, counts.shape[1], counts.ravel().tolist()]
+                      for exp, start, counts in (self.state[var] for var in self.variables)],
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        """Returns the accumulator stored by to_json"""
+        data = json.loads(text)
+        acc = cls(data["variables"], data["label_col"],
+                  data["bins"] if data["edges"] is None else data["edges"])
+        acc.labels = list(data["labels"])
+        for var, (exp, start, n_bins, counts) in zip(acc.variables, data["state"]):
+            acc.state[var] = (exp, start, np.array(counts, dtype=np.int64).reshape(len(acc.labels), n_bins))
+        return acc
+
+
+def _coarsen(state, exp):
+    """Merges neighbouring bins of a (exponent, start, counts) state up to a width of 2**exp"""
+    old_exp, start, counts = state
+    if counts.shape[1] == 0:
+        return exp, start // 2 ** max(exp - old_exp, 0), counts
+    while old_exp < exp:
+        idx = np.arange(start, start + counts.shape[1]) // 2
+        merged = np.zeros((counts.shape[0], idx[-1] - idx[0] + 1), dtype=np.int64)
+        np.add.at(merged, (slice(None), idx - idx[0]), counts)
+        old_exp, start, counts = old_exp + 1, int(idx[0]), merged
+    return old_exp, start, counts
+
+
+def _widen(state, low, high, n_labels):
+    """Pads the counts of a state with empty bins so they cover bins low to high"""
+    exp, start, counts = state
+    grown = np.zeros((n_labels, high - low + 1), dtype=np.int64)
+    grown[:counts.shape[0], start - low:start - low + counts.shape[1]] = counts
+    return exp, low, grown
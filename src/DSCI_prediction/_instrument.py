@@ -0,0 +1,230 @@
+import contextlib
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+
+import numpy as np
+import pandas as pd
+
+RECORD_COLUMNS = ["function", "stage", "candidate", "fold", "wall", "cpu", "peak_bytes"]
+
+# callbacks receiving every record of every thread
+_callbacks = []
+# the recorders of the instrument blocks the current thread or task is in; while
+# neither holds anything nothing is measured
+_recorders = contextvars.ContextVar("dsci_prediction_recorders", default=())
+_lock = threading.Lock()
+# running lap timers, whose peaks must survive the tracemalloc.reset_peak of a nested timer
+_open = weakref.WeakSet()
+
+
+def register_callback(callback):
+    """
+    Registers callback(record) to receive one dict per measured stage of every
+    call in the process, on any thread (instrument only records its own), with the
+    keys function, stage, candidate, fold, wall and cpu (seconds), peak_bytes
+    (peak bytes allocated above the level at the stage start, NaN unless
+    tracemalloc is tracing) and any stage specific extras.
+    Returns callback, so it can be used as a decorator
+    """
+    global _callbacks
+    with _lock:
+        if callback not in _callbacks:
+            # a new list, so emit can iterate without holding the lock
+            _callbacks = _callbacks + [callback]
+    return callback
+
+
+def unregister_callback(callback):
+    """Stops sending records to callback"""
+    global _callbacks
+    with _lock:
+        _callbacks = [c for c in _callbacks if c != callback]
+
+
+def enabled():
+    return bool(_callbacks or _recorders.get())
+
+
+def emit(function, stage, wall, cpu=np.nan, peak_bytes=np.nan, **extra):
+    """Sends one record to every registered callback and recorder of the current context"""
+    callbacks, recorders = _callbacks, _recorders.get()
+    if not callbacks and not recorders:
+        return
+    record = {"function": function, "stage": stage, "candidate": None, "fold": None,
+              "wall": wall, "cpu": cpu, "peak_bytes": peak_bytes, **extra}
+    for callback in callbacks:
+        callback(record)
+    for recorder in recorders:
+        recorder(record)
+
+
+def carry_context(function):
+    """
+    Returns function wrapped to record into the instrument blocks of the caller
+    when a thread pool of the package runs it. Threads do not inherit the
+    context of the thread that submits to them, and the wrapper cannot be
+    pickled, so process pools get function itself
+    """
+    recorders = _recorders.get()
+
+    def run(*args, **kwargs):
+        token = _recorders.set(recorders)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _recorders.reset(token)
+    return run
+
+
+def _reset_peak():
+    peak = tracemalloc.get_traced_memory()[1]
+    with _lock:
+        for timer in _open:
+            timer.peak = max(timer.peak, peak)
+        tracemalloc.reset_peak()
+
+
+class _Laps:
+    """
+    Measures consecutive stages of one call: every lap(stage) records the time
+    and memory since the previous lap (or since the timer was made)
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.peak = 0
+        with _lock:
+            _open.add(self)
+        self._start()
+
+    def _start(self):
+        self.memory = tracemalloc.is_tracing()
+        if self.memory:
+            self.base = self.peak = tracemalloc.get_traced_memory()[0]
+            _reset_peak()
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+
+    def lap(self, stage, **extra):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        peak = np.nan
+        if self.memory and tracemalloc.is_tracing():
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1]) - self.base
+        emit(self.function, stage, wall, cpu, peak, **extra)
+        self._start()
+
+
+class _NoLaps:
+    __slots__ = ()
+
+    def lap(self, stage, **extra):
+        pass
+
+
+_NO_LAPS = _NoLaps()
+
+
+def laps(function):
+    """
+    Returns a lap timer for the stages of function, or a do-nothing one while no
+    callback is registered
+    """
+    return _Laps(function) if enabled() else _NO_LAPS
+
+
+def _json_value(value):
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class Recorder:
+    """
+    The records collected by instrument, in the order they were made
+    """
+
+    def __init__(self, jsonl=None):
+        self.records = []
+        self._stream = open(jsonl, "a") if jsonl is not None else None
+
+    def __call__(self, record):
+        self.records.append(record)
+        if self._stream is not None:
+            self._stream.write(self._line(record))
+            self._stream.flush()
+
+    @staticmethod
+    def _line(record):
+        return json.dumps({k: _json_value(v) for k, v in record.items()}, default=str) + "\n"
+
+    def frame(self):
+        """Returns the records as a DataFrame, one row per record"""
+        table = pd.DataFrame(self.records)
+        extras = [c for c in table.columns if c not in RECORD_COLUMNS]
+        table = table.reindex(columns=RECORD_COLUMNS + extras)
+        return table.astype({"candidate": "Int64", "fold": "Int64",
+                             "wall": float, "cpu": float, "peak_bytes": float})
+
+    def to_jsonl(self, path):
+        """Writes the records to path as JSON lines"""
+        with open(path, "w") as f:
+            f.writelines(self._line(record) for record in self.records)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+@contextlib.contextmanager
+def instrument(memory=False, jsonl=None):
+    """
+    Records the stages of every plotting and tuning call made inside the block,
+    by the current thread or asyncio task only: calls of other threads are left
+    out, while the thread pools of the package (render_figures, build_report and
+    the async functions' executor) record into the block of the call that
+    submitted the work. Async calls sharing one computation are recorded by the
+    caller that started it. register_callback collects from every thread.
+    A call to another function of the package is recorded both as a stage of the
+    caller (e.g. the "summary" stage of plot_cm) and with the stages of the callee
+    (cm_summary "fit" and "predict"). Figures are only rasterized when saved,
+    which render_figures records as its "savefig" stage. Recording never changes
+    how a search runs: searches left to search.fit report the mean fit and score
+    times of every candidate from cv_results_, those tuned_para_table runs itself
+    report every candidate and fold
+    -------
+    PARAMETERS:
+    memory: optional, default=False
+        Also record the peak allocated bytes of every stage with tracemalloc,
+        which is started for the block unless it is already tracing. Tracing
+        slows Python allocations down severalfold, so keep it for memory questions
+    jsonl: optional, default=None
+        A path the records are appended to as JSON lines while they are made
+    -------
+    RETURNS:
+    A Recorder with the records list, frame() for a DataFrame and to_jsonl(path)
+    -------
+    Examples
+    with instrument() as rec:
+        tuned_para_table(search, X_train, y_train)
+    rec.frame().groupby("stage")["wall"].sum()
+    """
+    recorder = Recorder(jsonl)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    token = _recorders.set(_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _recorders.reset(token)
+        if started:
+            tracemalloc.stop()
+        recorder.close()
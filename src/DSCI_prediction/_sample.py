@@ -0,0 +1,272 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from ._arrow import is_arrow_source, read_frame
+
+# rows drawn from every class by sample=True, more than a figure can resolve
+DEFAULT_SAMPLE_SIZE = 200_000
+# the two-sided 99% normal quantile: every error here has the confidence of the
+# sketch rank errors of StreamingSummary
+Z99 = 2.5758293035489004
+# samples are drawn with a fixed seed, so the same data always gives the same figure
+SEED = 0
+# classes holding less than this share of the rows are drawn from their own positions
+_RARE = 1 / 8
+
+
+def target_size(error, n_population=None):
+    """
+    Returns the rows to draw from a class of n_population rows (unknown for a
+    stream) so a share estimated from them is within error of the class share
+    with 99% confidence, whatever the share
+    """
+    n0 = (Z99 * 0.5 / error) ** 2
+    if n_population is None:
+        return math.ceil(n0)
+    # the finite population correction, solved for the sample size
+    return min(math.ceil(n0 * n_population / (n_population - 1 + n0)), int(n_population))
+
+
+def class_sizes(sample, n_population):
+    """
+    Returns the number of rows to draw from every class for a sample argument:
+    an int of rows per class, or a float target error (see target_size)
+    """
+    if isinstance(sample, float):
+        return np.array([target_size(sample, n) for n in n_population], dtype=np.int64)
+    return np.minimum(sample, np.asarray(n_population, dtype=np.int64))
+
+
+def share_error(shares, n_sampled, n_population):
+    """
+    Returns the 99% error of shares estimated from n_sampled of n_population
+    rows drawn without replacement; arrays broadcast, exact counts have no error
+    """
+    n_sampled = np.asarray(n_sampled, dtype=float)
+    n_population = np.asarray(n_population, dtype=float)
+    shares = np.asarray(shares, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fpc = (n_population - n_sampled) / np.maximum(n_population - 1, 1)
+        error = Z99 * np.sqrt(shares * (1 - shares) * fpc / n_sampled)
+    return np.where(n_sampled > 0, np.nan_to_num(error), 0.0)
+
+
+def class_codes(labels):
+    """
+    Returns the class codes of a label Series (-1 for missing labels), its classes
+    and the rows of each class. Categorical labels use their codes as they are,
+    which keeps counting at the speed of a pass over one byte per row
+    """
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        codes = labels.cat.codes.to_numpy()
+        classes = labels.cat.categories
+    else:
+        codes, classes = pd.factorize(labels, sort=True)
+    if len(classes) <= 16:
+        counts = np.array([np.count_nonzero(codes == k) for k in range(len(classes))], dtype=np.int64)
+    else:
+        counts = np.bincount(codes[codes >= 0], minlength=len(classes)).astype(np.int64)
+    return codes, list(classes), counts
+
+
+def _distinct(n, k, rng, keep=None):
+    """
+    Returns k distinct positions drawn uniformly from those in [0, n) for which
+    keep (a function of a position array) is true, about k / share of them in
+    O(k) time instead of a pass over all n
+    """
+    found = np.empty(0, dtype=np.intp)
+    share = 1.0
+    while len(found) < k:
+        draw = rng.integers(0, n, size=int((k - len(found)) / share * 1.2) + 64)
+        if keep is not None:
+            hits = draw[keep(draw)]
+            share = max(len(hits) / len(draw), 1 / n)
+            draw = hits
+        # the distinct positions seen are a uniform subset, whatever order they came in
+        found = np.sort(np.concatenate([found, draw]))
+        found = found[np.r_[True, found[1:] != found[:-1]]]
+    return np.sort(rng.choice(found, k, replace=False))
+
+
+def stratified_positions(codes, counts, sizes, seed=SEED):
+    """
+    Returns the sorted positions of a uniform sample without replacement of
+    sizes[k] of the counts[k] rows of every class k of codes
+    """
+    rng = np.random.default_rng(seed)
+    n = len(codes)
+    parts = []
+    for k, (count, size) in enumerate(zip(counts, sizes)):
+        if size >= count:
+            parts.append(np.flatnonzero(codes == k))
+        elif count < _RARE * n:
+            pool = np.flatnonzero(codes == k)
+            parts.append(pool[_distinct(len(pool), size, rng)])
+        else:
+            parts.append(_distinct(n, size, rng, keep=lambda draw, k=k: codes[draw] == k))
+    return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+
+def stratified_sample(df, columns, label_col, sample, seed=SEED):
+    """
+    Returns a uniform sample of the rows of every class of df (only columns and
+    label_col), the rows of every class in df and in the sample as int arrays in
+    the sorted class order, and the classes
+    """
+    codes, classes, counts = class_codes(df[label_col])
+    present = counts > 0
+    sizes = class_sizes(sample, counts)
+    positions = stratified_positions(codes, counts, sizes, seed)
+    rows = df[list(dict.fromkeys(list(columns) + [label_col]))].take(positions)
+    classes = [c for c, p in zip(classes, present) if p]
+    return rows, counts[present], sizes[present], classes
+
+
+def sample_rows(df, sample, seed=SEED):
+    """
+    Returns a uniform sample of the rows of df (a DataFrame, Series or array) as
+    one class, with the rows it had and the rows kept
+    """
+    n = len(df)
+    size = int(class_sizes(sample, [n])[0])
+    if size >= n:
+        return df, n, n
+    positions = _distinct(n, size, np.random.default_rng(seed))
+    rows = df.take(positions) if isinstance(df, (pd.DataFrame, pd.Series)) else np.asarray(df)[positions]
+    return rows, n, size
+
+
+class StratifiedReservoir:
+    """
+    A uniform sample without replacement of at most size rows of every class of a
+    stream of DataFrame chunks, in memory that does not grow with the number of rows.
+
+    Every row gets a uniform random key and each class keeps the rows with the
+    smallest keys, which is reservoir sampling: once a class has size rows, only
+    the rows of a chunk whose key beats the largest kept key are copied.
+    -------
+    PARAMETERS:
+    columns:
+        A list of the column names to keep
+    label_col: optional, default=None
+        The name of the column holding the class labels. When None, every chunk
+        is passed to update with the label of all of its rows
+    size: optional, default=DEFAULT_SAMPLE_SIZE
+        An int of rows per class, or a float target error (see target_size)
+    seed: optional, default=SEED
+        The seed of the row keys
+    """
+
+    def __init__(self, columns, label_col=None, size=DEFAULT_SAMPLE_SIZE, seed=SEED):
+        self.columns = list(columns)
+        self.label_col = label_col
+        # a target error needs the same rows per class whatever the class size
+        # turns out to be, the correction for small classes is left to the error
+        self.size = target_size(size) if isinstance(size, float) else int(size)
+        self.population = {}
+        self._rng = np.random.default_rng(seed)
+        self._rows = {}
+        self._keys = {}
+        self._threshold = {}
+
+    def update(self, chunk, label=None):
+        """
+        Adds the rows of a pandas DataFrame chunk, all labelled label when label_col
+        is None. Only the columns and label_col of an Arrow chunk are read
+        """
+        keep = self.columns + ([self.label_col] if self.label_col is not None else [])
+        if is_arrow_source(chunk):
+            chunk = read_frame(chunk, keep)
+        if not isinstance(chunk, pd.core.frame.DataFrame):
+            raise TypeError("every chunk should be of type pandas.Dataframe")
+        keys = self._rng.random(len(chunk))
+        if self.label_col is not None:
+            codes, classes = pd.factorize(chunk[self.label_col], sort=True)
+        else:
+            if label is None:
+                raise TypeError("'label' should be given when the reservoir has no 'label_col'")
+            codes, classes = np.zeros(len(chunk), dtype=np.intp), [label]
+        for k, cls in enumerate(classes):
+            mine = codes == k
+            self.population[cls] = self.population.get(cls, 0) + int(np.count_nonzero(mine))
+            mine &= keys < self._threshold.get(cls, np.inf)
+            if not mine.any():
+                continue
+            self._rows.setdefault(cls, []).append(chunk.loc[mine, keep])
+            self._keys.setdefault(cls, []).append(keys[mine])
+            if sum(len(k) for k in self._keys[cls]) > 2 * self.size:
+                self._shrink(cls)
+        return self
+
+    def _shrink(self, cls):
+        """Keeps the size rows of cls with the smallest keys"""
+        keys = np.concatenate(self._keys[cls])
+        rows = pd.concat(self._rows[cls], ignore_index=True)
+        if len(keys) > self.size:
+            best = np.argpartition(keys, self.size - 1)[:self.size]
+            keys, rows = keys[best], rows.take(best).reset_index(drop=True)
+            # no later row with a larger key can enter the sample
+            self._threshold[cls] = keys.max()
+        self._keys[cls], self._rows[cls] = [keys], [rows]
+
+    def classes(self):
+        """Returns the classes seen, sorted when they can be"""
+        classes = list(self.population)
+        try:
+            return sorted(classes)
+        except TypeError:
+            return classes
+
+    def frame(self):
+        """
+        Returns the sampled rows of every class, the rows of every class in the
+        stream and in the sample as int arrays in the order of classes(), and classes()
+        """
+        classes = self.classes()
+        parts = []
+        for cls in classes:
+            if cls in self._rows:
+                self._shrink(cls)
+                parts.append(self._rows[cls][0])
+        keep = self.columns + ([self.label_col] if self.label_col is not None else [])
+        rows = (pd.concat(parts, ignore_index=True) if parts
+                else pd.DataFrame(columns=keep))
+        population = np.array([self.population[c] for c in classes], dtype=np.int64)
+        sampled = np.array([len(self._keys[c][0]) if c in self._keys else 0 for c in classes],
+                           dtype=np.int64)
+        return rows, population, sampled, classes
+
+
+def scale_counts(counts, n_sampled, n_population):
+    """
+    Returns histogram counts of shape (n_classes, n_columns, n_bins) of sampled
+    rows scaled to estimates for the population, and the 99% error of the bin
+    shares of every column, the largest over its classes and bins
+    """
+    n_sampled = np.asarray(n_sampled, dtype=float)[:, None, None]
+    n_population = np.asarray(n_population, dtype=float)[:, None, None]
+    if counts.size == 0:
+        return counts, np.zeros(counts.shape[1])
+    shares = counts / np.maximum(n_sampled, 1)
+    error = share_error(shares, n_sampled, n_population).max(axis=(0, 2))
+    if np.array_equal(n_sampled, n_population):
+        return counts, error
+    return counts * (n_population / np.maximum(n_sampled, 1)), error
+
+
+def sample_attrs(classes, n_population, n_sampled, error):
+    """Returns the attrs["sample"] dict of a summary, error being by variable"""
+    return {"n_population": {c: int(n) for c, n in zip(classes, n_population)},
+            "n_sampled": {c: int(n) for c, n in zip(classes, n_sampled)},
+            "error": {v: float(e) for v, e in error.items()}}
+
+
+def sample_note(attrs, variable, what):
+    """Returns the line a figure shows about the sample behind one variable"""
+    sampled = sum(attrs["n_sampled"].values())
+    population = sum(attrs["n_population"].values())
+    return (f"sample of {sampled:,} / {population:,} rows, "
+            f"{what} ±{attrs['error'][variable]:.2%} (99%)")
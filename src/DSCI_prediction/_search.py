@@ -0,0 +1,583 @@
+import hashlib
+import time
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata, t as student_t
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.exceptions import FitFailedWarning
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import (GridSearchCV, ParameterGrid, ParameterSampler,
+                                     RandomizedSearchCV, check_cv)
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from joblib import Parallel, delayed
+from sklearn.utils import _safe_indexing
+
+from ._cache import UnstableReprError, _stable_repr, _update_with_data
+from ._instrument import emit
+
+
+def search_resources(search, n_samples):
+    """
+    Returns a DataFrame with one row per iteration of a fitted search and the
+    columns iteration, resource, n_resources, n_candidates, n_eliminated and n_fits.
+    Exhaustive and randomized searches run a single iteration on all n_samples.
+    """
+    n_splits = getattr(search, "n_splits_", 1)
+    if hasattr(search, "racing_"):
+        # candidates dropped by racing skipped their remaining folds
+        return pd.DataFrame({"iteration": [0], "resource": "n_samples", "n_resources": [n_samples],
+                             "n_candidates": [len(search.racing_)],
+                             "n_eliminated": [int(search.racing_["pruned_after_fold"].notna().sum())],
+                             "n_fits": [int(search.racing_["n_folds"].sum())]})
+    if hasattr(search, "n_resources_"):
+        resource = search.resource
+        n_resources = list(search.n_resources_)
+        n_candidates = list(search.n_candidates_)
+    else:
+        resource = "n_samples"
+        n_resources = [n_samples]
+        n_candidates = [len(search.cv_results_["params"])]
+    n_eliminated = [n - nxt for n, nxt in zip(n_candidates, n_candidates[1:])] + [0]
+    return pd.DataFrame({
+        "iteration": range(len(n_candidates)),
+        "resource": resource,
+        "n_resources": n_resources,
+        "n_candidates": n_candidates,
+        "n_eliminated": n_eliminated,
+        "n_fits": [n * n_splits for n in n_candidates],
+    })
+
+
+class _VotePredictions(ClassifierMixin, BaseEstimator):
+    """
+    A stand-in classifier that answers with precomputed neighbor votes, so any
+    sklearn scorer can score a candidate without refitting or re-querying
+    """
+
+    def __init__(self, classes, votes):
+        self.classes = classes
+        self.votes = votes
+
+    @property
+    def classes_(self):
+        return self.classes
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.votes, axis=1)]
+
+    def predict_proba(self, X):
+        total = self.votes.sum(axis=1, keepdims=True)
+        total[total == 0.0] = 1.0
+        return self.votes / total
+
+
+def _knn_step(estimator):
+    """
+    Returns (prefix, step name, KNeighborsClassifier) when estimator is a
+    KNeighborsClassifier or a Pipeline ending in one, otherwise None
+    """
+    if isinstance(estimator, KNeighborsClassifier):
+        return None, None, estimator
+    if isinstance(estimator, Pipeline) and isinstance(estimator.steps[-1][1], KNeighborsClassifier):
+        name, knn = estimator.steps[-1]
+        prefix = Pipeline(estimator.steps[:-1]) if len(estimator.steps) > 1 else None
+        return prefix, name, knn
+    return None
+
+
+def knn_grid_supported(search):
+    """
+    Returns True when search is a GridSearchCV over only n_neighbors and
+    'uniform'/'distance' weights of a KNeighborsClassifier (possibly the last
+    step of a Pipeline) with a single metric, which fit_knn_grid can evaluate
+    """
+    if type(search) is not GridSearchCV or not isinstance(search.refit, bool):
+        return False
+    if not (search.scoring is None or isinstance(search.scoring, str) or callable(search.scoring)):
+        return False
+    # one-shot iterables of splits cannot be replayed by search.fit after a fallback
+    if not (search.cv is None or isinstance(search.cv, (int, np.integer)) or hasattr(search.cv, "split")):
+        return False
+    found = _knn_step(search.estimator)
+    if found is None:
+        return False
+    _, name, _ = found
+    prefix = f"{name}__" if name else ""
+    grids = search.param_grid if isinstance(search.param_grid, list) else [search.param_grid]
+    for grid in grids:
+        for key, values in grid.items():
+            if key not in (prefix + "n_neighbors", prefix + "weights"):
+                return False
+            if key.endswith("weights") and any(w not in ("uniform", "distance") for w in values):
+                return False
+    return True
+
+
+def _candidate_ks(search, prefix):
+    default = search.estimator.get_params()[prefix + "n_neighbors"]
+    return [params.get(prefix + "n_neighbors", default) for params in ParameterGrid(search.param_grid)]
+
+
+def fit_knn_grid(search, X, y, fold_cache=None, keep_oof=False):
+    """
+    Fits a GridSearchCV over KNeighborsClassifier n_neighbors and weights with one
+    neighbor query at the largest k per fold, instead of one fit and query per
+    candidate and fold. Every candidate is scored from the sorted neighbor
+    labels and distances with cumulative votes, and search is left in the same
+    fitted state as search.fit(X, y) (cv_results_, best_params_, best_score_,
+    best_estimator_, ...).
+    Returns False without touching search when the largest k does not fit in
+    every training fold, so that search.fit can report the problem itself, and
+    when a query point has neighbors tied in distance at the k-th place of a
+    candidate k: which of them a k neighbor query returns is up to its
+    algorithm, so only search.fit gives the same scores. Duplicate and
+    integer-valued rows make such ties common.
+    A scorer that fails gives search.error_score with a warning, as in search.fit.
+    The preprocessed folds of a Pipeline prefix are kept in fold_cache. With
+    keep_oof the best candidate's out-of-fold predictions are left in
+    search.oof_predictions_, taken from the same votes.
+    """
+    prefix_pipe, name, knn = _knn_step(search.estimator)
+    prefix = f"{name}__" if name else ""
+    y = np.asarray(y)
+    if y.ndim == 2 and y.shape[1] == 1:
+        y = y.ravel()
+    candidates = list(ParameterGrid(search.param_grid))
+    default_weights = knn.weights
+    ks = np.array(_candidate_ks(search, prefix))
+    weights = [params.get(prefix + "weights", default_weights) for params in candidates]
+    k_max = int(ks.max())
+    # the candidate ks below k_max, whose k-th neighbor must be strictly nearer than the next
+    inner = np.unique(ks[ks < k_max])
+    scorer = check_scoring(search.estimator, scoring=search.scoring)
+    cv = check_cv(search.cv, y, classifier=True)
+    splits = list(cv.split(X, y))
+    if k_max > min(len(train) for train, _ in splits):
+        return False
+    fold_cache = fold_cache if fold_cache is not None else FoldCache()
+    data_key = _data_key(X, y)
+
+    n_cand = len(candidates)
+    test_scores = np.empty((n_cand, len(splits)))
+    train_scores = np.empty((n_cand, len(splits)))
+    fit_times = np.empty(len(splits))
+    score_times = np.empty(len(splits))
+    predictions = oof_buffer(n_cand, y) if keep_oof else None
+    for i, (train, test) in enumerate(splits):
+        start = time.perf_counter()
+        X_tr, X_te = transformed_fold(prefix_pipe, X, y, train, test, fold_cache, data_key)
+        fold_knn = clone(knn).set_params(n_neighbors=k_max).fit(X_tr, y[train])
+        fit_times[i] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sets = [(X_te, y[test], test_scores)]
+        if search.return_train_score:
+            sets.append((X_tr, y[train], train_scores))
+        for X_eval, y_eval, scores in sets:
+            dist, ind = fold_knn.kneighbors(X_eval, n_neighbors=k_max)
+            if np.any(dist[:, inner - 1] == dist[:, inner]):
+                return False
+            codes = np.searchsorted(fold_knn.classes_, y[train])
+            votes = _cumulative_votes(codes[ind], dist, len(fold_knn.classes_), ks, weights)
+            for c in range(n_cand):
+                scores[c, i] = _score(scorer, _VotePredictions(fold_knn.classes_, votes[c]),
+                                      X_eval, y_eval, search.error_score)
+            if keep_oof and scores is test_scores:
+                for c in range(n_cand):
+                    predictions[c, test] = fold_knn.classes_[np.argmax(votes[c], axis=1)]
+        score_times[i] = (time.perf_counter() - start) / n_cand
+        # every candidate is scored from the one neighbor query of the fold
+        emit("tuned_para_table", "fit", fit_times[i], fold=i)
+        emit("tuned_para_table", "score", score_times[i] * n_cand, fold=i, candidates=n_cand)
+
+    _set_search_results(search, X, y, candidates, splits, test_scores,
+                        train_scores if search.return_train_score else None,
+                        np.broadcast_to(fit_times, test_scores.shape),
+                        np.broadcast_to(score_times, test_scores.shape), scorer, predictions)
+    return True
+
+
+def _score(scorer, estimator, X, y, error_score):
+    """Returns the score of estimator, or error_score with a warning when scoring fails, as in search.fit"""
+    try:
+        return scorer(estimator, X, y)
+    except Exception as error:
+        if error_score == "raise":
+            raise
+        warnings.warn(f"Scoring failed, the score is set to {error_score}: {error!r}")
+        return error_score
+
+
+def _param_column(candidates, key):
+    """
+    Returns the param_<key> column of cv_results_, masked where a candidate has
+    no key, of the dtype GridSearchCV gives it: the dtype numpy infers for the
+    values unless that is a string or multi-dimensional dtype, object otherwise
+    """
+    values = {c: params[key] for c, params in enumerate(candidates) if key in params}
+    try:
+        inferred = np.array(list(values.values()))
+    except ValueError:
+        dtype = np.dtype(object)
+    else:
+        dtype = inferred.dtype if inferred.dtype.kind != "U" and inferred.ndim == 1 else object
+    column = np.ma.MaskedArray(np.empty(len(candidates), dtype=dtype), mask=True)
+    for c, value in values.items():
+        column[c] = value
+    return column
+
+
+def _cumulative_votes(labels, dist, n_classes, ks, weights):
+    """
+    Returns, for every candidate, the (n_queries, n_classes) votes of its k nearest
+    neighbors taken from the first k columns of one k_max neighbor query, given
+    the class codes and distances of those neighbors
+    """
+    with np.errstate(divide="ignore"):
+        inv = 1.0 / dist
+    exact = dist == 0.0
+    # neighbors are summed in the order sklearn adds them, so the votes are the same floats
+    per_weight = {}
+    for w in set(weights):
+        cum = np.empty((n_classes,) + dist.shape)
+        for c in range(n_classes):
+            is_c = labels == c
+            if w == "uniform":
+                np.cumsum(is_c, axis=1, out=cum[c])
+            else:
+                cum[c] = np.cumsum(np.where(is_c, inv, 0.0), axis=1)
+        if w == "distance":
+            # any neighbor at distance zero outvotes all others, as in sklearn
+            exact_cum = np.stack([np.cumsum(exact & (labels == c), axis=1) for c in range(n_classes)])
+            has_exact = np.cumsum(exact, axis=1) > 0
+            cum = np.where(has_exact, exact_cum, cum)
+        per_weight[w] = cum
+    return [per_weight[w][:, :, k - 1].T for k, w in zip(ks, weights)]
+
+
+def _set_search_results(search, X, y, candidates, splits, test_scores, train_scores,
+                        fit_times, score_times, scorer, predictions=None):
+    n_splits = len(splits)
+    # folds skipped by racing have NaN times
+    results = {
+        "mean_fit_time": np.nanmean(fit_times, axis=1),
+        "std_fit_time": np.nanstd(fit_times, axis=1),
+        "mean_score_time": np.nanmean(score_times, axis=1),
+        "std_score_time": np.nanstd(score_times, axis=1),
+    }
+    for key in dict.fromkeys(k for params in candidates for k in params):
+        results[f"param_{key}"] = _param_column(candidates, key)
+    results["params"] = candidates
+    for kind, scores in (("test", test_scores), ("train", train_scores)):
+        if scores is None:
+            continue
+        for i in range(n_splits):
+            results[f"split{i}_{kind}_score"] = scores[:, i]
+        results[f"mean_{kind}_score"] = scores.mean(axis=1)
+        results[f"std_{kind}_score"] = scores.std(axis=1)
+        if kind == "test":
+            means = results["mean_test_score"]
+            # rank like GridSearchCV: ties share the smallest rank, NaN ranks last
+            filled = np.where(np.isnan(means), -np.inf, means)
+            results["rank_test_score"] = rankdata(-filled, method="min").astype(np.int32)
+
+    search.cv_results_ = results
+    search.best_index_ = int(np.argmin(results["rank_test_score"]))
+    search.best_params_ = candidates[search.best_index_]
+    search.best_score_ = results["mean_test_score"][search.best_index_]
+    search.n_splits_ = n_splits
+    search.multimetric_ = False
+    search.scorer_ = scorer
+    if predictions is not None:
+        # out-of-fold predictions of the best candidate, recorded while scoring
+        oof = predictions[search.best_index_]
+        if oof.dtype != y.dtype and not pd.isna(oof).any():
+            oof = oof.astype(y.dtype)
+        search.oof_predictions_ = oof
+    if search.refit:
+        start = time.perf_counter()
+        search.best_estimator_ = clone(search.estimator).set_params(**search.best_params_).fit(X, y)
+        search.refit_time_ = time.perf_counter() - start
+        if hasattr(search.best_estimator_, "feature_names_in_"):
+            search.feature_names_in_ = search.best_estimator_.feature_names_in_
+
+
+def oof_buffer(n_candidates, y):
+    """
+    Returns the out-of-fold predictions of every candidate, NaN until they are
+    filled: rows whose fit or predict failed stay NaN (the array is of dtype
+    object unless y is float)
+    """
+    dtype = y.dtype if y.dtype.kind == "f" else object
+    return np.full((n_candidates, len(y)), np.nan, dtype=dtype)
+
+
+def _nbytes(value):
+    if hasattr(value, "indptr"):
+        return value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+    if isinstance(value, (pd.core.frame.DataFrame, pd.core.series.Series)):
+        return int(value.memory_usage(index=False).sum())
+    return getattr(value, "nbytes", 0)
+
+
+class FoldCache:
+    """
+    A bounded in-memory cache of cross-validation folds after the invariant
+    Pipeline prefix has been fitted and applied, least recently used first out.
+
+    Pass the same FoldCache to several tuned_para_table calls to reuse the
+    preprocessed folds of identical prefixes, data and splits across searches.
+    -------
+    PARAMETERS:
+    max_bytes: optional, default=512 MiB
+        An int denoting the total size of the cached fold arrays
+    """
+
+    def __init__(self, max_bytes=512 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the cached (X_train, X_test) pair for key, or None on a miss"""
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def put(self, key, value):
+        """Stores a (X_train, X_test) pair, evicting the least recently used pairs"""
+        size = sum(_nbytes(v) for v in value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, old_size) = self._entries.popitem(last=False)
+            self.nbytes -= old_size
+
+    def clear(self):
+        """Drops every cached fold"""
+        self._entries.clear()
+        self.nbytes = 0
+
+
+def _data_key(X, y):
+    digest = hashlib.blake2b(digest_size=20)
+    _update_with_data(digest, X)
+    _update_with_data(digest, y)
+    return digest.digest()
+
+
+def transformed_fold(prefix, X, y, train, test, fold_cache, data_key):
+    """
+    Returns the train and test rows of X after fitting prefix (a Pipeline or None)
+    on the train rows, from fold_cache when the same prefix, data and fold were seen.
+    Prefixes that cannot be identified by their content are never cached
+    """
+    X_tr, X_te = _safe_indexing(X, train), _safe_indexing(X, test)
+    if prefix is None:
+        return X_tr, X_te
+    digest = hashlib.blake2b(data_key, digest_size=20)
+    try:
+        digest.update(_stable_repr(prefix).encode())
+    except UnstableReprError:
+        # e.g. a FunctionTransformer of a lambda: another prefix could get the same key
+        digest = None
+    key = None
+    if digest is not None:
+        digest.update(np.asarray(train).tobytes())
+        digest.update(np.asarray(test).tobytes())
+        key = digest.hexdigest()
+        cached = fold_cache.get(key)
+        if cached is not None:
+            return cached
+    fitted = clone(prefix)
+    pair = (fitted.fit_transform(X_tr, y[train]), fitted.transform(X_te))
+    if key is not None:
+        fold_cache.put(key, pair)
+    return pair
+
+
+def search_candidates(search):
+    """Returns the candidate parameter dicts of a GridSearchCV or RandomizedSearchCV"""
+    if type(search) is GridSearchCV:
+        return list(ParameterGrid(search.param_grid))
+    if type(search) is RandomizedSearchCV:
+        return list(ParameterSampler(search.param_distributions, search.n_iter,
+                                     random_state=search.random_state))
+    raise ValueError("shared data supports GridSearchCV and RandomizedSearchCV only")
+
+
+def candidate_loop_supported(search):
+    """
+    Returns whether fit_prefix_cached_grid can run search itself: a single metric
+    GridSearchCV or RandomizedSearchCV with a boolean refit and a plain cv
+    """
+    if type(search) not in (GridSearchCV, RandomizedSearchCV):
+        return False
+    if not isinstance(search.refit, bool):
+        return False
+    if not (search.scoring is None or isinstance(search.scoring, str) or callable(search.scoring)):
+        return False
+    return search.cv is None or isinstance(search.cv, (int, np.integer)) or hasattr(search.cv, "split")
+
+
+def invariant_prefix_length(search):
+    """
+    Returns how many leading steps of a Pipeline estimator no candidate of a
+    GridSearchCV changes, or 0 when that prefix cannot be shared between candidates
+    """
+    estimator = search.estimator
+    if type(search) is not GridSearchCV or not isinstance(estimator, Pipeline):
+        return 0
+    if not candidate_loop_supported(search):
+        return 0
+    names = [name for name, _ in estimator.steps]
+    grids = search.param_grid if isinstance(search.param_grid, list) else [search.param_grid]
+    varied = {key.split("__")[0] for grid in grids for key in grid}
+    if not varied <= set(names):
+        # pipeline level parameters such as memory or steps change everything
+        return 0
+    first = min(names.index(name) for name in varied) if varied else len(names) - 1
+    return min(first, len(names) - 1)
+
+
+def _fit_and_score_tail(tail, params, X_tr, y_tr, X_te, y_te, scorer, train_score, error_score,
+                        keep_oof=False):
+    start = time.perf_counter()
+    try:
+        fitted = clone(tail).set_params(**params).fit(X_tr, y_tr)
+    except Exception as error:
+        if error_score == "raise":
+            raise
+        warnings.warn(f"Estimator fit failed, the score is set to {error_score}: {error!r}",
+                      FitFailedWarning)
+        return error_score, error_score, time.perf_counter() - start, 0.0, None
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    # like GridSearchCV, a failing scorer or predict gives error_score rather than an error
+    try:
+        test = scorer(fitted, X_te, y_te)
+        train = scorer(fitted, X_tr, y_tr) if train_score else np.nan
+        predictions = fitted.predict(X_te) if keep_oof else None
+    except Exception as error:
+        if error_score == "raise":
+            raise
+        warnings.warn(f"Scoring failed, the score is set to {error_score}: {error!r}")
+        return error_score, error_score, fit_time, time.perf_counter() - start, None
+    return test, train, fit_time, time.perf_counter() - start, predictions
+
+
+RACING_DEFAULTS = {"alpha": 0.05, "min_folds": 3}
+
+
+def racing_losers(scores, alpha):
+    """
+    Returns a mask of the candidates, rows of scores over the folds run so far,
+    whose mean score is below the leader's at significance level alpha by a
+    one-sided paired t-test on their fold differences, Bonferroni corrected for
+    the number of candidates compared. Candidates with a failed (NaN) fold are
+    losers too
+    """
+    failed = np.isnan(scores).any(axis=1)
+    means = np.where(failed, -np.inf, scores.mean(axis=1))
+    diff = scores[np.argmax(means)] - scores
+    n = scores.shape[1]
+    level = alpha / max(len(scores) - 1, 1)
+    with np.errstate(invalid="ignore"):
+        bound = diff.mean(axis=1) - student_t.ppf(1 - level, n - 1) * diff.std(axis=1, ddof=1) / np.sqrt(n)
+    losers = failed | (bound > 0)
+    losers[np.argmax(means)] = False
+    return losers
+
+
+def fit_prefix_cached_grid(search, X, y, n_prefix, fold_cache=None, keep_oof=False, race=None):
+    """
+    Fits a GridSearchCV over a Pipeline whose first n_prefix steps are the same for
+    every candidate: the prefix is fitted and applied once per fold (the results
+    kept in fold_cache) and only the remaining steps are refitted per candidate.
+    With n_prefix 0 any search accepted by candidate_loop_supported is run as is.
+    Leaves search in the same fitted state as search.fit(X, y), plus the best
+    candidate's out-of-fold predictions in search.oof_predictions_ with keep_oof.
+    With race (a dict of alpha and min_folds) the folds are run one at a time and
+    after min_folds of them every candidate that racing_losers finds hopeless is
+    dropped: its remaining folds are not fitted, its mean score is NaN (ranked
+    last) and search.racing_ lists how far every candidate got.
+    """
+    y = np.asarray(y)
+    if y.ndim == 2 and y.shape[1] == 1:
+        y = y.ravel()
+    if n_prefix:
+        prefix = Pipeline(search.estimator.steps[:n_prefix])
+        tail = Pipeline(search.estimator.steps[n_prefix:])
+    else:
+        prefix, tail = None, search.estimator
+    candidates = search_candidates(search)
+    scorer = check_scoring(search.estimator, scoring=search.scoring)
+    splits = list(check_cv(search.cv, y, classifier=True).split(X, y))
+    fold_cache = fold_cache if fold_cache is not None else FoldCache()
+    data_key = _data_key(X, y)
+
+    shape = (len(candidates), len(splits))
+    test_scores, train_scores = np.empty(shape), np.empty(shape)
+    fit_times, score_times = np.empty(shape), np.empty(shape)
+    predictions = oof_buffer(len(candidates), y) if keep_oof else None
+    parallel = Parallel(n_jobs=search.n_jobs, pre_dispatch=search.pre_dispatch)
+    alive = np.ones(len(candidates), dtype=bool)
+    pruned_after = np.full(len(candidates), -1)
+    for i, (train, test) in enumerate(splits):
+        running = np.flatnonzero(alive)
+        start = time.perf_counter()
+        X_tr, X_te = transformed_fold(prefix, X, y, train, test, fold_cache, data_key)
+        prefix_time = time.perf_counter() - start
+        out = parallel(delayed(_fit_and_score_tail)(tail, candidates[c], X_tr, y[train], X_te,
+                                                    y[test], scorer, search.return_train_score,
+                                                    search.error_score, keep_oof)
+                       for c in running)
+        for scores in (test_scores, train_scores, fit_times, score_times):
+            scores[~alive, i] = np.nan
+        test_scores[running, i], train_scores[running, i], fit_times[running, i], \
+            score_times[running, i] = np.array([row[:4] for row in out], dtype=float).T
+        for c, row in zip(running, out):
+            if row[4] is not None:
+                predictions[c, test] = row[4]
+        emit("tuned_para_table", "prefix", prefix_time, fold=i)
+        for c in running:
+            emit("tuned_para_table", "fit", fit_times[c, i], candidate=c, fold=i, params=candidates[c])
+            emit("tuned_para_table", "score", score_times[c, i], candidate=c, fold=i,
+                 params=candidates[c])
+        fit_times[running, i] += prefix_time / len(running)
+        if race is not None and race["min_folds"] <= i + 1 < len(splits) and len(running) > 1:
+            losers = running[racing_losers(test_scores[running, :i + 1], race["alpha"])]
+            alive[losers] = False
+            pruned_after[losers] = i
+            for c in losers:
+                emit("tuned_para_table", "prune", 0.0, candidate=c, fold=i, params=candidates[c])
+
+    if race is not None:
+        evaluated = np.where(pruned_after < 0, len(splits), pruned_after + 1)
+        search.racing_ = pd.DataFrame({
+            "params": candidates,
+            "n_folds": evaluated,
+            "pruned_after_fold": pd.array(np.where(pruned_after < 0, None, pruned_after), dtype="Int64"),
+            "partial_mean_score": [np.mean(test_scores[c, :n]) for c, n in enumerate(evaluated)],
+        })
+
+    _set_search_results(search, X, y, candidates, splits, test_scores,
+                        train_scores if search.return_train_score else None,
+                        fit_times, score_times, scorer, predictions)
+    return True
@@ -0,0 +1,324 @@
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.exceptions import FitFailedWarning
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import check_cv
+
+from ._instrument import emit
+from ._search import _set_search_results, search_candidates, oof_buffer
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+SHARED_KINDS = ("shm", "memmap")
+
+
+class SharedDataset:
+    """
+    X and y converted once into contiguous numeric blocks that worker processes
+    attach to by name instead of receiving their own pickled copy.
+    Use as a context manager so the blocks are released afterwards.
+    -------
+    PARAMETERS:
+    X:
+        A numeric pandas DataFrame or numpy array
+    y:
+        A 1-D array-like of labels, stored as integer codes
+    kind: optional, default="shm"
+        "shm" for multiprocessing.shared_memory or "memmap" for a temporary
+        file that every worker maps read-only
+    """
+
+    def __init__(self, X, y, kind="shm"):
+        if kind not in SHARED_KINDS:
+            raise ValueError(f"'kind' should be one of {SHARED_KINDS}")
+        self.columns = list(X.columns) if isinstance(X, pd.core.frame.DataFrame) else None
+        dtypes = X.dtypes if isinstance(X, pd.core.frame.DataFrame) else [np.asarray(X).dtype]
+        # float32 (compact) data is shared as float32, half the size of the default
+        dtype = np.float32 if all(t == np.float32 for t in dtypes) else np.float64
+        try:
+            X = np.asarray(X, dtype=dtype)
+        except (TypeError, ValueError):
+            raise TypeError("shared data needs an all-numeric 'X_train'") from None
+        y = np.asarray(y)
+        if y.ndim == 2 and y.shape[1] == 1:
+            y = y.ravel()
+        codes, self.classes = pd.factorize(y, sort=True)
+        self.kind = kind
+        self._blocks = []
+        self.handle = {"kind": kind, "pid": os.getpid(), "columns": self.columns,
+                       "classes": np.asarray(self.classes),
+                       "X": self._share(X), "y": self._share(codes.astype(np.int64))}
+
+    def _share(self, array):
+        if self.kind == "shm":
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            return (block.name, array.shape, array.dtype.str)
+        fd, path = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+        np.save(path, array)
+        self._blocks.append(path)
+        return (path, array.shape, array.dtype.str)
+
+    def close(self):
+        """Releases the shared blocks"""
+        _detach(set())
+        for block in self._blocks:
+            if isinstance(block, str):
+                os.remove(block)
+            else:
+                block.close()
+                block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# shared memory blocks this process has attached to, by name; workers are
+# reused between tasks so they keep only the blocks of the current dataset
+_attached = {}
+
+
+_tracker_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _untracked(name):
+    """
+    Keeps the resource tracker from registering the shared memory block name while
+    a worker attaches to it; every other registration goes through as usual.
+    Before Python 3.13 (track=False), attaching registers the block with the
+    resource tracker as if the worker owned it, so the tracker unlinks it (or
+    warns about a leak) when the worker exits, and workers sharing the parent's
+    tracker would unregister the parent's own entry: CPython bpo-39959
+    """
+    from multiprocessing import resource_tracker
+
+    with _tracker_lock:
+        register = resource_tracker.register
+
+        def register_others(res_name, rtype):
+            if not (rtype == "shared_memory" and res_name.lstrip("/") == name.lstrip("/")):
+                register(res_name, rtype)
+
+        resource_tracker.register = register_others
+        try:
+            yield
+        finally:
+            resource_tracker.register = register
+
+
+def _detach(keep):
+    for name in list(_attached):
+        if name not in keep:
+            try:
+                _attached.pop(name).close()
+            except BufferError:
+                # views from a task are still alive, the mapping goes with them
+                pass
+
+
+def _attach_array(handle, ref):
+    name, shape, dtype = ref
+    if handle["kind"] == "memmap":
+        return np.load(name, mmap_mode="r")
+    if name not in _attached:
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)
+        elif os.getpid() != handle["pid"]:
+            # only the creating process may unlink the block
+            with _untracked(name):
+                block = shared_memory.SharedMemory(name=name)
+        else:
+            block = shared_memory.SharedMemory(name=name)
+        _attached[name] = block
+    return np.ndarray(shape, np.dtype(dtype), buffer=_attached[name].buf)
+
+
+def attach(handle, keep=()):
+    """
+    Returns the (X, y) views of a SharedDataset handle inside a worker, detaching
+    from every other dataset except those of the handles in keep
+    """
+    if handle["kind"] == "shm":
+        _detach({h[ref][0] for h in (handle, *keep) for ref in ("X", "y")})
+    X = _attach_array(handle, handle["X"])
+    if handle["columns"] is not None:
+        X = pd.DataFrame(X, columns=handle["columns"], copy=False)
+    y = handle["classes"][_attach_array(handle, handle["y"])]
+    return X, y
+
+
+def _reset_peak_rss():
+    """
+    Starts a new peak resident memory measurement of this process, which only
+    Linux allows (loky reuses workers, so their lifetime peak includes earlier
+    work); returns whether it did
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss(since_reset):
+    """
+    Returns the peak resident memory (bytes) of this process since _reset_peak_rss
+    when it succeeded, otherwise over the lifetime of the process
+    """
+    if since_reset:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    if resource is None:
+        return np.nan
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _fit_and_score_shared(handle, estimator, params, train, test, scorer, train_score, error_score,
+                          keep_oof=False):
+    reset = _reset_peak_rss()
+    X, y = attach(handle)
+    X_tr = X.iloc[train] if isinstance(X, pd.core.frame.DataFrame) else X[train]
+    X_te = X.iloc[test] if isinstance(X, pd.core.frame.DataFrame) else X[test]
+    # warnings of worker processes do not reach the caller, so failures are
+    # returned for fit_shared to warn about, as _fit_and_score_tail does
+    start = time.perf_counter()
+    try:
+        fitted = clone(estimator).set_params(**params).fit(X_tr, y[train])
+    except Exception as error:
+        if error_score == "raise":
+            raise
+        return (error_score, error_score, time.perf_counter() - start, 0.0,
+                os.getpid(), _peak_rss(reset), None, ("fit", repr(error)))
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    try:
+        test_score = scorer(fitted, X_te, y[test])
+        train_score = scorer(fitted, X_tr, y[train]) if train_score else np.nan
+        predictions = fitted.predict(X_te) if keep_oof else None
+    except Exception as error:
+        if error_score == "raise":
+            raise
+        return (error_score, error_score, fit_time, time.perf_counter() - start,
+                os.getpid(), _peak_rss(reset), None, ("score", repr(error)))
+    return (test_score, train_score, fit_time, time.perf_counter() - start,
+            os.getpid(), _peak_rss(reset), predictions, None)
+
+
+def fit_shared(search, X, y, kind, keep_oof=False):
+    """
+    Runs every (candidate, fold) fit of search in worker processes that attach to
+    one shared copy of X and y and receive only its handle and the fold indices.
+    With keep_oof the best candidate's out-of-fold predictions are left in
+    search.oof_predictions_.
+    Returns a DataFrame with the pid, number of tasks and peak resident memory
+    (bytes) of every worker while running them: on Linux the peak is measured
+    from the start of each task, elsewhere it is the lifetime peak of the worker
+    process, which may include earlier work of a reused worker.
+    """
+    candidates = search_candidates(search)
+    if not isinstance(search.refit, bool) or not (
+            search.scoring is None or isinstance(search.scoring, str) or callable(search.scoring)):
+        raise ValueError("shared data supports single metric searches only")
+    scorer = check_scoring(search.estimator, scoring=search.scoring)
+    y = np.asarray(y)
+    if y.ndim == 2 and y.shape[1] == 1:
+        y = y.ravel()
+    with SharedDataset(X, y, kind=kind) as shared:
+        splits = list(check_cv(search.cv, y, classifier=True).split(X, y))
+        out = Parallel(n_jobs=search.n_jobs, pre_dispatch=search.pre_dispatch)(
+            delayed(_fit_and_score_shared)(shared.handle, search.estimator, params, train, test,
+                                           scorer, search.return_train_score, search.error_score,
+                                           keep_oof)
+            for params in candidates for train, test in splits)
+    for task, row in enumerate(out):
+        c, i = divmod(task, len(splits))
+        if row[7] is not None:
+            stage, error = row[7]
+            if stage == "fit":
+                warnings.warn(f"Estimator fit failed, the score is set to {search.error_score}: "
+                              f"{error}", FitFailedWarning)
+            else:
+                warnings.warn(f"Scoring failed, the score is set to {search.error_score}: {error}")
+        for stage, seconds in (("fit", row[2]), ("score", row[3])):
+            emit("tuned_para_table", stage, seconds, candidate=c, fold=i,
+                 params=candidates[c], pid=row[4], worker_peak_rss=row[5])
+    shape = (len(candidates), len(splits))
+    test_scores, train_scores, fit_times, score_times = (
+        np.array([row[i] for row in out], dtype=float).reshape(shape) for i in range(4))
+    predictions = None
+    if keep_oof:
+        predictions = oof_buffer(len(candidates), y)
+        for task, row in enumerate(out):
+            if row[6] is not None:
+                predictions[task // len(splits), splits[task % len(splits)][1]] = row[6]
+    _set_search_results(search, X, y, candidates, splits, test_scores,
+                        train_scores if search.return_train_score else None,
+                        fit_times, score_times, scorer, predictions)
+    workers = pd.DataFrame([row[4:6] for row in out], columns=["pid", "peak_rss"])
+    return workers.groupby("pid").agg(n_tasks=("peak_rss", "size"),
+                                      peak_rss=("peak_rss", "max")).reset_index()
+
+
+def _fit_predict_shared(train_handle, test_handle, model):
+    X_train, y_train = attach(train_handle, keep=[test_handle])
+    X_test, _ = attach(test_handle, keep=[train_handle])
+    start = time.perf_counter()
+    fitted = clone(model).fit(X_train, y_train)
+    predictions = fitted.predict(X_test)
+    return predictions, time.perf_counter() - start
+
+
+def fit_predict_shared(models, X_train, y_train, X_test, y_test, n_jobs, kind):
+    """
+    Fits a clone of every model of a dict and predicts X_test in parallel workers.
+    With kind "shm" or "memmap" the workers attach to one shared copy of the
+    train and test data, with None joblib hands the data over itself.
+    Returns a dict of predictions and a dict of fit and predict times, by name.
+    """
+    names = list(models)
+    if kind is None:
+        out = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_predict)(X_train, y_train, X_test, models[name]) for name in names)
+    else:
+        with SharedDataset(X_train, y_train, kind=kind) as train, \
+                SharedDataset(X_test, y_test, kind=kind) as test:
+            out = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_predict_shared)(train.handle, test.handle, models[name])
+                for name in names)
+    return ({name: pred for name, (pred, _) in zip(names, out)},
+            {name: seconds for name, (_, seconds) in zip(names, out)})
+
+
+def _fit_predict(X_train, y_train, X_test, model):
+    y_train = np.asarray(y_train)
+    if y_train.ndim == 2 and y_train.shape[1] == 1:
+        y_train = y_train.ravel()
+    start = time.perf_counter()
+    predictions = clone(model).fit(X_train, y_train).predict(X_test)
+    return predictions, time.perf_counter() - start
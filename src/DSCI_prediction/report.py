@@ -0,0 +1,304 @@
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ._arrow import is_arrow_source, read_frame
+from ._instrument import carry_context
+from .DSCI_prediction import (hist_summary, plot_hist_overlay, boxplot_summary, boxplot_plotting,
+                              tuned_para_table, cm_summary, plot_cm)
+
+# bump when the content of a stage's outputs changes, so older objects are not reused
+REPORT_FORMAT = 1
+MANIFEST = "report.json"
+OBJECTS = ".objects"
+
+DEFAULT_MODEL = {
+    "estimator": "sklearn.neighbors.KNeighborsClassifier",
+    "params": {},
+    "param_grid": {"n_neighbors": list(range(1, 11))},
+    "scale": True,
+    "cv": 5,
+    "scoring": "accuracy",
+}
+
+
+def _file_digest(path, known):
+    """
+    Returns the content digest of a file or directory of files, reusing the digest
+    in known (from the last manifest) while their sizes and mtimes are unchanged
+    """
+    path = os.path.abspath(os.fspath(path))
+    files = ([os.path.join(root, name) for root, _, names in os.walk(path) for name in sorted(names)]
+             if os.path.isdir(path) else [path])
+    stats = [[f, os.stat(f).st_size, os.stat(f).st_mtime_ns] for f in sorted(files)]
+    if known is not None and known.get("stats") == stats:
+        return known
+    digest = hashlib.blake2b(digest_size=20)
+    for f, _, _ in stats:
+        with open(f, "rb") as stream:
+            for block in iter(lambda: stream.read(1 << 20), b""):
+                digest.update(block)
+    return {"stats": stats, "digest": digest.hexdigest()}
+
+
+def _stage_key(config):
+    text = json.dumps({"format": REPORT_FORMAT, **config}, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+
+
+def _load(path, columns):
+    if is_arrow_source(path):
+        return read_frame(path, columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def _make_search(spec, n_jobs):
+    from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    module, _, name = spec["estimator"].rpartition(".")
+    estimator = getattr(importlib.import_module(module), name)(**spec.get("params", {}))
+    grid = spec.get("param_grid", {})
+    if spec.get("scale", False):
+        estimator = make_pipeline(StandardScaler(), estimator)
+        step = estimator.steps[-1][0]
+        grid = {f"{step}__{key}": values for key, values in grid.items()}
+    if spec.get("search", "grid") == "random":
+        return RandomizedSearchCV(estimator, grid, n_iter=spec.get("n_iter", 10), cv=spec.get("cv", 5),
+                                  scoring=spec.get("scoring"), n_jobs=n_jobs,
+                                  random_state=spec.get("random_state"))
+    return GridSearchCV(estimator, grid, cv=spec.get("cv", 5), scoring=spec.get("scoring"), n_jobs=n_jobs)
+
+
+def _grid_shape(n):
+    cols = max(int(np.ceil(np.sqrt(n))), 1)
+    return max(int(np.ceil(n / cols)), 1), cols
+
+
+def _hist_stage(data, features, label, out, bins):
+    train = data["train"]
+    plot_hist_overlay(train, None, features, None, fig_no="1", bins=bins, label_col=label,
+                      ec="white")[0].savefig(os.path.join(out, "histograms.png"))
+    hist_summary(train, None, features, bins=bins, label_col=label).to_json(
+        os.path.join(out, "histograms.json"), orient="records")
+
+
+def _boxplot_stage(data, features, label, out):
+    train = data["train"]
+    rows, cols = _grid_shape(len(features))
+    boxplot_plotting(rows, cols, 5 * cols, 4 * rows, features, train, 2,
+                     label_col=label).savefig(os.path.join(out, "boxplots.png"))
+    boxplot_summary(train, features, label_col=label).reset_index().to_json(
+        os.path.join(out, "boxplots.json"), orient="records")
+
+
+def _tune_stage(data, features, label, out, spec, n_jobs):
+    train = data["train"]
+    search = _make_search(spec, n_jobs)
+    table, best, _ = tuned_para_table(search, train[features], train[label], return_fitted=True)
+    table.to_csv(os.path.join(out, "tuned_params.csv"), index=False)
+    with open(os.path.join(out, "best_model.pkl"), "wb") as f:
+        pickle.dump(best, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _cm_stage(data, features, label, out, tune_dir):
+    test = data["test"]
+    with open(os.path.join(tune_dir, "best_model.pkl"), "rb") as f:
+        best = pickle.load(f)
+    plot_cm(best, None, None, test[features], test[label], "Figure 3: Confusion matrix",
+            prefit=True).figure_.savefig(os.path.join(out, "confusion_matrix.png"))
+    cm_summary(best, None, None, test[features], test[label], prefit=True).to_csv(
+        os.path.join(out, "confusion_matrix.csv"), index=False)
+
+
+def _run_stage(objects, key, stage, *args):
+    """
+    Runs a stage into a temporary directory that becomes objects/key once complete,
+    so an interrupted run never leaves a partial object behind
+    """
+    start = time.perf_counter()
+    tmp = tempfile.mkdtemp(prefix=f".{key}.", dir=objects)
+    try:
+        stage(*args[:-1], tmp, *args[-1])
+        os.replace(tmp, os.path.join(objects, key))
+    except OSError:
+        if not os.path.isdir(os.path.join(objects, key)):
+            raise
+        # the same object was completed concurrently
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return time.perf_counter() - start
+
+
+def build_report(data, label, out_dir, features=None, model=None, test_data=None, test_size=0.25,
+                 random_state=123, bins=5, n_jobs=None, force=False):
+    """
+    Builds the full report of a dataset: histogram grid, boxplot grid, tuned
+    parameter table and confusion matrix of the best model on the test split.
+
+    Every stage is stored under out_dir/.objects by a hash of its configuration
+    and of the content of the input files, and copied into out_dir. A later run
+    only recomputes the stages whose hash changed; files whose size and
+    modification time are unchanged are not even read again. The histogram,
+    boxplot and tuning stages run in parallel, the confusion matrix after tuning.
+    -------
+    PARAMETERS:
+    data:
+        The path of a CSV, Parquet or Arrow IPC file (or Parquet directory)
+    label:
+        The name of the label column
+    out_dir:
+        The directory the report is written to
+    features: optional, default=None
+        A list of feature columns, by default every numeric column but label
+    model: optional, default=None
+        A dict with the dotted path of the "estimator" class and optionally its
+        "params", the "param_grid", "scale" (put a StandardScaler in front), "cv",
+        "scoring", and "search" ("grid" or "random", with "n_iter"). By default a
+        scaled KNeighborsClassifier over n_neighbors 1 to 10
+    test_data: optional, default=None
+        A path of test data; by default a stratified test_size split of data
+    test_size, random_state: optional, default=0.25, 123
+        The split of data when test_data is None
+    bins: optional, default=5
+        The number of histogram bins
+    n_jobs: optional, default=None
+        The n_jobs of the hyperparameter search
+    force: optional, default=False
+        Recompute every stage
+    -------
+    RETURNS:
+    A pandas.core.frame.DataFrame with the stage, key, whether it was reused
+    from an earlier run, its seconds and its files
+    -------
+    Examples
+    build_report("train.csv", "class", "report", features=["clump", "unif_size"])
+    """
+    model = DEFAULT_MODEL if model is None else model
+    out_dir = os.fspath(out_dir)
+    objects = os.path.join(out_dir, OBJECTS)
+    os.makedirs(objects, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+    known = manifest.get("inputs", {})
+    inputs = {"data": _file_digest(data, known.get("data"))}
+    if test_data is not None:
+        inputs["test_data"] = _file_digest(test_data, known.get("test_data"))
+
+    if features is None:
+        if manifest.get("features") is not None and known.get("data") == inputs["data"]:
+            features = manifest["features"]
+        else:
+            sample = _load(data, None).drop(columns=label)
+            features = list(sample.select_dtypes("number").columns)
+    features = list(features)
+    split = ({"test_data": inputs["test_data"]["digest"]} if test_data is not None
+             else {"test_size": test_size, "random_state": random_state})
+    base = {"data": inputs["data"]["digest"], "features": features, "label": label, "split": split}
+    keys = {"hist": _stage_key({"stage": "hist", "bins": bins, **base}),
+            "boxplot": _stage_key({"stage": "boxplot", **base}),
+            "tune": _stage_key({"stage": "tune", "model": model, **base})}
+    keys["cm"] = _stage_key({"stage": "cm", "tune": keys["tune"], **base})
+    stale = [stage for stage, key in keys.items()
+             if force or not os.path.isdir(os.path.join(objects, key))]
+    if force:
+        for stage in stale:
+            shutil.rmtree(os.path.join(objects, keys[stage]), ignore_errors=True)
+
+    frames = {}
+    if stale:
+        columns = features + [label]
+        if test_data is not None:
+            frames = {"train": _load(data, columns), "test": _load(test_data, columns)}
+        else:
+            from sklearn.model_selection import train_test_split
+            frame = _load(data, columns)
+            frames["train"], frames["test"] = train_test_split(
+                frame, test_size=test_size, random_state=random_state, stratify=frame[label])
+    seconds = {}
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        jobs = {"hist": (_hist_stage, frames, features, label, (bins,)),
+                "boxplot": (_boxplot_stage, frames, features, label, ()),
+                "tune": (_tune_stage, frames, features, label, (model, n_jobs))}
+        futures = {stage: pool.submit(carry_context(_run_stage), objects, keys[stage], *jobs[stage])
+                   for stage in jobs if stage in stale}
+        if "tune" in futures:
+            seconds["tune"] = futures.pop("tune").result()
+        if "cm" in stale:
+            seconds["cm"] = _run_stage(objects, keys["cm"], _cm_stage, frames, features, label,
+                                       (os.path.join(objects, keys["tune"]),))
+        for stage, future in futures.items():
+            seconds[stage] = future.result()
+
+    rows = []
+    for stage, key in keys.items():
+        source = os.path.join(objects, key)
+        files = sorted(name for name in os.listdir(source) if not name.endswith(".pkl"))
+        if manifest.get("stages", {}).get(stage, {}).get("key") != key or not all(
+                os.path.exists(os.path.join(out_dir, name)) for name in files):
+            for name in files:
+                shutil.copyfile(os.path.join(source, name), os.path.join(out_dir, name))
+        rows.append({"stage": stage, "key": key, "cached": stage not in stale,
+                     "seconds": seconds.get(stage, 0.0), "files": files})
+    manifest = {"inputs": inputs, "features": features,
+                "stages": {row["stage"]: {"key": row["key"], "files": row["files"]} for row in rows}}
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return pd.DataFrame(rows, columns=["stage", "key", "cached", "seconds", "files"])
+
+
+def main(argv=None):
+    """The dsci_report console entry point"""
+    parser = argparse.ArgumentParser(
+        prog="dsci_report",
+        description="Build the histogram, boxplot, tuned parameter and confusion matrix report "
+                    "of a dataset, recomputing only what changed since the last run.")
+    parser.add_argument("data", help="CSV, Parquet or Arrow IPC file, or Parquet directory")
+    parser.add_argument("--label", required=True, help="name of the label column")
+    parser.add_argument("--features", nargs="+", help="feature columns (default: every numeric column)")
+    parser.add_argument("--model", help="model and grid spec, as a JSON string or the path of a JSON file")
+    parser.add_argument("--test-data", help="test data (default: a split of DATA)")
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--random-state", type=int, default=123)
+    parser.add_argument("--bins", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--out", default="report", help="output directory (default: report)")
+    parser.add_argument("--force", action="store_true", help="recompute every stage")
+    args = parser.parse_args(argv)
+
+    model = None
+    if args.model is not None:
+        if os.path.exists(args.model):
+            with open(args.model) as f:
+                model = json.load(f)
+        else:
+            model = json.loads(args.model)
+    done = build_report(args.data, args.label, args.out, features=args.features, model=model,
+                        test_data=args.test_data, test_size=args.test_size,
+                        random_state=args.random_state, bins=args.bins, n_jobs=args.n_jobs,
+                        force=args.force)
+    for row in done.itertuples():
+        state = "reused" if row.cached else f"built in {row.seconds:.1f}s"
+        print(f"{row.stage:8} {row.key[:12]}  {state:18} {', '.join(row.files)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
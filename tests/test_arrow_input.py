@@ -0,0 +1,81 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import GridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction._arrow import is_arrow_source, read_frame
+from src.DSCI_prediction.DSCI_prediction import (boxplot_summary, hist_summary, cm_summary,
+                                                 tuned_para_table, HistogramAccumulator)
+
+rng = np.random.default_rng(18)
+wide = pd.DataFrame(rng.normal(size=(300, 40)), columns=[f"x{i}" for i in range(40)])
+wide["class"] = rng.choice(["benign", "malignant"], 300)
+
+
+def test_plain_strings_are_not_sources(tmp_path):
+    """
+    Test that only Arrow objects and Parquet/Arrow paths count as Arrow sources
+    """
+    assert not is_arrow_source("wrong input")
+    assert not is_arrow_source(wide)
+    assert is_arrow_source(tmp_path / "train.parquet")
+    assert not is_arrow_source(tmp_path)
+    (tmp_path / "part-0.parquet").touch()
+    assert is_arrow_source(str(tmp_path))
+
+
+def test_missing_pyarrow_is_reported(monkeypatch):
+    """
+    Check ImportError with an install hint when pyarrow is missing
+    """
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        boxplot_summary("train.parquet", ["x0"])
+
+
+def test_projected_reads_match_frames(tmp_path):
+    """
+    Test that Parquet, Arrow IPC, Table and dataset inputs read only the referenced
+    columns and give the same results as the DataFrame
+    """
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(wide, preserve_index=False)
+    pq.write_table(table, tmp_path / "train.parquet")
+    with pa.OSFile(str(tmp_path / "train.arrow"), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    sources = [tmp_path / "train.parquet", str(tmp_path / "train.arrow"), table,
+               ds.dataset(tmp_path / "train.parquet")]
+    expected_box = boxplot_summary(wide, ["x3", "x7"])
+    expected_hist = hist_summary(wide, None, ["x1"], label_col="class")
+    for source in sources:
+        assert list(read_frame(source, ["x3", "class", "x3"]).columns) == ["x3", "class"]
+        pd.testing.assert_frame_equal(boxplot_summary(source, ["x3", "x7"]), expected_box,
+                                      check_index_type=False)
+        pd.testing.assert_frame_equal(hist_summary(source, None, ["x1"], label_col="class"),
+                                      expected_hist)
+    acc = HistogramAccumulator(["x1"], label_col="class").update(table)
+    assert acc.table()["count"].sum() == len(wide)
+
+
+def test_models_read_arrow_with_label_column(tmp_path):
+    """
+    Test that the evaluation functions accept an Arrow X with y naming its label column
+    """
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    pq.write_table(pa.Table.from_pandas(wide[:200], preserve_index=False), tmp_path / "train.parquet")
+    pq.write_table(pa.Table.from_pandas(wide[200:], preserve_index=False), tmp_path / "test.parquet")
+    search = GridSearchCV(KNeighborsClassifier(), {'n_neighbors': [3, 5]}, cv=3)
+    table = tuned_para_table(search, tmp_path / "train.parquet", "class")
+    expected = tuned_para_table(GridSearchCV(KNeighborsClassifier(), {'n_neighbors': [3, 5]}, cv=3),
+                                wide[:200].drop(columns="class"), wide[:200]["class"])
+    pd.testing.assert_frame_equal(table, expected)
+    cm = cm_summary(DecisionTreeClassifier(random_state=0), tmp_path / "train.parquet", "class",
+                    tmp_path / "test.parquet", "class")
+    assert cm["count"].sum() == 100
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.model_selection import GridSearchCV
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction import _aio
+from src.DSCI_prediction.DSCI_prediction import (aplot_cm, atuned_para_table, instrument, plot_cm,
+                                                 set_executor, tuned_para_table)
+
+rng = np.random.default_rng(22)
+X_train = pd.DataFrame(rng.normal(size=(300, 3)), columns=['x1', 'x2', 'x3'])
+y_train = pd.Series((X_train['x1'] + rng.normal(size=300) > 0).astype(int), name="class")
+
+
+def make_search():
+    return GridSearchCV(DecisionTreeClassifier(random_state=0), {'max_depth': [1, 2, 3, 4]}, cv=3)
+
+
+def test_atuned_para_table_matches_and_dedups():
+    """
+    Test that concurrent identical calls share one fit, match the sync result and fit every caller's search
+    """
+    expected = tuned_para_table(make_search(), X_train, y_train)
+    searches = [make_search() for _ in range(3)]
+
+    async def main():
+        return await asyncio.gather(*(atuned_para_table(s, X_train, y_train) for s in searches))
+
+    with instrument() as rec:
+        tables = asyncio.run(main())
+    assert sum(r["stage"] == "table" for r in rec.records) == 1
+    for table, search in zip(tables, searches):
+        pd.testing.assert_frame_equal(table, expected)
+        assert search.best_params_ == expected.drop(columns="best_score").iloc[0].to_dict()
+
+
+def test_timeout_and_cancellation_of_queued_work():
+    """
+    Test that a caller times out while its work is queued, and that the queued work is then cancelled
+    """
+    release = threading.Event()
+    previous = set_executor(ThreadPoolExecutor(max_workers=1))
+    try:
+        blocker = _aio.get_executor().submit(release.wait)
+
+        async def main():
+            with pytest.raises(asyncio.TimeoutError):
+                await aplot_cm(DecisionTreeClassifier(), X_train, y_train, X_train, y_train, "cm",
+                               timeout=0.1)
+            return dict(_aio._inflight)
+
+        assert asyncio.run(main()) == {}
+        release.set()
+        blocker.result()
+        assert _aio.get_executor().submit(lambda: 1).result() == 1
+    finally:
+        release.set()
+        set_executor(previous)
+
+
+def test_event_loop_stays_responsive():
+    """
+    Test that other coroutines keep running while a search is fitted
+    """
+    search = GridSearchCV(DecisionTreeClassifier(random_state=0), {'max_depth': range(1, 30)}, cv=5)
+
+    async def main():
+        gaps, done = [], asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.005)
+                gaps.append(time.perf_counter() - last)
+                last = time.perf_counter()
+
+        tick = asyncio.create_task(ticker())
+        await atuned_para_table(search, X_train, y_train)
+        done.set()
+        await tick
+        return gaps
+
+    gaps = asyncio.run(main())
+    assert len(gaps) > 5 and max(gaps) < 0.5
+
+
+def test_concurrent_fits_of_one_model_stay_apart():
+    """
+    Test that concurrent calls with one model object and other data each fit their own clone,
+    and that callers sharing a fit all get a fitted model
+    """
+    model = DecisionTreeClassifier(random_state=0)
+    halves = [(X_train[:150], y_train[:150]), (X_train[150:], y_train[150:])]
+    expected = [plot_cm(DecisionTreeClassifier(random_state=0), X, y, X_train, y_train, "Fig")
+                for X, y in halves]
+
+    async def main():
+        return await asyncio.gather(*(aplot_cm(model, X, y, X_train, y_train, "Fig") for X, y in halves))
+
+    for disp, want in zip(asyncio.run(main()), expected):
+        assert np.array_equal(disp.confusion_matrix, want.confusion_matrix)
+    assert hasattr(model, "tree_")
+
+    models = [DecisionTreeClassifier(random_state=0) for _ in range(2)]
+
+    async def shared():
+        return await asyncio.gather(*(aplot_cm(m, X_train, y_train, X_train, y_train, "Fig")
+                                      for m in models))
+
+    asyncio.run(shared())
+    assert all(np.array_equal(m.predict(X_train), y_train) for m in models)
@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.benchmarks import TunedParaTable
+from benchmarks.run import PROFILES, _combinations, compare, save
+
+results = pd.DataFrame({"benchmark": ["A.time_f", "A.time_f", "A.time_f", "A.peakmem_f", "B.time_g"],
+                        "params": ["n=1", "n=2", "n=3", "n=1", "n=1"],
+                        "kind": ["time", "time", "time", "peakmem", "time"],
+                        "value": [2.0, 0.5, 0.003, 3e6, 1.0]})
+baseline = {"results": [{"benchmark": "A.time_f", "params": "n=1", "value": 1.0},
+                        {"benchmark": "A.time_f", "params": "n=2", "value": 1.0},
+                        {"benchmark": "A.time_f", "params": "n=3", "value": 0.001},
+                        {"benchmark": "A.peakmem_f", "params": "n=1", "value": 1e6}]}
+
+
+def test_compare_statuses():
+    """
+    Test that changes beyond the threshold are flagged and changes within the timing noise are not
+    """
+    table = compare(results, baseline, threshold=0.2, noise=0.01)
+    assert list(table["status"]) == ["slower", "faster", "same", "larger", "new"]
+    assert table["ratio"].iloc[0] == 2.0
+
+
+def test_profiles_limit_params():
+    """
+    Test that a profile drops the parameter values above its limits
+    """
+    combos = _combinations(TunedParaTable, PROFILES["quick"])
+    assert combos and all(rows <= 10000 and grid <= 20 for rows, _, grid in combos)
+    assert len(_combinations(TunedParaTable, PROFILES["full"])) == 3 * 2 * 3
+
+
+def test_save_writes_strict_json(tmp_path):
+    """
+    Test that missing values are saved as null, which every JSON parser reads
+    """
+    path = tmp_path / "baseline.json"
+    save(results.assign(median=[1.0, np.nan, 2.0, np.nan, 3.0]), path, "quick")
+    saved = json.loads(path.read_text(), parse_constant=lambda name: pytest.fail(name))
+    assert [row["median"] for row in saved["results"]] == [1.0, None, 2.0, None, 3.0]
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import cbook
+from src.DSCI_prediction.DSCI_prediction import boxplot_summary, boxplot_plotting
+
+rng = np.random.default_rng(0)
+df = pd.DataFrame({"age": rng.normal(50, 10, 300),
+                   "size": rng.standard_t(2, 300),
+                   "label": rng.choice(["benign", "malignant", "other"], 300)})
+
+
+def test_summary_matches_matplotlib_stats():
+    """
+    Test that quartiles, whiskers and outliers match matplotlib.cbook.boxplot_stats
+    for every variable and class
+    """
+    table = boxplot_summary(df, ["age", "size"], label_col="label")
+    assert list(table.columns) == ["n", "q1", "med", "q3", "whislo", "whishi", "fliers"]
+    assert len(table) == 6
+    for (var, label), row in table.iterrows():
+        expected = cbook.boxplot_stats(df.loc[df["label"] == label, var].to_numpy())[0]
+        assert row.n == (df["label"] == label).sum()
+        for key in ["q1", "med", "q3", "whislo", "whishi"]:
+            assert np.isclose(row[key], expected[key])
+        assert np.array_equal(np.sort(row.fliers), np.sort(expected["fliers"]))
+
+
+def test_plot_custom_label_column():
+    """
+    Test that the boxplots are drawn from a label column other than 'class'
+    """
+    fig = boxplot_plotting(1, 2, 10, 5, ["age", "size"], df, 2, label_col="label")
+    ax = fig.axes[1]
+    assert ax.get_xlabel() == "label"
+    assert [t.get_text() for t in ax.get_xticklabels()] == ["benign", "malignant", "other"]
+    assert ax.get_title() == "Figure 2.1: Boxplot of size for each target class label"
+
+
+def test_summary_wrong_input():
+    """
+    Check errors raised for a non DataFrame input or a missing label column
+    """
+    with pytest.raises(TypeError):
+        boxplot_summary([1, 2, 3], ["age"])
+    with pytest.raises(ValueError):
+        boxplot_summary(df, ["age"], label_col="class")
+
+
+def test_streaming_summary_within_error_bounds():
+    """
+    Test that a summary streamed from chunks is within the documented rank error of the
+    exact one, with exact outliers when there are fewer than max_fliers of them
+    """
+    big = pd.DataFrame({"age": rng.normal(size=60_000),
+                        "label": rng.choice(["a", "b"], 60_000)})
+    big.loc[:4, "age"] = [50, 60, -70, 80, 90]
+    exact = boxplot_summary(big, ["age"], label_col="label")
+    chunks = (big.iloc[i:i + 7_000] for i in range(0, len(big), 7_000))
+    approx = boxplot_summary(chunks, ["age"], label_col="label", max_fliers=500)
+    eps = approx.attrs["rank_error"]
+    for key, row in approx.iterrows():
+        values = np.sort(big.loc[big["label"] == key[1], "age"].to_numpy())
+        assert row.n == exact.loc[key, "n"]
+        for q, col in [(0.25, "q1"), (0.5, "med"), (0.75, "q3")]:
+            rank = np.searchsorted(values, row[col]) / values.size
+            assert abs(rank - q) <= eps
+        # outliers and whiskers are exact with respect to the approximate fences
+        iqr = row.q3 - row.q1
+        inside = (values >= row.q1 - 1.5 * iqr) & (values <= row.q3 + 1.5 * iqr)
+        assert np.array_equal(np.sort(row.fliers), values[~inside])
+        assert row.whislo == values[inside].min()
+        assert row.whishi == values[inside].max()
+
+
+def test_plot_streaming_chunks():
+    """
+    Test that boxplot_plotting renders the same grid from an iterator of chunks
+    """
+    fig = boxplot_plotting(1, 2, 10, 5, ["age", "size"], iter([df[:100], df[100:]]), 2,
+                           label_col="label")
+    assert [t.get_text() for t in fig.axes[0].get_xticklabels()] == ["benign", "malignant", "other"]
+    with pytest.raises(TypeError):
+        boxplot_plotting(1, 2, 10, 5, ["age", "size"], iter(["not a frame"]), 2)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import GridSearchCV
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction.DSCI_prediction import (compact_frame, hist_summary, boxplot_summary,
+                                                 cm_summary, tuned_para_table)
+
+rng = np.random.default_rng(24)
+n = 2000
+train_df = pd.DataFrame({'size': rng.normal(size=n), 'count': rng.integers(0, 50, n).astype(float),
+                         'cells': rng.integers(0, 100, n),
+                         'class': rng.choice(["benign", "malignant"], n)})
+
+
+def test_compact_frame_dtypes_and_tolerance():
+    """
+    Test that compact_frame narrows what it can without moving values past rtol
+    """
+    compact = compact_frame(train_df, label_col="class")
+    assert compact["count"].dtype == np.float32
+    assert compact["cells"].dtype == np.int8
+    assert isinstance(compact["class"].dtype, pd.CategoricalDtype)
+    # float32 rounds normal draws by about 6e-8 relative: within 1e-6, not within 1e-9
+    assert compact["size"].dtype == np.float32
+    assert compact_frame(train_df, rtol=1e-9)["size"].dtype == np.float64
+    assert compact_frame(train_df, rtol=0.0)["count"].dtype == np.float32
+    assert np.array_equal(compact["count"], train_df["count"])
+    sizes = compact.attrs["compact"]
+    assert sizes["bytes_after"] < sizes["bytes_before"]
+    # the input frame is left as it was
+    assert train_df["count"].dtype == np.float64 and train_df["class"].dtype != "category"
+
+
+def test_compact_summaries_match():
+    """
+    Test that the summaries of the compact copies equal those of the float64 data
+    """
+    for compact in (True, 1e-3):
+        hist = hist_summary(train_df, None, ['size', 'count'], label_col="class", bins=9,
+                            compact=compact)
+        full = hist_summary(train_df, None, ['size', 'count'], label_col="class", bins=9)
+        assert np.allclose(hist[["left", "right"]], full[["left", "right"]], rtol=1e-4)
+        assert np.abs(hist["count"] - full["count"]).sum() <= 2
+    box = boxplot_summary(train_df, ['size', 'count'], compact=1e-4)
+    full = boxplot_summary(train_df, ['size', 'count'])
+    numeric = full.select_dtypes("number").columns
+    assert np.allclose(box[numeric].astype(float), full[numeric].astype(float), rtol=1e-4, atol=1e-6)
+    # an int tolerance is accepted: 0 only narrows columns float32 holds exactly
+    exact = hist_summary(train_df, None, ['count'], label_col="class", bins=9, compact=0)
+    pd.testing.assert_frame_equal(exact, hist_summary(train_df, None, ['count'], label_col="class", bins=9))
+    with pytest.raises(TypeError):
+        boxplot_summary(train_df, ['size'], compact="yes")
+
+
+def test_compact_fit_tables_match():
+    """
+    Test that the confusion counts and the tuning table are those of the float64 data
+    """
+    X, y = train_df[['count', 'cells']], train_df['class']
+    cm = cm_summary(DecisionTreeClassifier(random_state=0), X[:1500], y[:1500], X[1500:], y[1500:],
+                    compact=True)
+    full = cm_summary(DecisionTreeClassifier(random_state=0), X[:1500], y[:1500], X[1500:], y[1500:])
+    pd.testing.assert_frame_equal(cm, full)
+
+    def make_search():
+        return GridSearchCV(DecisionTreeClassifier(random_state=0), {'max_depth': [1, 2, 4]}, cv=3)
+
+    table = tuned_para_table(make_search(), X, y, compact=True)
+    pd.testing.assert_frame_equal(table, tuned_para_table(make_search(), X, y))
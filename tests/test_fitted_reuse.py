@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (GridSearchCV, HalvingGridSearchCV, KFold, RandomizedSearchCV,
+                                     cross_val_predict)
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction.DSCI_prediction import tuned_para_table, plot_cm, SearchCache
+
+rng = np.random.default_rng(13)
+X = pd.DataFrame({'x1': rng.normal(size=240), 'x2': rng.normal(size=240)}, index=np.arange(240) + 1000)
+y = pd.Series(np.where(X['x1'] + rng.normal(size=240) > 0, "malignant", "benign"),
+              index=X.index, name="class")
+X_train, X_test, y_train, y_test = X[:180], X[180:], y[:180], y[180:]
+
+
+def expected_oof(search):
+    best = search.estimator.set_params(**search.best_params_)
+    return cross_val_predict(best, X_train, y_train, cv=search.cv)
+
+
+@pytest.mark.parametrize("make_search", [
+    lambda: GridSearchCV(KNeighborsClassifier(), {'n_neighbors': [1, 5, 9]}, cv=4),
+    lambda: GridSearchCV(make_pipeline(StandardScaler(), DecisionTreeClassifier(random_state=0)),
+                         {'decisiontreeclassifier__max_depth': [1, 3]}, cv=4),
+    lambda: RandomizedSearchCV(DecisionTreeClassifier(random_state=0), {'max_depth': [1, 2, 3, 4]},
+                               n_iter=3, cv=4, random_state=0),
+])
+def test_out_of_fold_predictions_without_extra_fits(make_search):
+    """
+    Test that the out-of-fold predictions of every search path match cross_val_predict
+    of the best candidate
+    """
+    search = make_search()
+    table, best, oof = tuned_para_table(search, X_train, y_train, return_fitted=True)
+    assert best is search.best_estimator_
+    assert oof.index.equals(X_train.index) and oof.name == "class"
+    assert np.array_equal(oof.to_numpy(), expected_oof(make_search().fit(X_train, y_train)))
+    assert list(table.columns)[-1] == "best_score"
+
+
+def test_plot_cm_reuses_fitted_model(monkeypatch):
+    """
+    Test that plot_cm neither fits a prefit model nor anything with precomputed predictions
+    """
+    search = GridSearchCV(KNeighborsClassifier(), {'n_neighbors': [1, 5, 9]}, cv=4)
+    _, best, oof = tuned_para_table(search, X_train, y_train, return_fitted=True)
+    monkeypatch.setattr(KNeighborsClassifier, "fit", lambda *args: pytest.fail("refitted"))
+    disp = plot_cm(best, None, None, X_test, y_test, "Fig", prefit=True)
+    assert disp.confusion_matrix.sum() == len(y_test)
+    disp = plot_cm(None, None, None, None, y_train, "Out-of-fold", y_pred=oof)
+    assert np.trace(disp.confusion_matrix) == (oof == y_train).sum()
+    assert list(disp.display_labels) == ["benign", "malignant"]
+
+
+def test_return_fitted_with_cache_and_halving(tmp_path):
+    """
+    Test that cached entries hold the out-of-fold predictions and that halving searches
+    still get them
+    """
+    cache = SearchCache(tmp_path)
+    make = lambda: GridSearchCV(KNeighborsClassifier(), {'n_neighbors': [1, 5]}, cv=3)
+    first = tuned_para_table(make(), X_train, y_train, cache=cache, return_fitted=True)
+    second = tuned_para_table(make(), X_train, y_train, cache=cache, return_fitted=True)
+    pd.testing.assert_series_equal(first[2], second[2])
+    halving = HalvingGridSearchCV(KNeighborsClassifier(), {'n_neighbors': [1, 5, 9]}, cv=3, random_state=0)
+    _, _, oof = tuned_para_table(halving, X_train, y_train, return_fitted=True)
+    assert len(oof) == len(X_train)
+    with pytest.raises(ValueError):
+        tuned_para_table(GridSearchCV(KNeighborsClassifier(), {'n_neighbors': [1]}, refit=False),
+                         X_train, y_train, return_fitted=True)
+
+
+class Majority(ClassifierMixin, BaseEstimator):
+    """Predicts the most frequent class, failing to fit, or to predict the first row, on request"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+
+    def fit(self, X, y):
+        if self.fail == "fit":
+            raise ValueError("fit failed")
+        self.classes_, counts = np.unique(y, return_counts=True)
+        self.majority_ = self.classes_[np.argmax(counts)]
+        return self
+
+    def predict(self, X):
+        if self.fail == "predict" and X.index[0] == X_train.index[0]:
+            raise ValueError("predict failed")
+        return np.full(len(X), self.majority_)
+
+
+def test_failed_predict_gives_error_score_and_missing_predictions():
+    """
+    Test that failing predictions score error_score as in GridSearchCV.fit, and that the rows
+    a failed candidate could not predict are NaN in its out-of-fold predictions
+    """
+    def make_search(error_score):
+        return GridSearchCV(Majority(), {'fail': [None, "predict"]}, cv=KFold(4),
+                            error_score=error_score)
+
+    search = make_search(1.0)
+    with pytest.warns(UserWarning, match="Scoring failed"):
+        table, _, oof = tuned_para_table(search, X_train, y_train, return_fitted=True)
+    with pytest.warns(UserWarning, match="Scoring failed"):
+        expected = make_search(1.0).fit(X_train, y_train)
+    assert np.array_equal(search.cv_results_["mean_test_score"], expected.cv_results_["mean_test_score"])
+    # the failed fold scores 1.0, so the candidate failing to predict it wins
+    assert table.loc["Value", "fail"] == "predict"
+    assert oof.iloc[:45].isna().all() and oof.iloc[45:].notna().all()
+    with pytest.raises(ValueError, match="predict failed"):
+        tuned_para_table(make_search("raise"), X_train, y_train, return_fitted=True)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.DSCI_prediction.DSCI_prediction import (HistogramAccumulator, hist_summary,
+                                                 plot_hist_overlay)
+
+rng = np.random.default_rng(17)
+train_df = pd.DataFrame({'size': rng.normal(size=3000), 'shape': rng.exponential(size=3000) * 50,
+                         'class': rng.choice(["benign", "malignant"], 3000)})
+
+
+def check_exact(table, df):
+    """Every bin holds exactly the rows of its class in [left, right)"""
+    for (variable, label), rows in table.groupby(["variable", "label"]):
+        values = df.loc[df["class"] == label, variable].to_numpy()
+        edges = np.r_[rows["left"], rows["right"].iloc[-1]]
+        expected, _ = np.histogram(values, bins=edges)
+        assert np.array_equal(rows["count"], expected)
+        assert rows["count"].sum() == len(values)
+        assert len(rows) <= 20
+
+
+def test_chunked_and_merged_accumulators_are_exact():
+    """
+    Test that updating chunk by chunk and merging partial accumulators in any order
+    give the same exact histograms, whatever range each part saw
+    """
+    whole = HistogramAccumulator(['size', 'shape'], label_col="class", bins=20)
+    parts = []
+    # sorted chunks make every part see a different range
+    ordered = train_df.sort_values("shape")
+    for start in range(0, 3000, 500):
+        chunk = ordered.iloc[start:start + 500]
+        whole.update(chunk)
+        parts.append(HistogramAccumulator(['size', 'shape'], label_col="class").update(chunk))
+    check_exact(whole.table(), train_df)
+    merged = parts[5].merge(parts[0])
+    for part in parts[1:5]:
+        merged.merge(part)
+    pd.testing.assert_frame_equal(merged.table(), whole.table())
+
+
+def test_fixed_edges_and_df_model():
+    """
+    Test fixed edges with one label per chunk, as df0 and df1 of plot_hist_overlay
+    """
+    edges = [-3, -1, 0, 1, 3]
+    acc = HistogramAccumulator(['size'], bins=edges)
+    benign, malignant = train_df[train_df["class"] == "benign"], train_df[train_df["class"] != "benign"]
+    acc.update(benign, label=0).update(malignant, label=1)
+    summary = hist_summary(benign, malignant, ['size'], bins=edges)
+    pd.testing.assert_frame_equal(acc.table(), summary, check_dtype=False)
+    with pytest.raises(ValueError):
+        acc.merge(HistogramAccumulator(['size'], bins=10))
+    with pytest.raises(TypeError):
+        acc.update(benign)
+
+
+def test_serialization_and_rendering():
+    """
+    Test the JSON round trip and that plot_hist_overlay renders from an accumulator
+    """
+    acc = HistogramAccumulator(['size', 'shape'], label_col="class").update(train_df)
+    restored = HistogramAccumulator.from_json(acc.to_json())
+    pd.testing.assert_frame_equal(restored.table(), acc.table())
+    restored.update(train_df)
+    assert restored.table()["count"].sum() == 2 * acc.table()["count"].sum()
+    fig, ax = plot_hist_overlay(acc, None, ['shape'], labels=["0 - benign", "1 - malignant"], fig_no="5")
+    assert ax.get_title() == "Figure 5.1: Histogram of Shape for each target class label"
+    assert [t.get_text() for t in ax.get_legend().get_texts()] == ["0 - benign", "1 - malignant"]
+    empty = HistogramAccumulator(['size'], label_col="class")
+    assert empty.table().empty
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.DSCI_prediction._histogram import histogram_counts
+from src.DSCI_prediction.DSCI_prediction import plot_hist_overlay
+
+rng = np.random.default_rng(123)
+values = np.column_stack([rng.normal(size=500), rng.exponential(size=500),
+                          np.full(500, 3.0)])
+codes = rng.integers(0, 2, size=500)
+
+
+def test_counts_match_numpy_histogram():
+    """
+    Test that every column and class is binned on the shared edges exactly like np.histogram
+    """
+    counts, edges = histogram_counts(values, codes, 2, bins=7)
+    assert counts.shape == (2, 3, 7)
+    assert edges.shape == (3, 8)
+    for j in range(values.shape[1]):
+        for k in range(2):
+            expected, _ = np.histogram(values[codes == k, j], bins=edges[j])
+            assert np.array_equal(counts[k, j], expected)
+    # constant columns get a unit-wide range, like np.histogram
+    assert edges[2, 0] == 2.5 and edges[2, -1] == 3.5
+
+
+def test_counts_explicit_edges_and_missing_values():
+    """
+    Test binning on explicit edges, dropping NaN and out-of-range values
+    """
+    vals = np.array([[0.0], [0.5], [1.0], [2.0], [np.nan], [5.0]])
+    counts, edges = histogram_counts(vals, np.zeros(6, dtype=int), 1, bins=[0, 1, 2])
+    assert np.array_equal(counts[0, 0], [2, 2])
+    assert np.array_equal(edges[0], [0, 1, 2])
+
+
+def test_incorrect_bins():
+    """
+    Check ValueError raised when bins is neither a positive int nor increasing edges
+    """
+    with pytest.raises(ValueError):
+        histogram_counts(values, codes, 2, bins=0)
+    with pytest.raises(ValueError):
+        histogram_counts(values, codes, 2, bins=[2, 1])
+
+
+def test_plot_shares_bin_edges():
+    """
+    Test that both labels are drawn on the same bin edges
+    """
+    df0 = pd.DataFrame({"x1": np.linspace(2, 10, 20)})
+    df1 = pd.DataFrame({"x1": np.linspace(4, 10, 20)})
+    fig, ax = plot_hist_overlay(df0, df1, ["x1"], labels=["0", "1"], bins=4)
+    first, second = ax.patches[-2:]
+    assert np.array_equal(first.get_data().edges, second.get_data().edges)
+    assert np.array_equal(first.get_data().edges, [2, 4, 6, 8, 10])
+    assert first.get_data().values.sum() == 20
+
+
+def test_plot_label_column_multiclass():
+    """
+    Test label column mode bins every class of a single frame, including more than two classes
+    """
+    df = pd.DataFrame({"x1": np.arange(30, dtype=float),
+                       "x2": np.arange(30) % 7,
+                       "class": np.repeat(["a", "b", "c"], 10)})
+    fig, ax = plot_hist_overlay(df, None, ["x1", "x2"], labels=None, label_col="class", bins=3)
+    texts = [t.get_text() for t in ax.get_legend().get_texts()]
+    assert texts == ["a", "b", "c"]
+    steps = ax.patches[-3:]
+    assert [p.get_data().values.sum() for p in steps] == [10, 10, 10]
+    expected, _ = np.histogram(df.loc[df["class"] == "b", "x2"], bins=steps[1].get_data().edges)
+    assert np.array_equal(steps[1].get_data().values, expected)
+
+
+def test_plot_label_column_wrong_input():
+    """
+    Check TypeError raised when label column mode is given a second frame or a non DataFrame
+    """
+    df = pd.DataFrame({"x1": [1.0, 2.0], "class": [0, 1]})
+    with pytest.raises(TypeError):
+        plot_hist_overlay(df, df, ["x1"], labels=None, label_col="class")
+    with pytest.raises(TypeError):
+        plot_hist_overlay(df.to_numpy(), None, ["x1"], labels=None, label_col="class")
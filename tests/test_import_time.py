@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+MODULE = "src.DSCI_prediction.DSCI_prediction"
+# cold import budget in seconds; numpy and pandas take most of it
+IMPORT_BUDGET = float(os.environ.get("DSCI_IMPORT_BUDGET", "1.5"))
+HEAVY = ("matplotlib", "sklearn", "scipy", "seaborn", "joblib", "argparse")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_module(code=""):
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {MODULE}; {code}"],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def cumulative_seconds(stderr, module):
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    raise AssertionError(f"{module} not found in the -X importtime output")
+
+
+def test_import_skips_heavy_dependencies():
+    """
+    Test that importing the package loads neither matplotlib nor sklearn nor the other
+    heavy dependencies
+    """
+    out = import_module("import sys; print(sorted(m for m in " + repr(HEAVY) + " if m in sys.modules))")
+    assert out.stdout.strip() == "[]"
+
+
+def test_import_time_within_budget():
+    """
+    Test that a cold import stays under the budget (override with DSCI_IMPORT_BUDGET)
+    """
+    # the best of a few runs, to leave out a busy machine
+    seconds = min(cumulative_seconds(import_module().stderr, MODULE) for _ in range(3))
+    assert seconds < IMPORT_BUDGET, f"importing {MODULE} took {seconds:.2f}s"
+
+
+def test_lazy_names_still_available():
+    """
+    Test that FoldCache is still importable from the module
+    """
+    out = import_module(f"from {MODULE} import FoldCache; print(FoldCache.__module__)")
+    assert out.stdout.strip() == "src.DSCI_prediction._search"
+    with pytest.raises(subprocess.CalledProcessError):
+        import_module(f"from {MODULE} import NotAName")
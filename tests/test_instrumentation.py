@@ -0,0 +1,111 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction import _instrument
+from src.DSCI_prediction.DSCI_prediction import (instrument, plot_cm, plot_hist_overlay,
+                                                 register_callback, tuned_para_table,
+                                                 unregister_callback)
+
+rng = np.random.default_rng(21)
+X_train = pd.DataFrame(rng.normal(size=(150, 3)), columns=['x1', 'x2', 'x3'])
+y_train = pd.Series((X_train['x1'] > 0).astype(int), name="class")
+
+
+def test_candidate_and_fold_records():
+    """
+    Test that tuned_para_table records its stages and the fit and score of every candidate and fold
+    of the searches it runs itself
+    """
+    search = GridSearchCV(make_pipeline(StandardScaler(), DecisionTreeClassifier(random_state=0)),
+                          {'decisiontreeclassifier__max_depth': [1, 2, 3]}, cv=4)
+    with instrument() as rec:
+        tuned_para_table(search, X_train, y_train)
+    table = rec.frame()
+    assert list(table.columns[:7]) == _instrument.RECORD_COLUMNS
+    folds = table.dropna(subset=["candidate", "fold"])
+    assert len(folds) == 3 * 4 * 2
+    assert set(zip(folds["candidate"], folds["fold"])) == {(c, i) for c in range(3) for i in range(4)}
+    stages = table[table["candidate"].isna() & table["fold"].isna()]["stage"].tolist()
+    assert stages == ["read", "validate", "fit", "table"]
+    assert (table["wall"] >= 0).all()
+    assert table["peak_bytes"].isna().all()
+
+
+def test_search_fit_records_per_candidate():
+    """
+    Test that searches fitted by search.fit are still fitted by it when observed, and
+    report every candidate from cv_results_
+    """
+    for search in (HalvingGridSearchCV(DecisionTreeClassifier(random_state=0), {'max_depth': [1, 2, 3]},
+                                       cv=3, random_state=0),
+                   GridSearchCV(DecisionTreeClassifier(random_state=0), {'max_depth': [1, 2, 3]}, cv=3)):
+        with instrument() as rec:
+            tuned_para_table(search, X_train, y_train)
+        table = rec.frame()
+        assert table.loc[table["stage"] == "fit", "path"].dropna().tolist() == ["search.fit"]
+        per_candidate = table.dropna(subset=["candidate"])
+        assert len(per_candidate) == 2 * len(search.cv_results_["params"])
+
+
+def test_memory_and_nested_peaks():
+    """
+    Test that with memory the peak of a stage covers the peaks of the stages nested in it
+    """
+    frame = X_train.assign(**{"class": y_train})
+    with instrument(memory=True) as rec:
+        plot_hist_overlay(frame, None, ['x1', 'x2', 'x3'], None, label_col="class")
+    table = rec.frame().set_index(["function", "stage"])
+    assert table["peak_bytes"].notna().all()
+    assert table.loc[("plot_hist_overlay", "summary"), "peak_bytes"] >= \
+        table.loc[("hist_summary", "bin"), "peak_bytes"]
+
+
+def test_callback_and_jsonl(tmp_path):
+    """
+    Test that a registered callback and the JSON lines file get the records, and nothing is recorded afterwards
+    """
+    seen = []
+    register_callback(seen.append)
+    try:
+        with instrument(jsonl=tmp_path / "stages.jsonl") as rec:
+            plot_cm(DecisionTreeClassifier(), X_train, y_train, X_train, y_train, "cm")
+    finally:
+        unregister_callback(seen.append)
+    assert [(r["function"], r["stage"]) for r in seen] == [
+        ("cm_summary", "read"), ("cm_summary", "validate"), ("cm_summary", "fit"),
+        ("cm_summary", "predict"), ("plot_cm", "summary"), ("plot_cm", "draw")]
+    lines = [json.loads(line) for line in (tmp_path / "stages.jsonl").read_text().splitlines()]
+    assert len(lines) == len(rec.records) == len(seen)
+    assert lines[0]["peak_bytes"] is None
+
+    plot_cm(DecisionTreeClassifier(), X_train, y_train, X_train, y_train, "cm")
+    assert len(seen) == 6 and not _instrument.enabled()
+
+
+def test_other_threads_are_not_recorded():
+    """
+    Test that an instrument block records the calls of its own thread only, while a registered
+    callback gets the calls of every thread
+    """
+    frame = X_train.assign(**{"class": y_train})
+    seen = []
+    register_callback(seen.append)
+    try:
+        with instrument() as rec:
+            other = threading.Thread(target=plot_hist_overlay,
+                                     args=(frame, None, ['x1'], None), kwargs={"label_col": "class"})
+            other.start()
+            other.join()
+            assert rec.records == []
+            plot_hist_overlay(frame, None, ['x1'], None, label_col="class")
+    finally:
+        unregister_callback(seen.append)
+    assert len(rec.records) > 0
+    assert len(seen) == 2 * len(rec.records)
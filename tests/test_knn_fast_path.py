@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import GridSearchCV, KFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from src.DSCI_prediction.DSCI_prediction import tuned_para_table
+
+rng = np.random.default_rng(3)
+X_train = pd.DataFrame(rng.normal(size=(120, 3)), columns=['x1', 'x2', 'x3'])
+y_train = pd.Series(rng.integers(0, 3, 120), name="class")
+
+
+def make_search(scoring="recall_macro", **kwargs):
+    return GridSearchCV(make_pipeline(StandardScaler(), KNeighborsClassifier()),
+                        param_grid={'kneighborsclassifier__n_neighbors': range(1, 10),
+                                    'kneighborsclassifier__weights': ['uniform', 'distance']},
+                        cv=10, scoring=scoring, return_train_score=True, **kwargs)
+
+
+@pytest.mark.parametrize("scoring", ["recall_macro", "accuracy", "neg_log_loss"])
+def test_fast_path_matches_grid_search(scoring):
+    """
+    Test that the single-query fast path gives the same table and cv_results_ as GridSearchCV.fit
+    """
+    fast, slow = make_search(scoring), make_search(scoring)
+    fast_table = tuned_para_table(fast, X_train, y_train)
+    slow_table = tuned_para_table(slow, X_train, y_train, fast_knn=False)
+    pd.testing.assert_frame_equal(fast_table, slow_table)
+    for key in ["mean_test_score", "split3_test_score", "mean_train_score", "rank_test_score"]:
+        assert np.allclose(fast.cv_results_[key], slow.cv_results_[key])
+    assert list(fast.cv_results_["params"]) == list(slow.cv_results_["params"])
+    assert np.array_equal(fast.predict(X_train), slow.predict(X_train))
+
+
+def test_fast_path_counts_neighbor_queries(monkeypatch):
+    """
+    Test that only one neighbor query per fold is made for the test scores
+    """
+    calls = []
+    original = KNeighborsClassifier.kneighbors
+    monkeypatch.setattr(KNeighborsClassifier, "kneighbors",
+                        lambda self, *args, **kwargs: calls.append(1) or original(self, *args, **kwargs))
+    search = GridSearchCV(KNeighborsClassifier(), {'n_neighbors': range(1, 10),
+                                                   'weights': ['uniform', 'distance']},
+                          cv=KFold(5), refit=False)
+    tuned_para_table(search, X_train, y_train)
+    assert len(calls) == 5
+
+
+def test_fast_path_falls_back_when_k_exceeds_fold():
+    """
+    Test that a k larger than the training folds is left to GridSearchCV itself
+    """
+    search = GridSearchCV(KNeighborsClassifier(), {'n_neighbors': [1, 2, 200]}, cv=3)
+    table = tuned_para_table(search, X_train, y_train)
+    assert list(table.columns) == ['n_neighbors', 'best_score']
+    assert np.isnan(search.cv_results_["mean_test_score"][2])
+
+
+def test_fast_path_falls_back_on_tied_neighbors():
+    """
+    Test that duplicate, integer-valued rows (neighbors tied at the k-th place) give
+    the cv_results_ of GridSearchCV.fit
+    """
+    tie_rng = np.random.default_rng(0)
+    X = pd.DataFrame(tie_rng.integers(1, 11, (300, 4)), columns=['a', 'b', 'c', 'd'])
+    X = pd.concat([X, X.iloc[:100]], ignore_index=True)
+    y = pd.Series(np.where(X['a'] + tie_rng.integers(0, 6, len(X)) > 8, "m", "b"))
+
+    def tie_search():
+        return GridSearchCV(KNeighborsClassifier(), {'n_neighbors': range(1, 12),
+                                                     'weights': ['uniform', 'distance']}, cv=5)
+
+    fast, slow = tie_search(), tie_search()
+    tuned_para_table(fast, X, y)
+    slow.fit(X, y)
+    assert np.array_equal(fast.cv_results_["mean_test_score"], slow.cv_results_["mean_test_score"])
+    assert fast.best_params_ == slow.best_params_
+
+
+def test_fast_path_failing_scorer_and_fitted_state():
+    """
+    Test that a scorer failing on the labels gives error_score as in GridSearchCV.fit, and that
+    the fast path leaves the cv_results_ dtypes and feature_names_in_ of GridSearchCV.fit
+    """
+    labels = y_train.map({0: "a", 1: "b", 2: "c"})
+    fast, slow = make_search("recall"), make_search("recall")
+    with pytest.warns(UserWarning, match="Scoring failed"):
+        tuned_para_table(fast, X_train, labels)
+    with pytest.warns(UserWarning):
+        slow.fit(X_train, labels)
+    assert np.isnan(fast.cv_results_["mean_test_score"]).all()
+    with pytest.raises(ValueError):
+        tuned_para_table(make_search("recall", error_score="raise"), X_train, labels)
+    fast, slow = make_search(), make_search()
+    tuned_para_table(fast, X_train, y_train)
+    slow.fit(X_train, y_train)
+    assert list(fast.cv_results_) == list(slow.cv_results_)
+    for key in ["param_kneighborsclassifier__n_neighbors", "param_kneighborsclassifier__weights"]:
+        assert fast.cv_results_[key].dtype == slow.cv_results_[key].dtype
+    assert list(fast.feature_names_in_) == list(slow.feature_names_in_) == ['x1', 'x2', 'x3']
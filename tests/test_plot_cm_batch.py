@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+import matplotlib as mpl
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import confusion_matrix
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction.DSCI_prediction import plot_cm_batch
+
+rng = np.random.default_rng(6)
+X = pd.DataFrame({'x1': rng.normal(size=90), 'x2': rng.normal(size=90)})
+y = pd.Series(np.select([X['x1'] < -0.5, X['x1'] < 0.5], ["a", "b"], "c"), name="class")
+X_train, X_test, y_train, y_test = X[:60], X[60:], y[:60], y[60:]
+models = {"tree": DecisionTreeClassifier(random_state=0),
+          "knn": KNeighborsClassifier(3),
+          "logreg": LogisticRegression()}
+
+
+@pytest.mark.parametrize("shared_data", ["shm", None])
+def test_batch_matches_sklearn_confusion_matrix(shared_data):
+    """
+    Test that every matrix equals sklearn's confusion_matrix of the same fitted model
+    and that one subplot is drawn per model
+    """
+    fig, tidy = plot_cm_batch(models, X_train, y_train, X_test, y_test, "Fig 5",
+                              n_jobs=2, shared_data=shared_data)
+    assert isinstance(fig, mpl.figure.Figure)
+    assert [ax.get_title() for ax in fig.axes[:3]] == ["tree", "knn", "logreg"]
+    assert list(tidy.columns) == ["model", "true", "predicted", "count"]
+    for name, model in models.items():
+        predictions = model.fit(X_train, y_train).predict(X_test)
+        expected = confusion_matrix(y_test, predictions, labels=["a", "b", "c"])
+        got = tidy[tidy["model"] == name]["count"].to_numpy().reshape(3, 3)
+        assert np.array_equal(got, expected)
+
+
+def test_batch_wrong_input():
+    """
+    Check TypeError raised when models is not a dict or the data has a wrong type
+    """
+    with pytest.raises(TypeError):
+        plot_cm_batch([DecisionTreeClassifier()], X_train, y_train, X_test, y_test)
+    with pytest.raises(TypeError):
+        plot_cm_batch(models, "wrong input", y_train, X_test, y_test)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import confusion_matrix
+from sklearn.neighbors import KNeighborsClassifier
+from src.DSCI_prediction.DSCI_prediction import plot_cm
+
+rng = np.random.default_rng(7)
+X_train = pd.DataFrame(rng.normal(size=(200, 2)), columns=['x1', 'x2'])
+y_train = pd.Series(rng.integers(0, 3, 200), name="class")
+X_test = pd.DataFrame(rng.normal(size=(1003, 2)), columns=['x1', 'x2'])
+y_test = pd.Series(rng.integers(0, 3, 1003), name="class")
+expected = confusion_matrix(y_test, KNeighborsClassifier().fit(X_train, y_train).predict(X_test))
+
+
+@pytest.mark.parametrize("n_threads", [None, 3])
+def test_chunk_size_matches_one_shot(n_threads):
+    """
+    Test that predicting in chunks, with or without threads, gives the one-shot matrix
+    """
+    disp = plot_cm(KNeighborsClassifier(), X_train, y_train, X_test, y_test, "Fig",
+                   chunk_size=100, n_threads=n_threads)
+    assert np.array_equal(disp.confusion_matrix, expected)
+    assert disp.confusion_matrix.dtype.kind == "i"
+
+
+def test_iterator_of_chunks():
+    """
+    Test that an iterator of (X, y) chunks can replace X_test and y_test
+    """
+    chunks = ((X_test[i:i + 250], y_test[i:i + 250]) for i in range(0, len(X_test), 250))
+    disp = plot_cm(KNeighborsClassifier(), X_train, y_train, chunks, None, "Fig")
+    assert np.array_equal(disp.confusion_matrix, expected)
+    assert disp.text_.shape == (3, 3)
+
+
+def test_wrong_chunk_size():
+    """
+    Check TypeError raised when chunk_size is not a positive int
+    """
+    with pytest.raises(TypeError):
+        plot_cm(KNeighborsClassifier(), X_train, y_train, X_test, y_test, "Fig", chunk_size=0)
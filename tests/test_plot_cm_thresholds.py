@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import confusion_matrix
+from sklearn.svm import LinearSVC
+from src.DSCI_prediction.DSCI_prediction import plot_cm_thresholds
+
+rng = np.random.default_rng(8)
+X = pd.DataFrame({'x1': rng.normal(size=300), 'x2': rng.normal(size=300)})
+y = pd.Series(np.where(X['x1'] + rng.normal(size=300) > 0, "malignant", "benign"), name="class")
+X_train, X_test, y_train, y_test = X[:200], X[200:], y[:200], y[200:]
+
+
+def test_sweep_matches_thresholded_predictions():
+    """
+    Test that the counts at every distinct threshold equal the confusion matrix
+    of the thresholded probabilities
+    """
+    model = LogisticRegression()
+    table, fig = plot_cm_thresholds(model, X_train, y_train, X_test, y_test, "Fig 6")
+    proba = model.predict_proba(X_test)[:, 1]
+    assert list(table.columns) == ["threshold", "tp", "fp", "tn", "fn", "precision", "recall", "fpr"]
+    assert len(table) == len(np.unique(proba)) + 1
+    for _, row in table.iloc[1::25].iterrows():
+        predicted = np.where(proba >= row.threshold, "malignant", "benign")
+        (tn, fp), (fn, tp) = confusion_matrix(y_test, predicted, labels=["benign", "malignant"])
+        assert (row.tn, row.fp, row.fn, row.tp) == (tn, fp, fn, tp)
+    # curves plus the default and best F1 thresholds
+    assert len(fig.axes) == 3
+    assert fig.axes[1].get_title() == "threshold = 0.5"
+
+
+def test_sweep_decision_function_and_selected_thresholds():
+    """
+    Test models without predict_proba and explicitly selected thresholds
+    """
+    table, fig = plot_cm_thresholds(LinearSVC(), X_train, y_train, X_test, y_test, "Fig",
+                                    thresholds=[-1.0, 0.0, 1.0], pos_label="benign")
+    assert len(fig.axes) == 4
+    assert table["tp"].iloc[-1] == (y_test == "benign").sum()
+    assert table["fp"].iloc[-1] == (y_test != "benign").sum()
+
+
+def test_sweep_needs_binary_target():
+    """
+    Check ValueError raised for more than two classes
+    """
+    with pytest.raises(ValueError):
+        plot_cm_thresholds(LogisticRegression(), X_train, y_train.where(X_train['x2'] > 1, "other"),
+                           X_test, y_test, "Fig")
+
+
+def test_sweep_prefit_model_is_not_refitted(monkeypatch):
+    """
+    Test that a prefit model gives the table of a fitted one without being fitted again
+    """
+    model = LogisticRegression().fit(X_train, y_train)
+    expected, _ = plot_cm_thresholds(LogisticRegression(), X_train, y_train, X_test, y_test, "Fig")
+    monkeypatch.setattr(LogisticRegression, "fit", lambda *args: pytest.fail("refitted"))
+    table, fig = plot_cm_thresholds(model, None, None, X_test, y_test, "Fig", prefit=True)
+    pd.testing.assert_frame_equal(table, expected)
+    with pytest.raises(TypeError):
+        plot_cm_thresholds(model, None, None, X_test, y_test, "Fig")
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from src.plot_hist import plot_hist_overlay
+from src.DSCI_prediction.DSCI_prediction import plot_hist_overlay
 import pytest
 
 # simpler dataframe
@@ -140,3 +140,19 @@ def test_edge_case_not_square():
     assert notsqr_axe.get_gridspec().nrows == ax3.get_gridspec().nrows
     assert notsqr_axe.get_gridspec().nrows == 2
     assert notsqr_axe.get_title() == "Figure 4.3: Histogram of Feat3 for each target class label" 
+
+
+def test_density_and_hist_only_options():
+    """
+    Test that density=True draws every label as a density and that options only
+    the matplotlib hist function has raise a TypeError
+    """
+    fig4, axe4 = plot_hist_overlay(df0, df1, ["x1"], labels=labels, bins=4, density=True)
+    assert axe4.get_ylabel() == "Density"
+    for patch in axe4.patches:
+        heights, edges = patch.get_data()[:2]
+        assert np.isclose(np.sum(heights * np.diff(edges)), 1.0)
+    with pytest.raises(TypeError):
+        plot_hist_overlay(df0, df1, ["x1"], labels=labels, histtype="step")
+    with pytest.raises(ValueError):
+        plot_hist_overlay(df0, df1, ["x1"], labels=labels, bins="auto")
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from src.DSCI_prediction.DSCI_prediction import tuned_para_table, FoldCache
+
+rng = np.random.default_rng(4)
+X_train = pd.DataFrame(rng.normal(size=(150, 4)), columns=['x1', 'x2', 'x3', 'x4'])
+X_train.iloc[::7, 1] = np.nan
+y_train = pd.Series((X_train['x1'] + rng.normal(size=150) > 0).astype(int), name="class")
+
+
+class CountingScaler(StandardScaler):
+    fits = 0
+
+    def fit(self, X, y=None, sample_weight=None):
+        type(self).fits += 1
+        return super().fit(X, y, sample_weight)
+
+
+def make_search():
+    return GridSearchCV(make_pipeline(SimpleImputer(), CountingScaler(), LogisticRegression()),
+                        param_grid={'logisticregression__C': [0.01, 0.1, 1, 10]},
+                        cv=5, scoring="recall", return_train_score=True)
+
+
+def test_prefix_fitted_once_per_fold():
+    """
+    Test that the invariant imputer and scaler are fitted once per fold, with the
+    same table and scores as GridSearchCV.fit
+    """
+    CountingScaler.fits = 0
+    fast = make_search()
+    table = tuned_para_table(fast, X_train, y_train)
+    # 5 folds plus the final refit
+    assert CountingScaler.fits == 6
+    slow = make_search()
+    slow_table = tuned_para_table(slow, X_train, y_train, prefix_cache=False)
+    pd.testing.assert_frame_equal(table, slow_table)
+    for key in ["mean_test_score", "mean_train_score", "rank_test_score"]:
+        assert np.allclose(fast.cv_results_[key], slow.cv_results_[key])
+
+
+def test_fold_cache_shared_between_searches():
+    """
+    Test that a shared FoldCache reuses the preprocessed folds in a second search
+    and stays within its size bound
+    """
+    cache = FoldCache()
+    tuned_para_table(make_search(), X_train, y_train, prefix_cache=cache)
+    assert len(cache) == 5 and cache.misses == 5
+    CountingScaler.fits = 0
+    tuned_para_table(make_search(), X_train, y_train, prefix_cache=cache)
+    assert cache.hits == 5 and CountingScaler.fits == 1
+
+    small = FoldCache(max_bytes=2 * 150 * 4 * 8)
+    tuned_para_table(make_search(), X_train, y_train, prefix_cache=small)
+    assert small.nbytes <= small.max_bytes and len(small) < 5
+
+
+def test_varied_first_step_runs_full_search():
+    """
+    Test that a grid changing the first step falls back to GridSearchCV.fit
+    """
+    search = GridSearchCV(make_pipeline(StandardScaler(), KNeighborsClassifier()),
+                          param_grid={'standardscaler': [StandardScaler(), 'passthrough'],
+                                      'kneighborsclassifier__n_neighbors': [3, 5]}, cv=3)
+    table = tuned_para_table(search, X_train.fillna(0), y_train)
+    assert list(table.columns) == ['kneighborsclassifier__n_neighbors', 'standardscaler', 'best_score']
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from src.DSCI_prediction.DSCI_prediction import tuned_para_table
+
+rng = np.random.default_rng(23)
+X_train = pd.DataFrame(rng.normal(size=(600, 4)), columns=['x1', 'x2', 'x3', 'x4'])
+y_train = pd.Series((X_train['x1'] * X_train['x2'] + 0.3 * rng.normal(size=600) > 0).astype(int),
+                    name="class")
+
+
+def make_search():
+    return GridSearchCV(make_pipeline(StandardScaler(), KNeighborsClassifier()),
+                        {'kneighborsclassifier__n_neighbors': [1, 3, 5, 9, 15, 25, 51, 101, 201, 301]},
+                        cv=8)
+
+
+def test_racing_finds_the_same_winner_with_fewer_fits():
+    """
+    Test that racing gives the full search's table while pruning hopeless candidates
+    """
+    full = tuned_para_table(make_search(), X_train, y_train, fast_knn=False)
+    search = make_search()
+    raced = tuned_para_table(search, X_train, y_train, racing=True)
+    pd.testing.assert_frame_equal(raced, full, check_like=True)
+    report = raced.attrs["racing"]
+    assert list(report.columns) == ["params", "n_folds", "pruned_after_fold", "partial_mean_score"]
+    pruned = report["pruned_after_fold"].notna()
+    assert pruned.any() and (report.loc[pruned, "pruned_after_fold"] >= 2).all()
+    assert (report.loc[~pruned, "n_folds"] == 8).all()
+    assert raced.attrs["search_resources"]["n_fits"].iloc[0] == report["n_folds"].sum() < 10 * 8
+    assert np.isnan(search.cv_results_["mean_test_score"][pruned.to_numpy()]).all()
+    assert (search.cv_results_["rank_test_score"][pruned.to_numpy()] > (~pruned).sum()).all()
+
+
+def test_racing_options_are_checked():
+    """
+    Test that racing rejects unknown options and unsupported searches
+    """
+    with pytest.raises(ValueError):
+        tuned_para_table(make_search(), X_train, y_train, racing={"alpha": 0.05, "folds": 2})
+    with pytest.raises(ValueError):
+        tuned_para_table(make_search(), X_train, y_train, racing={"alpha": 2})
+    with pytest.raises(TypeError):
+        tuned_para_table(make_search(), X_train, y_train, racing="yes")
+    halving = HalvingGridSearchCV(KNeighborsClassifier(), {'n_neighbors': [1, 5]}, cv=3)
+    with pytest.raises(ValueError):
+        tuned_para_table(halving, X_train, y_train, racing=True)
+
+
+def test_racing_results_are_cached_apart(tmp_path):
+    """
+    Test that a cached racing result is not served to a full search
+    """
+    tuned_para_table(make_search(), X_train, y_train, cache=tmp_path, racing=True)
+    search = make_search()
+    table = tuned_para_table(search, X_train, y_train, cache=tmp_path)
+    assert "racing" not in table.attrs
+    assert not np.isnan(search.cv_results_["mean_test_score"]).any()
@@ -0,0 +1,61 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction.DSCI_prediction import (plot_hist_overlay, boxplot_plotting, plot_cm,
+                                                 render_figures)
+
+rng = np.random.default_rng(15)
+train_df = pd.DataFrame({'size': rng.normal(size=200), 'shape': rng.normal(size=200),
+                         'class': rng.integers(0, 2, 200)})
+X, y = train_df[['size', 'shape']], train_df['class']
+
+
+def jobs():
+    return [{"name": "hist", "function": "plot_hist_overlay",
+             "args": (train_df, None, ['size', 'shape'], None), "kwargs": {"label_col": "class"}},
+            {"name": "box", "function": "boxplot_plotting",
+             "args": (1, 2, 8, 4, ['size', 'shape'], train_df, 2)},
+            {"name": "cm", "function": plot_cm,
+             "args": (DecisionTreeClassifier(random_state=0), X[:150], y[:150], X[150:], y[150:], "Fig")}]
+
+
+def test_plotting_leaves_no_pyplot_figures():
+    """
+    Test that the plotting functions build their own figures and leave pyplot untouched
+    """
+    plt.close("all")
+    fig, _ = plot_hist_overlay(train_df, None, ['size'], None, label_col="class")
+    fig2, _ = plot_hist_overlay(train_df, None, ['size'], None, label_col="class")
+    box = boxplot_plotting(1, 2, 8, 4, ['size', 'shape'], train_df, 2)
+    disp = plot_cm(DecisionTreeClassifier(), X, y, X, y, "Fig 3")
+    assert plt.get_fignums() == []
+    assert fig is not fig2 and len(fig.axes) == 1
+    assert disp.ax_.get_title() == "Fig 3" and disp.figure_.canvas.get_default_filetype() == "png"
+    assert len(box.axes) == 2
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_render_figures_writes_pngs(tmp_path, executor):
+    """
+    Test that every job is written as a PNG by both kinds of pools
+    """
+    done = render_figures(jobs(), tmp_path / "figures", executor=executor, max_workers=3, dpi=50)
+    assert list(done["name"]) == ["hist", "box", "cm"]
+    for path in done["path"]:
+        with open(path, "rb") as f:
+            assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+def test_render_figures_checks_jobs(tmp_path):
+    """
+    Check errors for repeated names, unknown pools and jobs that return no figure
+    """
+    with pytest.raises(ValueError):
+        render_figures(jobs() + jobs()[:1], tmp_path)
+    with pytest.raises(ValueError):
+        render_figures(jobs(), tmp_path, executor="gpu")
+    with pytest.raises(TypeError):
+        render_figures([{"name": "table", "function": "boxplot_summary",
+                         "args": (train_df, ['size'])}], tmp_path)
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pandas as pd
+from src.DSCI_prediction.report import build_report, main
+
+rng = np.random.default_rng(19)
+data = pd.DataFrame({'x1': rng.normal(size=120), 'x2': rng.normal(size=120),
+                     'note': ['a'] * 120})
+data['class'] = (data['x1'] + rng.normal(scale=0.5, size=120) > 0).astype(int)
+model = {"estimator": "sklearn.neighbors.KNeighborsClassifier",
+         "param_grid": {"n_neighbors": [1, 3, 5]}, "cv": 3}
+
+
+def test_report_reuses_unchanged_stages(tmp_path):
+    """
+    Test that a second run reuses every stage and a new model only rebuilds tuning and the confusion matrix
+    """
+    path = tmp_path / "train.csv"
+    data.to_csv(path, index=False)
+    out = tmp_path / "out"
+    first = build_report(path, "class", out, model=model)
+    assert not first["cached"].any()
+    for name in ["histograms.png", "boxplots.png", "tuned_params.csv", "confusion_matrix.png"]:
+        assert (out / name).exists()
+    manifest = json.loads((out / "report.json").read_text())
+    assert manifest["features"] == ['x1', 'x2']
+
+    second = build_report(path, "class", out, model=model)
+    assert second["cached"].all()
+    assert list(second["key"]) == list(first["key"])
+
+    third = build_report(path, "class", out, model={**model, "param_grid": {"n_neighbors": [1, 7]}})
+    assert dict(zip(third["stage"], third["cached"])) == {
+        "hist": True, "boxplot": True, "tune": False, "cm": False}
+    assert pd.read_csv(out / "tuned_params.csv")["n_neighbors"].iloc[0] in [1, 7]
+
+    data.assign(x1=data['x1'] + 1).to_csv(path, index=False)
+    assert not build_report(path, "class", out, model=model)["cached"].any()
+
+
+def test_report_cli(tmp_path, capsys):
+    """
+    Test that the console entry point builds the report and prints one line per stage
+    """
+    path = tmp_path / "train.csv"
+    data.to_csv(path, index=False)
+    assert main([str(path), "--label", "class", "--features", "x1", "x2",
+                 "--model", json.dumps(model), "--out", str(tmp_path / "out")]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 4
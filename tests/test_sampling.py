@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.DSCI_prediction.DSCI_prediction import (hist_summary, boxplot_summary, plot_hist_overlay,
+                                                 boxplot_plotting)
+from src.DSCI_prediction._sample import StratifiedReservoir, target_size
+
+rng = np.random.default_rng(25)
+n = 200_000
+train_df = pd.DataFrame({'size': rng.normal(size=n), 'shape': rng.exponential(size=n),
+                         'class': rng.choice(["benign", "malignant"], n, p=[0.95, 0.05])})
+population = train_df["class"].value_counts()
+
+
+def chunks(df, size=30_000):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+
+def test_hist_sample_estimates_population():
+    """
+    Test that sampled bin counts add up to every class and stay within the reported error
+    """
+    edges = np.linspace(-5, 5, 21)
+    full = hist_summary(train_df, None, ['size'], label_col="class", bins=edges)
+    for data in (train_df, chunks(train_df)):
+        summary = hist_summary(data, None, ['size'], label_col="class", bins=edges, sample=4000)
+        info = summary.attrs["sample"]
+        assert info["n_sampled"] == {"benign": 4000, "malignant": 4000}
+        assert info["n_population"] == population.to_dict()
+        totals = summary.groupby("label")["count"].sum()
+        assert np.allclose(totals, population[totals.index])
+        share = (summary["count"] - full["count"]).abs() / summary["label"].map(population)
+        assert share.max() <= info["error"]["size"]
+    # a sample larger than every class is every row
+    exact = hist_summary(train_df, None, ['size'], label_col="class", bins=edges, sample=n)
+    pd.testing.assert_frame_equal(exact, full)
+    assert exact.attrs["sample"]["error"]["size"] == 0
+    split = hist_summary(train_df[train_df["class"] == "benign"], train_df[train_df["class"] != "benign"],
+                         ['size'], labels=["b", "m"], bins=edges, sample=0.02)
+    assert split.attrs["sample"]["n_sampled"]["b"] == target_size(0.02, population["benign"])
+    assert split.attrs["sample"]["error"]["size"] <= 0.02
+    with pytest.raises(TypeError):
+        hist_summary(train_df, None, ['size'], label_col="class", sample=0.7)
+
+
+def test_boxplot_sample_quartiles():
+    """
+    Test that sampled quartiles have the rank of the full data quartiles up to the rank error
+    """
+    for data in (train_df, chunks(train_df)):
+        table = boxplot_summary(data, ['size', 'shape'], sample=0.02)
+        assert table.loc["size", "n"].to_dict() == population.to_dict()
+        assert table.attrs["rank_error"] <= 0.02
+        for (var, label), row in table.iterrows():
+            values = train_df.loc[train_df["class"] == label, var].to_numpy()
+            for q, col in ((0.25, "q1"), (0.5, "med"), (0.75, "q3")):
+                assert abs(np.mean(values <= row[col]) - q) <= table.attrs["rank_error"]
+
+
+def test_reservoir_is_uniform():
+    """
+    Test that the reservoir keeps every part of the stream alike
+    """
+    frame = pd.DataFrame({'position': np.arange(100_000), 'class': np.arange(100_000) % 2})
+    reservoir = StratifiedReservoir(['position'], 'class', size=5000)
+    for chunk in chunks(frame, 7_000):
+        reservoir.update(chunk)
+    rows, seen, kept, classes = reservoir.frame()
+    assert classes == [0, 1] and list(seen) == [50_000, 50_000] and list(kept) == [5000, 5000]
+    assert rows["position"].is_unique
+    counts, _ = np.histogram(rows["position"], bins=10, range=(0, 100_000))
+    assert np.all(np.abs(counts - 1000) < 150)
+
+
+def test_sampled_figures_are_annotated():
+    """
+    Test that every subplot of a sampled figure notes its sample
+    """
+    fig, ax = plot_hist_overlay(train_df, None, ['size', 'shape'], None, label_col="class",
+                                sample=1000)
+    notes = [t.get_text() for a in fig.axes for t in a.texts]
+    assert len(notes) == 2 and notes[0].startswith(f"sample of 2,000 / {n:,} rows")
+    fig = boxplot_plotting(1, 2, 10, 5, ['size', 'shape'], train_df, 1, sample=1000)
+    assert all("quartile ranks" in t.get_text() for a in fig.axes for t in a.texts)
+    assert sum(len(a.texts) for a in fig.axes) == 2
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import make_scorer, precision_score, recall_score
+from sklearn.model_selection import GridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from src.DSCI_prediction.DSCI_prediction import tuned_para_table, SearchCache, search_fingerprint
+from src.DSCI_prediction._aio import request_key
+
+rng = np.random.default_rng(1)
+X_train = pd.DataFrame({'x1': rng.normal(size=60), 'x2': rng.normal(size=60)})
+y_train = pd.Series((X_train['x1'] + rng.normal(size=60) > 0).astype(int), name="class")
+
+
+def make_search(n_neighbors=range(1, 6)):
+    return GridSearchCV(make_pipeline(StandardScaler(), KNeighborsClassifier()),
+                        param_grid={'kneighborsclassifier__n_neighbors': n_neighbors,
+                                    'kneighborsclassifier__weights': ['uniform', 'distance']},
+                        cv=5, scoring="recall")
+
+
+def test_cache_hit_skips_fit(tmp_path):
+    """
+    Test that a second run with the same data and search returns the stored table
+    and cv_results_ without calling fit
+    """
+    cold = tuned_para_table(make_search(), X_train, y_train, cache=str(tmp_path))
+    warm_search = make_search()
+    warm_search.fit = lambda *args, **kwargs: pytest.fail("search was refit on a cache hit")
+    warm = tuned_para_table(warm_search, X_train, y_train, cache=str(tmp_path))
+    pd.testing.assert_frame_equal(cold, warm)
+    assert len(warm_search.cv_results_["params"]) == 10
+    assert warm_search.best_estimator_.predict(X_train).shape == (60,)
+
+
+def test_fingerprint_tracks_data_and_grid():
+    """
+    Test that the key changes with the data or the grid but not with n_jobs
+    """
+    key = search_fingerprint(make_search(), X_train, y_train)
+    assert key == search_fingerprint(make_search(), X_train.copy(), y_train.copy())
+    assert key == search_fingerprint(make_search().set_params(n_jobs=4), X_train, y_train)
+    assert key != search_fingerprint(make_search(range(1, 7)), X_train, y_train)
+    changed = X_train.copy()
+    changed.iloc[0, 0] += 1
+    assert key != search_fingerprint(make_search(), changed, y_train)
+
+
+def test_fingerprint_hashes_arrays_and_class_modules():
+    """
+    Test that long parameter arrays (whose repr is truncated) and classes of the same name from
+    other modules get other keys
+    """
+    grid = np.linspace(0, 1, 2000)
+    changed = grid.copy()
+    changed[1000] += 0.5
+    keys = {search_fingerprint(GridSearchCV(KNeighborsClassifier(), {'leaf_size': values}),
+                               X_train, y_train) for values in (grid, changed, list(grid))}
+    assert len(keys) == 3
+    twins = [type("Scaler", (StandardScaler,), {"__module__": module}) for module in ("one", "two")]
+    keys = {search_fingerprint(GridSearchCV(make_pipeline(twin(), KNeighborsClassifier()),
+                                            {'kneighborsclassifier__n_neighbors': [1]}), X_train, y_train)
+            for twin in twins}
+    assert len(keys) == 2
+
+
+def test_fingerprint_tells_scorers_apart(tmp_path):
+    """
+    Test that scorers with other score functions or arguments get other keys, and that
+    searches with a lambda scorer are left uncached instead of sharing a key
+    """
+    keys = set()
+    for scorer in (make_scorer(recall_score, pos_label=0), make_scorer(recall_score),
+                   make_scorer(precision_score)):
+        search = make_search()
+        search.set_params(scoring=scorer)
+        keys.add(search_fingerprint(search, X_train, y_train))
+    assert len(keys) == 3
+    for threshold in (0.2, 0.8):
+        search = make_search()
+        search.set_params(scoring=lambda est, X, y, t=threshold: np.mean(est.predict(X) == y) > t)
+        with pytest.warns(UserWarning, match="not cached"):
+            tuned_para_table(search, X_train, y_train, cache=str(tmp_path))
+        # nor are such calls deduplicated by the async functions
+        assert request_key("tuned_para_table", (search, X_train, y_train), {}) is None
+    assert len(SearchCache(str(tmp_path))) == 0
+
+
+def test_cache_eviction_and_invalidation(tmp_path):
+    """
+    Test that the least recently used entries are evicted past max_bytes and that
+    invalidate removes entries
+    """
+    cache = SearchCache(tmp_path, max_bytes=2500)
+    cache.put("a", b"x" * 1000)
+    cache.put("b", b"x" * 1000)
+    assert cache.get("a") is not None
+    cache.put("c", b"x" * 1000)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    cache.invalidate("a")
+    assert "a" not in cache and len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import randint
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (GridSearchCV, HalvingGridSearchCV,
+                                     HalvingRandomSearchCV, RandomizedSearchCV)
+from sklearn.neighbors import KNeighborsClassifier
+from src.DSCI_prediction.DSCI_prediction import tuned_para_table
+
+rng = np.random.default_rng(2)
+X_train = pd.DataFrame({'x1': rng.normal(size=400), 'x2': rng.normal(size=400)})
+y_train = (X_train['x1'] + rng.normal(size=400) > 0).astype(int)
+grid = {'n_neighbors': range(1, 19), 'weights': ['uniform', 'distance']}
+
+
+def test_halving_grid_reports_rungs():
+    """
+    Test that a halving search gives the same table layout plus the samples and
+    candidates of every rung
+    """
+    search = HalvingGridSearchCV(KNeighborsClassifier(), grid, cv=3, factor=3, random_state=0)
+    table = tuned_para_table(search, X_train, y_train)
+    assert list(table.columns) == ['n_neighbors', 'weights', 'best_score']
+    resources = table.attrs["search_resources"]
+    assert list(resources["n_resources"]) == list(search.n_resources_)
+    assert list(resources["n_candidates"]) == list(search.n_candidates_)
+    assert resources["n_eliminated"].sum() == search.n_candidates_[0] - search.n_candidates_[-1]
+    assert (resources["resource"] == "n_samples").all()
+
+
+def test_randomized_searches_accepted():
+    """
+    Test that randomized searches are accepted and report a single iteration
+    """
+    search = RandomizedSearchCV(KNeighborsClassifier(), {'n_neighbors': randint(1, 19)},
+                                n_iter=5, cv=3, random_state=0)
+    table = tuned_para_table(search, X_train, y_train)
+    assert list(table.columns) == ['n_neighbors', 'best_score']
+    resources = table.attrs["search_resources"]
+    assert resources[["n_resources", "n_candidates", "n_fits"]].values.tolist() == [[400, 5, 15]]
+
+    halving = HalvingRandomSearchCV(KNeighborsClassifier(), grid, cv=3, random_state=0)
+    table = tuned_para_table(halving, X_train, y_train)
+    assert set(table.columns) == {'n_neighbors', 'weights', 'best_score'}
+    assert len(table.attrs["search_resources"]) == halving.n_iterations_
+
+
+def test_grid_search_single_iteration():
+    """
+    Test that an exhaustive grid search reports every candidate in one iteration
+    """
+    table = tuned_para_table(GridSearchCV(KNeighborsClassifier(), grid, cv=3), X_train, y_train)
+    assert table.attrs["search_resources"]["n_fits"].tolist() == [36 * 3]
@@ -0,0 +1,81 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from joblib import Parallel, delayed
+from sklearn.exceptions import FitFailedWarning
+from sklearn.model_selection import GridSearchCV
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from src.DSCI_prediction.DSCI_prediction import tuned_para_table
+
+rng = np.random.default_rng(5)
+X_train = pd.DataFrame({'x1': rng.normal(size=100), 'x2': rng.integers(0, 5, 100),
+                        'x3': rng.random(100) > 0.5})
+y_train = pd.Series(np.where(X_train['x1'] > 0, "malignant", "benign"), name="class")
+
+
+def make_search(n_jobs=2):
+    return GridSearchCV(make_pipeline(StandardScaler(), KNeighborsClassifier()),
+                        param_grid={'kneighborsclassifier__n_neighbors': [1, 3, 5],
+                                    'kneighborsclassifier__weights': ['uniform', 'distance']},
+                        cv=5, n_jobs=n_jobs, scoring="accuracy", return_train_score=True)
+
+
+@pytest.mark.parametrize("kind", ["shm", "memmap"])
+def test_shared_data_matches_search_fit(kind):
+    """
+    Test that workers attached to the shared block give the same table and scores as
+    GridSearchCV.fit, and that the peak memory of every worker is reported
+    """
+    shared = make_search()
+    table = tuned_para_table(shared, X_train, y_train, shared_data=kind)
+    plain = make_search()
+    plain.fit(X_train, y_train)
+    assert table.loc["Value", "best_score"] == plain.best_score_
+    assert np.allclose(shared.cv_results_["mean_test_score"], plain.cv_results_["mean_test_score"])
+    assert np.allclose(shared.cv_results_["mean_train_score"], plain.cv_results_["mean_train_score"])
+    workers = table.attrs["worker_memory"]
+    assert list(workers.columns) == ["pid", "n_tasks", "peak_rss"]
+    assert workers["n_tasks"].sum() == 6 * 5
+    assert (workers["peak_rss"] > 0).all()
+    assert set(shared.predict(X_train)) <= {"benign", "malignant"}
+
+
+def _allocate(n_bytes):
+    return int(np.ones(n_bytes // 8).sum())
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="the peak is only reset on Linux")
+def test_worker_memory_excludes_earlier_work():
+    """
+    Test that the peak memory of a reused worker is that of its tasks, not of what it ran before
+    """
+    Parallel(n_jobs=2)(delayed(_allocate)(400 * 2**20) for _ in range(4))
+    table = tuned_para_table(make_search(), X_train, y_train, shared_data="shm")
+    assert (table.attrs["worker_memory"]["peak_rss"] < 400 * 2**20).all()
+
+
+def test_shared_data_wrong_input():
+    """
+    Check errors raised for an unknown mode and non numeric features
+    """
+    with pytest.raises(ValueError):
+        tuned_para_table(make_search(), X_train, y_train, shared_data="pickle")
+    with pytest.raises(TypeError):
+        tuned_para_table(make_search(None), X_train.assign(x4="text"), y_train, shared_data="shm")
+
+
+def test_shared_data_failed_fit_warns():
+    """
+    Test that a fit failing in a worker gives error_score with the FitFailedWarning of GridSearchCV
+    """
+    search = make_search()
+    search.set_params(param_grid={'kneighborsclassifier__weights': ['uniform', 'bogus']},
+                      error_score=0.0)
+    with pytest.warns(FitFailedWarning, match="the score is set to 0.0"):
+        table = tuned_para_table(search, X_train, y_train, shared_data="shm")
+    assert table.loc["Value", "kneighborsclassifier__weights"] == "uniform"
+    assert search.cv_results_["mean_test_score"][1] == 0.0
@@ -0,0 +1,68 @@
+import io
+import json
+import subprocess
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+from src.DSCI_prediction.DSCI_prediction import (hist_summary, cm_summary, plot_cm,
+                                                 plot_hist_overlay)
+
+rng = np.random.default_rng(16)
+train_df = pd.DataFrame({'size': rng.normal(size=300), 'shape': rng.exponential(size=300),
+                         'class': rng.choice(["benign", "malignant"], 300)})
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_hist_summary_matches_numpy():
+    """
+    Test that every bin of the histogram data matches np.histogram on shared edges
+    """
+    summary = hist_summary(train_df, None, ['size', 'shape'], label_col="class", bins=7)
+    assert list(summary.columns) == ["variable", "label", "bin", "left", "right", "count"]
+    assert len(summary) == 2 * 2 * 7
+    for (variable, label), rows in summary.groupby(["variable", "label"], sort=False):
+        edges = np.r_[rows["left"], rows["right"].iloc[-1]]
+        expected, _ = np.histogram(train_df.loc[train_df["class"] == label, variable], bins=edges)
+        assert np.array_equal(rows["count"], expected)
+    split = hist_summary(train_df[train_df["class"] == "benign"], train_df[train_df["class"] != "benign"],
+                         ['size'], labels=["b", "m"], bins=7)
+    assert np.array_equal(split["count"], summary[summary["variable"] == "size"]["count"])
+    with pytest.raises(ValueError):
+        hist_summary(train_df, None, ['size'], labels=["only one"], label_col="class")
+
+
+def test_summaries_serialize_and_render():
+    """
+    Test that the summaries round-trip through JSON and that the figures draw the same numbers
+    """
+    hist = hist_summary(train_df, None, ['size'], label_col="class")
+    pd.testing.assert_frame_equal(pd.read_json(io.StringIO(hist.to_json(orient="records"))),
+                                  hist, check_dtype=False)
+    fig, ax = plot_hist_overlay(train_df, None, ['size'], None, label_col="class")
+    assert [t.get_text() for t in ax.get_legend().get_texts()] == ["benign", "malignant"]
+
+    X, y = train_df[['size', 'shape']], train_df['class']
+    cm = cm_summary(DecisionTreeClassifier(random_state=0), X[:200], y[:200], X[200:], y[200:])
+    assert list(cm.columns) == ["true", "predicted", "count"] and cm["count"].sum() == 100
+    assert json.loads(cm.to_json(orient="records"))[0]["true"] == "benign"
+    disp = plot_cm(DecisionTreeClassifier(random_state=0), X[:200], y[:200], X[200:], y[200:], "Fig")
+    assert np.array_equal(disp.confusion_matrix.ravel(), cm["count"])
+
+
+def test_summaries_skip_matplotlib():
+    """
+    Test that the data-only functions never import matplotlib
+    """
+    code = ("import sys, numpy as np, pandas as pd\n"
+            "from src.DSCI_prediction.DSCI_prediction import hist_summary, boxplot_summary, cm_summary\n"
+            "df = pd.DataFrame({'a': np.arange(20.0), 'class': [0, 1] * 10})\n"
+            "hist_summary(df, None, ['a'], label_col='class')\n"
+            "boxplot_summary(df, ['a'])\n"
+            "cm_summary(None, None, None, None, df['class'], y_pred=df['class'].to_numpy())\n"
+            "print('matplotlib' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"